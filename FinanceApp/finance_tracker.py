@@ -32,7 +32,7 @@ def load_data():
 
 def save_data(data):
     with open(DATA_FILE, "w") as file:
-        json.dump(data, file, indent=4)
+        json.dump(data, file, separators=(',', ':'))
 
 def load_history():
     try:
@@ -43,7 +43,7 @@ def load_history():
 
 def save_history(history):
     with open(HISTORY_FILE, "w") as file:
-        json.dump(history, file, indent=4)
+        json.dump(history, file, separators=(',', ':'))
 
 # Načtení dat a historie
 data = load_data()
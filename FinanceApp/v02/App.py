@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import json
+import os
 from datetime import datetime
 from data_manager import DataManager
 from visualizations import (
@@ -9,6 +9,9 @@ from visualizations import (
 )
 from history_manager import log_change, load_history, clear_history, delete_history_entries
 from config import DEFAULT_CATEGORIES
+from exporter import EXPORT_FORMATS, export_cache, parquet_available
+from memo import clear_memo, memo_stats
+from ledger import PERIOD_FREQS, filter_period, period_rollups, records_frame
 from retirement_planning import show_retirement_planning
 from mortgage_calculator import show_mortgage_calculator
 from compound_interest import show_compound_interest_calculator
@@ -18,7 +21,6 @@ from user_manager import (
     get_user_file_path, is_email_registered, create_session_cookie,
     get_session_cookie, clear_session_cookie
 )
-import os
 import time
 from expense_tracker import show_expense_tracker
 import plotly.express as px
@@ -170,84 +172,96 @@ def show_main_app(username, name):
         Vytvořeno pomocí Streamlit.
         """)
 
-def show_export_import_module(username: str, data: dict, module_type: str):
+    # Ladicí panel s úspěšností cache výpočtů a exportů
+    if os.getenv("SHOW_CACHE_STATS", "0") == "1":
+        show_cache_stats()
+
+def show_cache_stats():
+    """Zobrazí v sidebaru statistiky memoizovaných výpočtů a cache exportů."""
+    with st.sidebar.expander("Statistiky cache", expanded=False):
+        stats = pd.DataFrame(memo_stats() + [{'function': 'exporter.export_cache', **export_cache.stats()}])
+        stats = stats[stats['hits'] + stats['misses'] > 0].assign(hit_rate=lambda df: df['hit_rate'] * 100)
+        if stats.empty:
+            st.write("Zatím žádná volání")
+        else:
+            st.dataframe(
+                stats.rename(columns={
+                    'function': 'Funkce', 'hits': 'Zásahy', 'misses': 'Minutí',
+                    'hit_rate': 'Úspěšnost', 'size': 'Uloženo'
+                }),
+                column_config={'Úspěšnost': st.column_config.ProgressColumn(format="%.0f %%", min_value=0, max_value=100)},
+                hide_index=True,
+                use_container_width=True
+            )
+        if st.button("Vyprázdnit cache výpočtů"):
+            clear_memo()
+            st.rerun()
+
+def show_export_import_module(username: str, module_type: str):
     """Zobrazí modul pro export a import dat pro konkrétní modul"""
     # Vytvoření dvou sloupců pro export a import
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### Export dat")
-        export_format = st.radio(f"Formát exportu {module_type}", ["JSON", "CSV"], horizontal=True, key=f"export_format_{module_type}")
-        
-        # Vytvoření dočasného souboru pro export
+        formats = {"JSON": "json", "JSON Lines": "jsonl", "CSV": "csv"}
+        if parquet_available():
+            formats["Parquet"] = "parquet"
+        export_format = st.radio(f"Formát exportu {module_type}", list(formats), horizontal=True, key=f"export_format_{module_type}")
+        format_key = formats[export_format]
+        # Parquet je komprimovaný vždy, volba u něj přepíná snappy na menší zstd
+        compress = st.checkbox("Komprimovat (gzip)" if format_key != "parquet" else "Komprimovat více (zstd)",
+                               key=f"export_gzip_{module_type}")
+        gzipped = compress and format_key != "parquet"
+        extension, mime = EXPORT_FORMATS[format_key]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        if export_format == "JSON":
-            # Pro JSON export použijeme přímo data z paměti
-            export_data_bytes = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
-            st.download_button(
-                label=f"Stáhnout {module_type} JSON",
-                data=export_data_bytes,
-                file_name=f"{module_type.lower()}_{timestamp}.json",
-                mime="application/json",
-                key=f"download_json_{module_type}"
-            )
-        else:  # CSV
-            # Pro CSV export vytvoříme DataFrame
-            rows = []
-            for category, entries in data.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        rows.append({
-                            "Kategorie": category,
-                            "Částka": entry["amount"],
-                            "Datum": entry["timestamp"],
-                            "Poznámka": entry.get("note", "")
-                        })
-                else:
-                    rows.append({
-                        "Kategorie": category,
-                        "Částka": entries["amount"],
-                        "Datum": entries["timestamp"],
-                        "Poznámka": entries.get("note", "")
-                    })
-            
-            df = pd.DataFrame(rows)
-            csv_data = df.to_csv(index=False).encode('utf-8')
+        # Export se streamuje přímo z úložiště a drží v cache, dokud se data nezmění
+        export_payload = data_manager.export_bytes(username, format_key, compress=compress)
+        if export_payload is None:
+            st.error(f"Export dat {module_type} se nepodařil.")
+        else:
             st.download_button(
-                label=f"Stáhnout {module_type} CSV",
-                data=csv_data,
-                file_name=f"{module_type.lower()}_{timestamp}.csv",
-                mime="text/csv",
-                key=f"download_csv_{module_type}"
+                label=f"Stáhnout {module_type} {export_format}",
+                data=export_payload,
+                file_name=f"{module_type.lower()}_{timestamp}.{extension}" + (".gz" if gzipped else ""),
+                mime="application/gzip" if gzipped else mime,
+                key=f"download_{format_key}_{module_type}"
             )
     
     with col2:
         st.markdown("#### Import dat")
         uploaded_file = st.file_uploader(
             f"Vyberte soubor pro import {module_type}", 
-            type=["json", "csv"],
+            type=["json", "jsonl", "csv"] + (["parquet"] if parquet_available() else []),
             key=f"file_uploader_{module_type}"
         )
         if uploaded_file is not None:
             file_extension = uploaded_file.name.split('.')[-1].lower()
-            success_message = st.empty()
             
             if st.button(f"Importovat {module_type} data", key=f"import_button_{module_type}"):
-                temp_file = f"temp_import_{module_type}.{file_extension}"
-                with open(temp_file, "wb") as f:
-                    f.write(uploaded_file.getvalue())
+                # Nahraný soubor se čte přímo jako buffer, bez kopie a bez dočasného souboru na disku
+                progress_bar = st.progress(0.0, text="Importuji...")
+                report = data_manager.import_stream(
+                    username, uploaded_file, format=file_extension,
+                    progress=lambda fraction, report: progress_bar.progress(
+                        fraction if fraction is not None else 0.0, text=report.summary()
+                    )
+                )
+                progress_bar.empty()
                 
-                if data_manager.import_data(username, temp_file, format=file_extension):
-                    success_message.success(f"Data {module_type} byla úspěšně importována!")
-                    time.sleep(3)
-                    success_message.empty()
-                    st.rerun()
+                if report.ok:
+                    if report.errors:
+                        # Chybné řádky se neimportovaly, ostatní ano
+                        st.warning(report.summary())
+                        st.dataframe(pd.DataFrame(report.errors).rename(columns={"row": "Řádek", "error": "Chyba"}),
+                                     hide_index=True)
+                    else:
+                        # Toast zůstane zobrazený i po překreslení stránky
+                        st.toast(f"Data {module_type} byla úspěšně importována! {report.summary()}", icon="✅")
+                        st.rerun()
                 else:
-                    st.error(f"Chyba při importu dat {module_type}. Zkontrolujte formát souboru.")
-                
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+                    st.error(f"Chyba při importu dat {module_type}. Zkontrolujte formát souboru. ({report.error})")
 
 def show_investment_overview(username):
     """Zobrazení přehledu investic"""
@@ -311,8 +325,8 @@ def show_investment_overview(username):
                     "date": date.strftime("%Y-%m-%d"),
                     "note": note
                 }
-                investments.append(new_investment)
-                data_manager.save_investments(username, investments)
+                with data_manager.batch(username) as batch:
+                    batch.add_investment(new_investment)
                 st.success("Investice byla úspěšně přidána!")
                 st.rerun()
             else:
@@ -447,14 +461,9 @@ def show_investment_overview(username):
         # Zpracování mazání
         if edited_df['Smazat'].any():
             if st.button("Smazat vybrané záznamy"):
-                # Filtrování neoznačených záznamů
-                df_to_keep = edited_df[~edited_df['Smazat']]
-                # Převod datumů na string formát před uložením
-                df_to_keep['date'] = df_to_keep['date'].dt.strftime('%Y-%m-%d')
-                # Převod zpět na seznam slovníků
-                investments_to_keep = df_to_keep.drop('Smazat', axis=1).to_dict('records')
-                # Uložení aktualizovaných dat
-                data_manager.save_investments(username, investments_to_keep)
+                # Index tabulky odpovídá pozici investice v uloženém seznamu
+                with data_manager.batch(username) as batch:
+                    batch.delete_investments(edited_df.index[edited_df['Smazat']])
                 st.success("Vybrané záznamy byly úspěšně smazány!")
                 st.rerun()
     else:
@@ -492,8 +501,8 @@ def show_expense_tracker(username):
                     "date": date.strftime("%Y-%m-%d"),
                     "note": note
                 }
-                expenses.append(new_expense)
-                data_manager.save_expenses(username, expenses)
+                with data_manager.batch(username) as batch:
+                    batch.add_expense(new_expense)
                 st.success("Výdaj byl úspěšně přidán!")
                 st.rerun()
             else:
@@ -510,46 +519,19 @@ def show_expense_tracker(username):
     )
     
     # Filtrování dat podle vybraného období
-    df = pd.DataFrame(expenses)
+    df = records_frame(expenses)
     if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
         now = pd.Timestamp.now()
         
         # Výběr konkrétního data podle období
         if time_period != "Celkem":
-            if time_period == "Rok":
-                selected_date = st.date_input(
-                    "Vyberte rok",
-                    value=now,
-                    format="YYYY-MM-DD"
-                )
-                df = df[df['date'].dt.year == selected_date.year]
-            elif time_period == "Měsíc":
-                selected_date = st.date_input(
-                    "Vyberte měsíc",
-                    value=now,
-                    format="YYYY-MM-DD"
-                )
-                df = df[
-                    (df['date'].dt.year == selected_date.year) & 
-                    (df['date'].dt.month == selected_date.month)
-                ]
-            elif time_period == "Týden":
-                selected_date = st.date_input(
-                    "Vyberte týden",
-                    value=now,
-                    format="YYYY-MM-DD"
-                )
-                week_start = pd.Timestamp(selected_date) - pd.Timedelta(days=selected_date.weekday())
-                week_end = week_start + pd.Timedelta(days=6)
-                df = df[(df['date'] >= week_start) & (df['date'] <= week_end)]
-            elif time_period == "Den":
-                selected_date = st.date_input(
-                    "Vyberte den",
-                    value=now,
-                    format="YYYY-MM-DD"
-                )
-                df = df[df['date'].dt.date == selected_date]
+            labels = {"Rok": "Vyberte rok", "Měsíc": "Vyberte měsíc", "Týden": "Vyberte týden", "Den": "Vyberte den"}
+            selected_date = st.date_input(
+                labels[time_period],
+                value=now,
+                format="YYYY-MM-DD"
+            )
+            df = filter_period(df, time_period, selected_date)
         
         # Výpočet celkových částek
         total_expenses = df[df['type'] == 'Výdaj']['amount'].sum()
@@ -615,13 +597,15 @@ def show_expense_tracker(username):
         # Čárový graf příjmů a výdajů v čase
         st.subheader("4. Vývoj příjmů a výdajů v čase")
         if not df.empty:
-            # Agregace dat podle data
-            daily_data = df.groupby('date').apply(
-                lambda x: pd.Series({
-                    'income': x[x['type'] == 'Příjem']['amount'].sum(),
-                    'expenses': x[x['type'] == 'Výdaj']['amount'].sum()
-                })
-            ).reset_index()
+            # Denní, týdenní, měsíční a roční součty v jednom průchodu
+            rollups = period_rollups(df)
+            granularity = st.selectbox("Agregace", ["Den", "Týden", "Měsíc", "Rok"], index=0)
+            totals = rollups[PERIOD_FREQS[granularity]]
+            daily_data = pd.DataFrame({
+                'date': totals.index.to_timestamp(),
+                'income': totals['Příjem'].to_numpy(),
+                'expenses': totals['Výdaj'].to_numpy()
+            })
             
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -657,6 +641,7 @@ def show_expense_tracker(username):
                 df,
                 hide_index=True,
                 column_config={
+                    'id': None,
                     'date': st.column_config.DateColumn(
                         'Datum',
                         format='DD.MM.YYYY'
@@ -675,14 +660,12 @@ def show_expense_tracker(username):
             # Zpracování mazání
             if edited_df['Smazat'].any():
                 if st.button("Smazat vybrané záznamy"):
-                    # Filtrování neoznačených záznamů
-                    df_to_keep = edited_df[~edited_df['Smazat']]
-                    # Převod datumů na string formát před uložením
-                    df_to_keep['date'] = df_to_keep['date'].dt.strftime('%Y-%m-%d')
-                    # Převod zpět na seznam slovníků
-                    expenses_to_keep = df_to_keep.drop('Smazat', axis=1).to_dict('records')
-                    # Uložení aktualizovaných dat
-                    data_manager.save_expenses(username, expenses_to_keep)
+                    selected = edited_df[edited_df['Smazat']]
+                    # Záznamy ledgeru mají id, ostatní jsou na své pozici v seznamu výdajů
+                    from_ledger = selected['id'] != ''
+                    with data_manager.batch(username) as batch:
+                        batch.delete_entries(selected.loc[from_ledger, 'id'])
+                        batch.delete_expenses(selected.index[~from_ledger])
                     st.success("Vybrané záznamy byly úspěšně smazány!")
                     st.rerun()
         else:
@@ -0,0 +1,238 @@
+"""
+Vektorový výpočet splátkového kalendáře hypotéky.
+
+Zůstatek anuitního úvěru má uzavřený tvar B_m = L(1+i)^m - Q((1+i)^m - 1)/i,
+kde Q je měsíční splátka (včetně pravidelné mimořádné splátky). Celý kalendář
+se tak spočítá nad poli NumPy najednou; kumulativní částky jsou cumsum,
+inflace a zhodnocení nemovitosti mocniny měsíčních faktorů. Výsledky odpovídají
+původnímu měsíčnímu cyklu v calculate_mortgage včetně poslední (doplatkové)
+splátky.
+
+Pro srovnání mnoha scénářů (sazby × doby × mimořádné splátky) počítá
+scenario_summary souhrnné ukazatele přímo z uzavřeného tvaru, bez měsíčních
+polí, takže i mřížka se statisíci scénáři je otázkou milisekund.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Kolik scénářů se vyhodnocuje najednou (omezuje paměť velkých mřížek)
+SCENARIO_CHUNK = 1_000_000
+
+# Tolerance zaokrouhlení při hledání měsíce doplacení
+_PAYOFF_EPS = 1e-9
+
+# Sloupce splátkového kalendáře
+SCHEDULE_COLUMNS = [
+    "date", "payment", "remaining_balance", "interest_paid", "principal_paid",
+    "insurance_paid", "total_paid", "real_value", "property_value",
+]
+
+
+def monthly_rate(interest_rate):
+    """Měsíční úroková sazba z roční sazby v procentech."""
+    return np.asarray(interest_rate, dtype=float) / 100 / 12
+
+
+def regular_payment(loan_amount, interest_rate, years):
+    """
+    Anuitní měsíční splátka (bez mimořádných splátek a pojištění).
+
+    Přijímá skaláry i pole (počítá se s broadcastingem NumPy), při nulové
+    sazbě se úvěr splácí rovnoměrně.
+    """
+    loan_amount = np.asarray(loan_amount, dtype=float)
+    rate = monthly_rate(interest_rate)
+    months = np.asarray(years, dtype=float) * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + rate) ** months
+        payment = np.where(rate == 0, loan_amount / months, loan_amount * rate * growth / (growth - 1))
+    return payment if payment.ndim else float(payment)
+
+
+def monthly_dates(start_date, months):
+    """
+    Data splátek po kalendářních měsících od ``start_date`` (měsíc 0 až ``months``).
+
+    Den v měsíci zůstává stejný, v kratších měsících se posune na jejich konec
+    (31. 1. → 29. 2. → 31. 3.).
+    """
+    start = pd.Timestamp(start_date)
+    month_starts = (np.datetime64(start.strftime("%Y-%m"), "M") + np.arange(months + 2)).astype("datetime64[D]")
+    month_lengths = np.diff(month_starts).astype(int)
+    days = np.minimum(start.day, month_lengths) - 1
+    return pd.DatetimeIndex((month_starts[:-1] + days).astype("datetime64[ns]"))
+
+
+def amortization_schedule(loan_amount, interest_rate, years, extra_payment=0, inflation_rate=0,
+                          property_appreciation=0, insurance=0, ltv=80, start_date=None):
+    """
+    Splátkový kalendář hypotéky jako DataFrame (řádek pro měsíc 0 až years*12).
+
+    Sloupce viz SCHEDULE_COLUMNS: splátka vč. pojištění, zbývající jistina,
+    kumulativně zaplacené úroky, jistina, pojištění a celkem, reálná hodnota
+    zaplaceného (očištěná o inflaci) a hodnota nemovitosti. Pravidelná splátka
+    a počáteční hodnota nemovitosti jsou v ``attrs``.
+    """
+    months = int(years * 12)
+    rate = float(monthly_rate(interest_rate))
+    payment = regular_payment(loan_amount, interest_rate, years)
+    installment = payment + extra_payment
+    property_value = loan_amount / (ltv / 100)
+    m = np.arange(months + 1)
+
+    # Zůstatek při splácení celou splátkou (uzavřený tvar), bez ohledu na doplacení
+    if rate == 0:
+        balance = loan_amount - installment * m
+    else:
+        growth = (1 + rate) ** m
+        balance = loan_amount * growth - installment * (growth - 1) / rate
+
+    # Měsíc doplacení: poslední splátka, pokud zůstatek klesl pod pravidelnou
+    # splátku, nebo měsíc, ve kterém celá splátka zůstatek vyčerpá
+    final = np.flatnonzero(balance[:-1] <= payment) + 1
+    cleared = np.flatnonzero(balance[1:] <= 0) + 1
+    payoff_final = final[0] if final.size else months + 1
+    payoff_cleared = cleared[0] if cleared.size else months + 1
+    payoff = min(payoff_final, payoff_cleared)
+
+    balance[payoff:] = 0.0
+    interest = np.zeros(months + 1)
+    interest[1:] = balance[:-1] * rate
+    paid = np.zeros(months + 1)
+    paid[1:payoff] = installment
+    principal = paid - interest
+    if payoff <= months:
+        if payoff_final <= payoff_cleared:
+            # Doplatek: zbytek jistiny s posledním úrokem
+            principal[payoff] = balance[payoff - 1]
+            paid[payoff] = balance[payoff - 1] + interest[payoff]
+        else:
+            paid[payoff] = installment
+            principal[payoff] = installment - interest[payoff]
+    principal[payoff + 1:] = 0.0
+
+    insurance_paid = insurance * m.astype(float)
+    interest_paid = np.cumsum(interest)
+    principal_paid = np.cumsum(principal)
+    total_paid = principal_paid + interest_paid + insurance_paid
+    inflation = (1 + inflation_rate / 100) ** (m / 12)
+    appreciation = (1 + property_appreciation / 100) ** (m / 12)
+
+    monthly_payment = paid + insurance
+    monthly_payment[0] = 0.0
+    schedule = pd.DataFrame({
+        "date": monthly_dates(start_date or pd.Timestamp.today(), months),
+        "payment": monthly_payment,
+        "remaining_balance": balance,
+        "interest_paid": interest_paid,
+        "principal_paid": principal_paid,
+        "insurance_paid": insurance_paid,
+        "total_paid": total_paid,
+        "real_value": total_paid / inflation,
+        "property_value": property_value * appreciation,
+    })
+    schedule.attrs["regular_payment"] = payment
+    schedule.attrs["property_value"] = property_value
+    return schedule
+
+
+def scenario_summary(loan_amount, interest_rate, years, extra_payment=0):
+    """
+    Souhrnné ukazatele pro pole scénářů (argumenty se broadcastují jako v NumPy).
+
+    Vrací slovník polí: monthly_payment (pravidelná + mimořádná splátka),
+    total_interest, total_paid (jistina + úroky) a payoff_month (měsíc
+    poslední splátky). Výsledky odpovídají amortization_schedule.
+    """
+    loan, annual_rate, years, extra = np.broadcast_arrays(
+        np.asarray(loan_amount, dtype=float), np.asarray(interest_rate, dtype=float),
+        np.asarray(years, dtype=float), np.asarray(extra_payment, dtype=float)
+    )
+    rate = monthly_rate(annual_rate)
+    months = years * 12
+    payment = np.asarray(regular_payment(loan, annual_rate, years))
+    installment = payment + extra
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Počet celých splátek, po kterých zůstatek klesne pod pravidelnou splátku, resp. na nulu
+        log_growth = np.log1p(rate)
+        below_payment = np.where(
+            rate == 0,
+            (loan - payment) / installment,
+            np.log((installment - payment * rate) / (installment - loan * rate)) / log_growth,
+        )
+        cleared = np.where(
+            rate == 0,
+            loan / installment,
+            np.log(installment / (installment - loan * rate)) / log_growth,
+        )
+    payoff_final = np.ceil(below_payment - _PAYOFF_EPS) + 1
+    payoff_cleared = np.ceil(cleared - _PAYOFF_EPS)
+    final_branch = payoff_final <= payoff_cleared
+    payoff = np.minimum(np.where(final_branch, payoff_final, payoff_cleared), months)
+
+    def balance_after(m):
+        if_zero = loan - installment * m
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = (1 + rate) ** m
+            return np.where(rate == 0, if_zero, loan * growth - installment * (growth - 1) / rate)
+
+    # Doplatek: zbytek jistiny s úrokem; jinak celá splátka (zůstatek může klesnout pod nulu)
+    last_balance = balance_after(payoff - 1)
+    total_paid = np.where(
+        final_branch,
+        (payoff - 1) * installment + last_balance * (1 + rate),
+        payoff * installment,
+    )
+    principal = np.where(final_branch, loan, loan - balance_after(payoff))
+    return {
+        "monthly_payment": installment,
+        "total_interest": total_paid - principal,
+        "total_paid": total_paid,
+        "payoff_month": payoff.astype(int),
+    }
+
+
+def scenario_grid(loan_amounts, interest_rates, years, extra_payments=(0,), processes=None,
+                  chunk_size=SCENARIO_CHUNK):
+    """
+    Vyhodnotí všechny kombinace výší úvěru, sazeb, dob a mimořádných splátek.
+
+    Vrací DataFrame s řádkem pro každý scénář (vstupy a ukazatele ze
+    scenario_summary). Velké mřížky se počítají po blocích ``chunk_size``
+    scénářů; s ``processes`` > 1 se bloky rozdělí mezi procesy.
+    """
+    grid = np.meshgrid(
+        np.atleast_1d(np.asarray(loan_amounts, dtype=float)),
+        np.atleast_1d(np.asarray(interest_rates, dtype=float)),
+        np.atleast_1d(np.asarray(years, dtype=float)),
+        np.atleast_1d(np.asarray(extra_payments, dtype=float)),
+        indexing="ij",
+    )
+    loan, rate, term, extra = (axis.ravel() for axis in grid)
+    chunks = [
+        (loan[start:start + chunk_size], rate[start:start + chunk_size],
+         term[start:start + chunk_size], extra[start:start + chunk_size])
+        for start in range(0, loan.size, chunk_size)
+    ]
+    if processes and processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_summary_chunk, chunks))
+    else:
+        results = [_summary_chunk(chunk) for chunk in chunks]
+
+    summary = {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+    return pd.DataFrame({
+        "loan_amount": loan,
+        "interest_rate": rate,
+        "years": term.astype(int),
+        "extra_payment": extra,
+        **summary,
+    })
+
+
+def _summary_chunk(chunk):
+    """Ukazatele jednoho bloku scénářů (na úrovni modulu kvůli předání do procesu)."""
+    return scenario_summary(*chunk)
@@ -0,0 +1,126 @@
+"""
+Benchmark splátkového kalendáře hypotéky.
+
+Porovnává původní měsíční cyklus v Pythonu s vektorovým amortization_schedule
+a ověřuje, že oba dávají stejné výsledky. Nakonec měří mřížku scénářů
+(50 sazeb × 40 dob × 10 mimořádných splátek) přes scenario_grid:
+
+    python benchmarks/bench_amortization.py [roky]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amortization import amortization_schedule, scenario_grid
+
+
+def legacy_mortgage(loan_amount, interest_rate, years, extra_payment=0, inflation_rate=0,
+                    property_appreciation=0, insurance=0, ltv=80):
+    """Původní calculate_mortgage (měsíční cyklus)."""
+    monthly_rate = interest_rate / 100 / 12
+    monthly_inflation = (1 + inflation_rate/100) ** (1/12) - 1
+    monthly_appreciation = (1 + property_appreciation/100) ** (1/12) - 1
+    num_payments = years * 12
+    property_value = loan_amount / (ltv / 100)
+    if monthly_rate == 0:
+        monthly_payment = loan_amount / num_payments
+    else:
+        monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
+
+    remaining_balance, interest_paid, principal_paid, total_paid = [], [], [], []
+    dates, monthly_payments, real_values, property_values, insurance_paid = [], [], [], [], []
+    balance = loan_amount
+    total_interest = total_principal = total_insurance = 0
+    inflation_factor = appreciation_factor = 1
+    start_date = date.today()
+    for month in range(num_payments + 1):
+        if month == 0:
+            remaining_balance.append(balance)
+            interest_paid.append(0)
+            principal_paid.append(0)
+            total_paid.append(0)
+            monthly_payments.append(0)
+            real_values.append(0)
+            property_values.append(property_value)
+            insurance_paid.append(0)
+        else:
+            inflation_factor *= (1 + monthly_inflation)
+            appreciation_factor *= (1 + monthly_appreciation)
+            monthly_interest = balance * monthly_rate
+            if balance > monthly_payment:
+                this_payment = monthly_payment + extra_payment
+                principal = this_payment - monthly_interest
+            else:
+                this_payment = balance + monthly_interest
+                principal = balance
+            balance = max(0, balance - principal)
+            total_interest += monthly_interest
+            total_principal += principal
+            total_insurance += insurance
+            remaining_balance.append(balance)
+            interest_paid.append(total_interest)
+            principal_paid.append(total_principal)
+            total_paid.append(total_principal + total_interest + total_insurance)
+            monthly_payments.append(this_payment + insurance)
+            real_values.append((total_principal + total_interest + total_insurance) / inflation_factor)
+            property_values.append(property_value * appreciation_factor)
+            insurance_paid.append(total_insurance)
+        dates.append(start_date + timedelta(days=30*month))
+    return {
+        'remaining_balance': remaining_balance,
+        'interest_paid': interest_paid,
+        'principal_paid': principal_paid,
+        'total_paid': total_paid,
+        'monthly_payments': monthly_payments,
+        'real_values': real_values,
+        'property_values': property_values,
+    }
+
+
+# Dvojice sloupců (původní klíč, sloupec kalendáře) pro ověření shody
+COMPARED = [
+    ("remaining_balance", "remaining_balance"), ("interest_paid", "interest_paid"),
+    ("principal_paid", "principal_paid"), ("total_paid", "total_paid"),
+    ("monthly_payments", "payment"), ("real_values", "real_value"),
+    ("property_values", "property_value"),
+]
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    scenarios = [
+        (3_000_000, 5.9, years, 0, 2.0, 3.0, 500, 80),
+        (3_000_000, 5.9, years, 5_000, 2.0, 3.0, 500, 80),
+        (2_000_000, 0.0, years, 0, 0.0, 0.0, 0, 90),
+    ]
+    for args in scenarios:
+        legacy = legacy_mortgage(*args)
+        schedule = amortization_schedule(*args)
+        for key, column in COMPARED:
+            np.testing.assert_allclose(schedule[column], legacy[key], rtol=1e-9, atol=1e-4, err_msg=key)
+    print(f"Výsledky shodné ve {len(scenarios)} scénářích, {years} let ({years * 12} splátek)")
+
+    args = scenarios[1]
+    print(f"{'cyklus v Pythonu':<28} {timed(lambda: legacy_mortgage(*args)):9.2f} ms")
+    print(f"{'amortization_schedule':<28} {timed(lambda: amortization_schedule(*args)):9.2f} ms")
+
+    grid = (3_000_000, np.linspace(0.5, 10, 50), np.arange(1, 41), np.linspace(0, 20_000, 10))
+    print(f"{'scenario_grid (20 000)':<28} {timed(lambda: scenario_grid(*grid)):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
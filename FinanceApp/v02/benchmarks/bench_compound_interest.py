@@ -0,0 +1,75 @@
+"""
+Benchmark měsíční řady složeného úročení.
+
+Porovnává původní výpočet (calculate_compound_interest zvlášť pro každý měsíc
+a formátování tabulky po řádcích f-stringy) s vektorovou compound_interest_series
+a ověřuje, že oba dávají stejné hodnoty i texty tabulky:
+
+    python benchmarks/bench_compound_interest.py [roky]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compound_interest import (
+    calculate_compound_interest, compound_interest_series, create_compound_interest_table
+)
+
+# Nepamatovat si výsledky, měří se samotný výpočet
+series = compound_interest_series.__wrapped__
+table = create_compound_interest_table.__wrapped__
+
+
+def legacy_series(principal, rate, years, frequency, contribution, inflation):
+    """Původní cyklus: uzavřený tvar znovu pro každý měsíc."""
+    rows = [calculate_compound_interest(principal, rate, i / 12, frequency, contribution, inflation)
+            for i in range(years * 12 + 1)]
+    return np.array(rows).T
+
+
+def legacy_table(values):
+    """Původní formátování tabulky po řádcích."""
+    return [
+        {
+            'Celková hodnota': f"{future_value:,.0f} Kč",
+            'Celkový příspěvek': f"{total_contribution:,.0f} Kč",
+            'Celkový úrok': f"{total_interest:,.0f} Kč",
+            'Reálná hodnota': f"{real_value:,.0f} Kč"
+        }
+        for future_value, total_contribution, total_interest, real_value in values.T
+    ]
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    args = (100_000.0, 5.0, years, 12, 2_000.0, 2.0)
+
+    expected = legacy_series(*args)
+    result = series(*args, start_date="2024-01-01")
+    np.testing.assert_allclose(
+        result[['value', 'contributions', 'interest', 'real_value']].to_numpy().T, expected, rtol=1e-12
+    )
+    formatted = table(*args, start_date="2024-01-01").drop(columns='Datum').to_dict('records')
+    assert formatted == legacy_table(expected)
+    print(f"Výsledky shodné, {years} let ({years * 12 + 1} měsíců)")
+
+    print(f"{'cyklus + f-stringy':<28} {timed(lambda: legacy_table(legacy_series(*args))):9.2f} ms")
+    print(f"{'compound_interest_series':<28} {timed(lambda: series(*args, start_date='2024-01-01')):9.2f} ms")
+    print(f"{'formátování tabulky':<28} {timed(lambda: table(*args, start_date='2024-01-01')):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark serializace velkého ledgeru (100k záznamů).
+
+Porovnává původní formát (json s indent=2) s kompaktním profilem
+a s orjson, je-li nainstalováno:
+
+    python benchmarks/bench_json_codec.py [počet_záznamů]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_utils
+
+
+def make_ledger(count):
+    random.seed(42)
+    categories = ["Jídlo", "Bydlení", "Doprava", "Zábava", "Mzda", "Energie"]
+    data = {category: [] for category in categories}
+    for i in range(count):
+        category = random.choice(categories)
+        data[category].append({
+            "type": "Příjem" if category == "Mzda" else "Výdaj",
+            "amount": round(random.uniform(10, 50000), 2),
+            "timestamp": f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:{i % 60:02d}:00",
+            "note": f"Záznam {i}"
+        })
+    return data
+
+
+def measure(label, save, load, path, repeat=3):
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        save(path)
+        save_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        load(path)
+        load_times.append(time.perf_counter() - start)
+    size = os.path.getsize(path) / 1024 / 1024
+    print(f"{label:<28} uložení {min(save_times) * 1000:8.1f} ms   "
+          f"načtení {min(load_times) * 1000:8.1f} ms   velikost {size:6.2f} MB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = make_ledger(count)
+    path = os.path.join(tempfile.mkdtemp(), "ledger.json")
+    print(f"Ledger s {count} záznamy, orjson: {'ano' if file_utils.orjson else 'ne'}")
+
+    def save_indented(p):
+        with open(p, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def load_stdlib(p):
+        with open(p, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    measure("json indent=2 (původní)", save_indented, load_stdlib, path)
+
+    orjson = file_utils.orjson
+    file_utils.orjson = None
+    try:
+        measure("json kompaktní", lambda p: file_utils.atomic_write_json(p, data, pretty=False),
+                file_utils.load_json, path)
+    finally:
+        file_utils.orjson = orjson
+
+    if orjson is not None:
+        measure("orjson kompaktní", lambda p: file_utils.atomic_write_json(p, data, pretty=False),
+                file_utils.load_json, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Benchmark Monte Carlo simulace plánu důchodu.
+
+Měří simulate_retirement pro zadaný počet cest na 60 let (věk 25 až 85),
+volitelně rozdělenou mezi procesy:
+
+    python benchmarks/bench_monte_carlo.py [počet cest] [procesy]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retirement_planner import simulate_retirement
+
+
+def main():
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    plan = dict(
+        current_age=25, retirement_age=65, life_expectancy=85, current_income=50_000, income_growth=2.0,
+        current_savings=100_000, monthly_savings=5_000, investment_return=5.0, inflation_rate=2.0
+    )
+    start = time.perf_counter()
+    simulation = simulate_retirement(**plan, paths=paths, seed=42, processes=processes)
+    elapsed = time.perf_counter() - start
+    print(f"{paths:,} cest × 60 let: {elapsed * 1000:.0f} ms "
+          f"(úspěšnost {simulation['success_probability']:.1%}, procesy: {processes or 1})")
+
+
+if __name__ == "__main__":
+    main()
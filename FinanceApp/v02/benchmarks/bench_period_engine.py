@@ -0,0 +1,74 @@
+"""
+Benchmark agregace ledgeru podle období na víceletých datech.
+
+Porovnává původní denní agregaci (groupby + apply s lambda funkcí) s
+period_rollups, který vrací denní, týdenní, měsíční i roční součty:
+
+    python benchmarks/bench_period_engine.py [roky] [záznamů_denně]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger import filter_period, period_rollups, records_frame
+
+
+def make_records(years, per_day):
+    rng = np.random.default_rng(42)
+    days = pd.date_range(end=pd.Timestamp.today().normalize(), periods=365 * years, freq="D")
+    dates = np.repeat(days, per_day)
+    count = len(dates)
+    categories = np.array(["Jídlo", "Bydlení", "Doprava", "Zábava", "Mzda"])
+    category = categories[rng.integers(0, len(categories), count)]
+    return [
+        {"category": c, "type": "Příjem" if c == "Mzda" else "Výdaj", "amount": float(a), "date": d.strftime("%Y-%m-%d")}
+        for c, a, d in zip(category, rng.uniform(10, 5000, count).round(2), dates)
+    ]
+
+
+def legacy_daily(df):
+    return df.groupby('date').apply(
+        lambda x: pd.Series({
+            'income': x[x['type'] == 'Příjem']['amount'].sum(),
+            'expenses': x[x['type'] == 'Výdaj']['amount'].sum()
+        })
+    ).reset_index()
+
+
+def legacy_filter(df, selected_date):
+    return df[(df['date'].dt.year == selected_date.year) & (df['date'].dt.month == selected_date.month)]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    records = make_records(years, per_day)
+    print(f"Ledger: {years} let, {len(records)} záznamů")
+
+    legacy = pd.DataFrame(records)
+    legacy['date'] = pd.to_datetime(legacy['date'])
+    ledger = records_frame(records)
+    today = pd.Timestamp.today().date()
+
+    print(f"{'groupby.apply (jen dny)':<32} {timed(lambda: legacy_daily(legacy)):9.1f} ms")
+    print(f"{'period_rollups (D/W/M/Y)':<32} {timed(lambda: period_rollups(ledger)):9.1f} ms")
+    print(f"{'filtr měsíce (rok & měsíc)':<32} {timed(lambda: legacy_filter(legacy, today)):9.1f} ms")
+    print(f"{'filter_period (Měsíc)':<32} {timed(lambda: filter_period(ledger, 'Měsíc', today)):9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark růstu investice v plánování důchodu (retirement_planning).
+
+Porovnává původní calculate_compound_interest (měsíční cyklus přidávající do
+čtyř seznamů) s vektorovou verzí pro stálý příspěvek i pro rozpis příspěvků
+a ověřuje shodu výsledků:
+
+    python benchmarks/bench_retirement_growth.py [roky]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retirement_planning import calculate_compound_interest, contribution_schedule
+
+# Nepamatovat si výsledky, měří se samotný výpočet
+growth = calculate_compound_interest.__wrapped__
+
+
+def legacy_growth(initial_investment, monthly_contribution, years, annual_rate, schedule=None):
+    """Původní měsíční cyklus (s rozpisem bere příspěvek pro daný měsíc)."""
+    rate = annual_rate / 100 / 12
+    months = years * 12
+    timeline = []
+    balance = []
+    contributions = []
+    interest = []
+    current_balance = initial_investment
+    total_contributions = initial_investment
+    for month in range(months + 1):
+        timeline.append(month / 12)
+        balance.append(current_balance)
+        contributions.append(total_contributions)
+        interest.append(current_balance - total_contributions)
+        if month < months:
+            contribution = monthly_contribution if schedule is None else schedule[month]
+            current_balance += contribution
+            total_contributions += contribution
+            current_balance *= (1 + rate)
+    return timeline, balance, contributions, interest
+
+
+def timed(func, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    args = (100_000.0, 5_000.0, years, 7.0)
+    schedule = contribution_schedule(5_000.0, years, annual_increase=3.0, pause=(5, 7), lump_sums={10: 200_000})
+
+    for variable in (None, schedule):
+        expected = np.array(legacy_growth(*args, variable)).T
+        result = growth(*args, variable).to_numpy()
+        np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-4)
+    print(f"Výsledky shodné, {years} let ({years * 12 + 1} měsíců)")
+
+    print(f"{'cyklus, stálý příspěvek':<28} {timed(lambda: legacy_growth(*args)):9.3f} ms")
+    print(f"{'uzavřený tvar':<28} {timed(lambda: growth(*args)):9.3f} ms")
+    print(f"{'cyklus, rozpis':<28} {timed(lambda: legacy_growth(*args, schedule)):9.3f} ms")
+    print(f"{'kumulativní součin':<28} {timed(lambda: growth(*args, schedule)):9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
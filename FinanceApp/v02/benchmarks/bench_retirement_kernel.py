@@ -0,0 +1,183 @@
+"""
+Benchmark jádra plánu důchodu.
+
+Porovnává původní calculate_retirement_plan a calculate_graph_data (cykly
+v Pythonu) s vektorovým retirement_kernel / retirement_timeline, ověřuje shodu
+výsledků a měří, kolik plánů se spočítá za sekundu:
+
+    python benchmarks/bench_retirement_kernel.py [počet plánů]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retirement_planner import calculate_graph_data, retirement_kernel, retirement_timeline
+
+
+def legacy_retirement_plan(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: int,
+    current_income: float,
+    income_growth: float,
+    current_savings: float,
+    monthly_savings: float,
+    investment_return: float,
+    inflation_rate: float
+) -> dict:
+    """Původní calculate_retirement_plan (součet vkladů cyklem)."""
+    # Převod procent na desetinná čísla
+    income_growth = income_growth / 100
+    investment_return = investment_return / 100
+    inflation_rate = inflation_rate / 100
+    
+    # Výpočet počtu let do důchodu a v důchodu
+    years_to_retirement = retirement_age - current_age
+    years_in_retirement = life_expectancy - retirement_age
+    
+    # Výpočet budoucí hodnoty úspor
+    future_savings = current_savings * (1 + investment_return) ** years_to_retirement
+    
+    # Výpočet budoucí hodnoty měsíčních úspor
+    monthly_investment_return = (1 + investment_return) ** (1/12) - 1
+    future_monthly_savings = 0
+    for year in range(years_to_retirement):
+        future_monthly_savings += monthly_savings * 12 * (1 + investment_return) ** (years_to_retirement - year - 1)
+    
+    # Celkové úspory v době odchodu do důchodu
+    total_savings_at_retirement = future_savings + future_monthly_savings
+    
+    # Výpočet budoucího příjmu v době odchodu do důchodu
+    future_income = current_income * (1 + income_growth) ** years_to_retirement
+    
+    # Výpočet potřebného příjmu v důchodu (70% posledního příjmu)
+    required_retirement_income = future_income * 0.7
+    
+    # Výpočet měsíčního příjmu z úspor v důchodu
+    monthly_investment_income = total_savings_at_retirement * monthly_investment_return
+    
+    # Výpočet reálné hodnoty úspor v důchodu (očištěné o inflaci)
+    real_savings = total_savings_at_retirement / ((1 + inflation_rate) ** years_to_retirement)
+    
+    # Výpočet reálného příjmu v důchodu (očištěného o inflaci)
+    real_retirement_income = required_retirement_income / ((1 + inflation_rate) ** years_to_retirement)
+    
+    return {
+        'years_to_retirement': years_to_retirement,
+        'years_in_retirement': years_in_retirement,
+        'total_savings_at_retirement': total_savings_at_retirement,
+        'future_income': future_income,
+        'required_retirement_income': required_retirement_income,
+        'monthly_investment_income': monthly_investment_income,
+        'real_savings': real_savings,
+        'real_retirement_income': real_retirement_income,
+        'monthly_savings_needed': required_retirement_income - monthly_investment_income
+    }
+
+def legacy_graph_data(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: int,
+    current_income: float,
+    income_growth: float,
+    current_savings: float,
+    monthly_savings: float,
+    investment_return: float,
+    inflation_rate: float
+) -> pd.DataFrame:
+    """Původní calculate_graph_data (seznam slovníků po letech)."""
+    # Převod procent na desetinná čísla
+    income_growth = income_growth / 100
+    investment_return = investment_return / 100
+    inflation_rate = inflation_rate / 100
+    
+    # Výpočet počtu let
+    years_to_retirement = retirement_age - current_age
+    years_in_retirement = life_expectancy - retirement_age
+    total_years = years_to_retirement + years_in_retirement
+    
+    # Vytvoření seznamu let
+    years = list(range(current_age, life_expectancy + 1))
+    
+    # Výpočet dat pro každý rok
+    data = []
+    current_savings_value = current_savings
+    current_income_value = current_income
+    
+    for year in range(total_years + 1):
+        age = current_age + year
+        is_retired = age >= retirement_age
+        
+        # Výpočet úspor
+        if year > 0:
+            # Přidání měsíčních úspor
+            current_savings_value += monthly_savings * 12
+            # Výnos z investic
+            current_savings_value *= (1 + investment_return)
+        
+        # Výpočet příjmu
+        if not is_retired:
+            current_income_value *= (1 + income_growth)
+        
+        # Výpočet reálných hodnot (očištěných o inflaci)
+        real_savings = current_savings_value / ((1 + inflation_rate) ** year)
+        real_income = current_income_value / ((1 + inflation_rate) ** year)
+        
+        data.append({
+            'Věk': age,
+            'Úspory': current_savings_value,
+            'Příjem': current_income_value if not is_retired else 0,
+            'Reálné úspory': real_savings,
+            'Reálný příjem': real_income if not is_retired else 0,
+            'Důchod': current_income_value * 0.7 if is_retired else 0,
+            'Reálný důchod': (current_income_value * 0.7) / ((1 + inflation_rate) ** year) if is_retired else 0
+        })
+    
+    return pd.DataFrame(data)
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    scenarios = [
+        (30, 65, 85, 50_000, 2.0, 100_000, 5_000, 5.0, 2.0),
+        (45, 60, 90, 80_000, 0.0, 1_000_000, 0, 0.0, 3.5),
+        (25, 25, 80, 30_000, 4.0, 0, 2_000, 7.0, 0.0),
+    ]
+    for args in scenarios:
+        expected = legacy_retirement_plan(*args)
+        result = retirement_kernel(*args)
+        for key, value in expected.items():
+            np.testing.assert_allclose(result[key], value, rtol=1e-12, err_msg=key)
+        pd.testing.assert_frame_equal(calculate_graph_data.__wrapped__(*args), legacy_graph_data(*args),
+                                      check_dtype=False, rtol=1e-12)
+    print(f"Výsledky shodné ve {len(scenarios)} scénářích")
+
+    rng = np.random.default_rng(0)
+    batch = (30, 65, 85, 50_000, rng.uniform(0, 5, count), 100_000, rng.uniform(0, 20_000, count),
+             rng.uniform(0, 10, count), rng.uniform(0, 5, count))
+    plans = list(zip(*np.broadcast_arrays(*batch)))
+    legacy = timed(lambda: [legacy_retirement_plan(*plan) for plan in plans], repeat=1)
+    kernel = timed(lambda: retirement_kernel(*batch))
+    print(f"{'cyklus v Pythonu':<28} {count / legacy:14,.0f} plánů/s")
+    print(f"{'retirement_kernel':<28} {count / kernel:14,.0f} plánů/s")
+    args = scenarios[0]
+    print(f"{'graf: cyklus':<28} {timed(lambda: legacy_graph_data(*args)) * 1000:11.2f} ms")
+    print(f"{'graf: retirement_timeline':<28} {timed(lambda: retirement_timeline(*args)) * 1000:11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,19 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from memo import memoize
 
-def calculate_compound_interest(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0):
+def compound_interest_values(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0):
     """
-    Vypočítá složené úročení s možností měsíčních příspěvků a inflace.
-    
-    Args:
-        principal (float): Počáteční částka
-        rate (float): Roční úroková sazba (v procentech)
-        time (int): Doba v letech
-        compounding_frequency (int): Frekvence úročení (1=ročně, 12=měsíčně, 365=denně)
-        monthly_contribution (float): Měsíční příspěvek (volitelné)
-        inflation_rate (float): Roční míra inflace (v procentech)
+    Vektorové jádro složeného úročení: ``time`` (roky) může být pole.
     
     Returns:
-        tuple: (celková částka, celkový příspěvek, celkový úrok, reálná hodnota)
+        tuple: pole (celková částka, celkový příspěvek, celkový úrok, reálná hodnota)
     """
     # Převod procent na desetinné číslo
     r = rate / 100
     i = inflation_rate / 100
+    time = np.asarray(time, dtype=float)
     
     # Výpočet efektivní roční sazby
     effective_rate = (1 + r/compounding_frequency) ** compounding_frequency - 1
@@ -29,11 +23,13 @@ def calculate_compound_interest(principal, rate, time, compounding_frequency, mo
     # Výpočet budoucí hodnoty počáteční částky
     future_value = principal * (1 + effective_rate) ** time
     
-    # Výpočet budoucí hodnoty měsíčních příspěvků
+    # Výpočet budoucí hodnoty měsíčních příspěvků (při nulové sazbě jen jejich součet)
     if monthly_contribution > 0:
         monthly_rate = effective_rate / 12
-        future_value_contributions = monthly_contribution * ((1 + monthly_rate) ** (time * 12) - 1) / monthly_rate
-        future_value += future_value_contributions
+        if monthly_rate == 0:
+            future_value = future_value + monthly_contribution * time * 12
+        else:
+            future_value = future_value + monthly_contribution * ((1 + monthly_rate) ** (time * 12) - 1) / monthly_rate
     
     # Výpočet celkového příspěvku
     total_contribution = principal + (monthly_contribution * 12 * time)
@@ -46,27 +42,77 @@ def calculate_compound_interest(principal, rate, time, compounding_frequency, mo
     
     return future_value, total_contribution, total_interest, real_value
 
-def create_compound_interest_chart(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0):
+def calculate_compound_interest(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0):
+    """
+    Vypočítá složené úročení s možností měsíčních příspěvků a inflace.
+    
+    Args:
+        principal (float): Počáteční částka
+        rate (float): Roční úroková sazba (v procentech)
+        time (int): Doba v letech
+        compounding_frequency (int): Frekvence úročení (1=ročně, 12=měsíčně, 365=denně)
+        monthly_contribution (float): Měsíční příspěvek (volitelné)
+        inflation_rate (float): Roční míra inflace (v procentech)
+    
+    Returns:
+        tuple: (celková částka, celkový příspěvek, celkový úrok, reálná hodnota)
+    """
+    return tuple(float(value) for value in compound_interest_values(
+        principal, rate, time, compounding_frequency, monthly_contribution, inflation_rate
+    ))
+
+# Sloupce řady zobrazené v tabulce a jejich popisky
+TABLE_COLUMNS = {
+    'value': 'Celková hodnota',
+    'contributions': 'Celkový příspěvek',
+    'interest': 'Celkový úrok',
+    'real_value': 'Reálná hodnota',
+}
+
+def month_ends(start_date, periods):
+    """
+    Konce ``periods`` měsíců od ``start_date`` (první je konec měsíce, do kterého datum patří).
+    
+    Odpovídá pd.date_range(start, periods, freq='ME') pro datum bez času, počítá
+    se ale přímo aritmetikou měsíců v NumPy.
+    """
+    first = np.datetime64(pd.Timestamp(start_date).strftime("%Y-%m"), "M")
+    return pd.DatetimeIndex(((first + np.arange(1, periods + 1)).astype("datetime64[D]") - 1).astype("datetime64[ns]"))
+
+@memoize
+def compound_interest_series(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0, start_date=None):
+    """
+    Měsíční vývoj složeného úročení jako DataFrame (řádek pro měsíc 0 až time*12).
+    
+    Sloupce date (konce měsíců od ``start_date``), value, contributions,
+    interest a real_value se počítají najednou nad polem měsíců; sdílí je graf
+    i tabulka.
+    """
+    months = np.arange(int(time * 12) + 1)
+    value, contributions, interest, real_value = compound_interest_values(
+        principal, rate, months / 12, compounding_frequency, monthly_contribution, inflation_rate
+    )
+    return pd.DataFrame({
+        'date': month_ends(start_date or datetime.now(), months.size),
+        'value': value,
+        'contributions': contributions,
+        'interest': interest,
+        'real_value': real_value,
+    })
+
+@memoize
+def create_compound_interest_chart(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0, start_date=None):
     """
     Vytvoří graf pro vizualizaci složeného úročení.
     """
-    # Vytvoření časové osy
-    dates = pd.date_range(start=datetime.now(), periods=time*12+1, freq='M')
-    
-    # Výpočet hodnot pro každý měsíc
-    values = []
-    contributions = []
-    interests = []
-    real_values = []
-    
-    for i in range(len(dates)):
-        future_value, total_contribution, total_interest, real_value = calculate_compound_interest(
-            principal, rate, i/12, compounding_frequency, monthly_contribution, inflation_rate
-        )
-        values.append(future_value)
-        contributions.append(total_contribution)
-        interests.append(total_interest)
-        real_values.append(real_value)
+    series = compound_interest_series(
+        principal, rate, time, compounding_frequency, monthly_contribution, inflation_rate, start_date
+    )
+    dates = series['date']
+    values = series['value']
+    contributions = series['contributions']
+    interests = series['interest']
+    real_values = series['real_value']
     
     # Vytvoření grafu
     fig = go.Figure()
@@ -110,6 +156,21 @@ def create_compound_interest_chart(principal, rate, time, compounding_frequency,
     
     return fig
 
+@memoize
+def create_compound_interest_table(principal, rate, time, compounding_frequency, monthly_contribution=0, inflation_rate=0, start_date=None):
+    """
+    Vytvoří tabulku s měsíčními hodnotami složeného úročení.
+    """
+    series = compound_interest_series(
+        principal, rate, time, compounding_frequency, monthly_contribution, inflation_rate, start_date
+    )
+    table = {'Datum': series['date'].dt.strftime('%d.%m.%Y')}
+    
+    # Částky se zaokrouhlí po sloupcích, text se formátuje pro každou hodnotu
+    for column, label in TABLE_COLUMNS.items():
+        table[label] = series[column].round().astype('int64').map('{:,} Kč'.format)
+    return pd.DataFrame(table)
+
 def show_compound_interest_calculator():
     """Zobrazí kalkulačku složeného úročení."""
     st.title("Kalkulačka složeného úročení")
@@ -218,29 +279,16 @@ def show_compound_interest_calculator():
     
     # Zobrazení grafu
     st.subheader("Vývoj v čase")
+    start_date = datetime.now().date()
     fig = create_compound_interest_chart(
-        principal, rate, time, compounding_frequency[1], monthly_contribution, inflation_rate
+        principal, rate, time, compounding_frequency[1], monthly_contribution, inflation_rate, start_date
     )
     st.plotly_chart(fig, use_container_width=True)
     
     # Detailní rozpis
     st.subheader("Detailní rozpis")
     
-    # Vytvoření tabulky s měsíčními hodnotami
-    dates = pd.date_range(start=datetime.now(), periods=time*12+1, freq='M')
-    monthly_data = []
-    
-    for i in range(len(dates)):
-        future_value, total_contribution, total_interest, real_value = calculate_compound_interest(
-            principal, rate, i/12, compounding_frequency[1], monthly_contribution, inflation_rate
-        )
-        monthly_data.append({
-            'Datum': dates[i].strftime('%d.%m.%Y'),
-            'Celková hodnota': f"{future_value:,.0f} Kč",
-            'Celkový příspěvek': f"{total_contribution:,.0f} Kč",
-            'Celkový úrok': f"{total_interest:,.0f} Kč",
-            'Reálná hodnota': f"{real_value:,.0f} Kč"
-        })
-    
-    df = pd.DataFrame(monthly_data)
+    df = create_compound_interest_table(
+        principal, rate, time, compounding_frequency[1], monthly_contribution, inflation_rate, start_date
+    )
     st.dataframe(df, hide_index=True, use_container_width=True) 
\ No newline at end of file
@@ -1,20 +1,31 @@
 import json
 import csv
+import io
 import os
 from datetime import datetime
 import tempfile
-import pandas as pd
 from werkzeug.security import check_password_hash, generate_password_hash
 import re
+from contextlib import contextmanager
+from storage import DataBatch, bucket_key, create_storage, json_cache
+from ledger import ledger_frame
+from exporter import export_bytes, export_cache, stream_export, write_export, write_parquet
+from importer import IMPORT_CHUNKSIZE, ImportReport, iter_csv_chunks, iter_json_chunks, iter_jsonl_chunks, iter_parquet_chunks
+from file_utils import atomic_write_json, load_json
 
 class DataManager:
     # Default paths for data storage
     DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
     DEFAULT_USER_DATA_DIR = None  # Will be set based on DATA_DIR
+    DEFAULT_STORAGE_BACKEND = "json"
+    # Zápis i do starých souborů {username}_expenses.json / _investments.json
+    # (po spuštění migrace lze vypnout pomocí LEGACY_DUAL_WRITE=0)
+    LEGACY_DUAL_WRITE = os.getenv("LEGACY_DUAL_WRITE", "1") == "1"
 
-    def __init__(self, data_dir=None):
+    def __init__(self, data_dir=None, storage_backend=None):
         """Initialize the DataManager with specified or default directories."""
         self.data_dir = data_dir or os.getenv("DATA_DIR", self.DEFAULT_DATA_DIR)
+        self.storage_backend = storage_backend or os.getenv("STORAGE_BACKEND", self.DEFAULT_STORAGE_BACKEND)
         self.user_data_dir = os.path.join(self.data_dir, "users")
         
         self.expense_file = os.path.join(self.data_dir, "expenses.json")
@@ -24,6 +35,7 @@ class DataManager:
         
         self.ensure_directories()
         self.ensure_files()
+        self.storage = create_storage(self.storage_backend, self.data_dir)
         
     def ensure_directories(self):
         """Ensure data directories exist"""
@@ -129,8 +141,7 @@ class DataManager:
         """Načte data uživatelů."""
         try:
             if os.path.exists(self.users_file):
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_json(self.users_file)
             return {}
         except Exception as e:
             print(f"Chyba při načítání uživatelů: {str(e)}")
@@ -139,9 +150,7 @@ class DataManager:
     def save_users(self, users):
         """Uloží data uživatelů."""
         try:
-            os.makedirs(os.path.dirname(self.users_file), exist_ok=True)
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.users_file, users)
             return True
         except Exception as e:
             print(f"Chyba při ukládání uživatelů: {str(e)}")
@@ -150,11 +159,7 @@ class DataManager:
     def load_data(self, username):
         """Načte data uživatele."""
         try:
-            data_file = os.path.join(self.data_dir, f"{username}_data.json")
-            if os.path.exists(data_file):
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {'expense': [], 'investment': []}
+            return self.storage.load_data(username)
         except Exception as e:
             print(f"Chyba při načítání dat: {str(e)}")
             return {'expense': [], 'investment': []}
@@ -162,15 +167,21 @@ class DataManager:
     def save_data(self, username, data):
         """Uloží data uživatele."""
         try:
-            data_file = os.path.join(self.data_dir, f"{username}_data.json")
-            os.makedirs(os.path.dirname(data_file), exist_ok=True)
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.storage.save_data(username, data)
             return True
         except Exception as e:
             print(f"Chyba při ukládání dat: {str(e)}")
             return False
 
+    def compact_data(self, username):
+        """Sloučí žurnál uživatele do snapshotu."""
+        try:
+            self.storage.compact_data(username)
+            return True
+        except Exception as e:
+            print(f"Chyba při slučování dat: {str(e)}")
+            return False
+
     def add_entry(self, username, category, entry):
         """Přidá nový záznam pro daného uživatele."""
         try:
@@ -178,37 +189,128 @@ class DataManager:
             if not category or category.strip() == "":
                 raise ValueError("Kategorie nemůže být prázdná")
 
-            # Načtení existujících dat
-            data = self.load_data(username)
+            # Duplicitní záznam backend nepřidá, i to považujeme za úspěch
+            self.storage.add_entry(username, category, entry)
+            return True
+        except Exception as e:
+            print(f"Chyba při přidávání záznamu: {str(e)}")
+            return False
 
-            # Inicializace kategorie, pokud neexistuje
-            if category not in data:
-                data[category] = []
+    def add_entries(self, username, entries):
+        """Hromadně přidá záznamy (dvojice kategorie, záznam) s kontrolou duplicit; vrací počet přidaných."""
+        try:
+            items = list(entries)
+            if any(not category or str(category).strip() == "" for category, _ in items):
+                raise ValueError("Kategorie nemůže být prázdná")
+            return self.storage.add_entries(username, items)
+        except Exception as e:
+            print(f"Chyba při přidávání záznamů: {str(e)}")
+            return 0
 
-            # Kontrola duplicitního záznamu
-            for existing_entry in data[category]:
-                if (existing_entry.get('type') == entry.get('type') and
-                    abs(float(existing_entry.get('amount', 0)) - float(entry.get('amount', 0))) < 0.01 and
-                    existing_entry.get('timestamp') == entry.get('timestamp')):
-                    return True  # Duplicitní záznam nalezen
+    def update_entries(self, username, entries):
+        """Hromadně upraví záznamy podle id (dvojice kategorie, záznam s 'id') jedním zápisem; vrací počet upravených."""
+        try:
+            items = list(entries)
+            if any(not category or str(category).strip() == "" for category, _ in items):
+                raise ValueError("Kategorie nemůže být prázdná")
+            return self.storage.update_entries(username, items)
+        except Exception as e:
+            print(f"Chyba při úpravě záznamů: {str(e)}")
+            return 0
 
-            # Přidání nového záznamu
-            data[category].append(entry)
-            self.save_data(username, data)
+    def delete_entries(self, username, ids):
+        """Hromadně smaže záznamy podle id jedním zápisem; vrací počet smazaných."""
+        try:
+            return self.storage.delete_entries(username, list(ids))
+        except Exception as e:
+            print(f"Chyba při mazání záznamů: {str(e)}")
+            return 0
+
+    @contextmanager
+    def batch(self, username):
+        """
+        Transakční dávka změn dat uživatele: jedno načtení a jeden zápis.
+
+        Uvnitř bloku se změny ledgeru, výdajů, investic i historie jen sbírají
+        (viz DataBatch); zapíší se najednou při opuštění bloku. Výjimka uvnitř
+        bloku změny zahodí a propaguje se dál.
+
+            with data_manager.batch(username) as batch:
+                batch.delete_entries(ids)
+                batch.add_investment(investment)
+        """
+        with self.storage.lock(username):
+            data = self.storage.load_data(username)
+            # Nepřevedený uživatel: seznamy výdajů a investic jsou ve starých souborech
+            legacy_files = {
+                'expense': self.get_user_expenses_file(username),
+                'investment': self.get_user_investments_file(username),
+            }
+            for kind, path in legacy_files.items():
+                if not data.get(kind):
+                    legacy = self._read_legacy_file(path)
+                    if legacy:
+                        data[kind] = legacy
+            history = self.storage.load_history(username) or []
+
+            batch = DataBatch(username, data, history)
+            yield batch
+
+            if batch.dirty_buckets:
+                # Změněné seznamy vyžadují nový snapshot, změny ledgeru se do něj promítnou
+                self.storage.save_data(username, batch.merged_data())
+            elif batch.records:
+                self.storage.apply_records(username, batch.records)
+            if batch.history_changed:
+                self.storage.save_history(username, batch.history)
+
+        for kind in batch.dirty_buckets:
+            if self.LEGACY_DUAL_WRITE:
+                atomic_write_json(legacy_files[kind], batch.data.get(kind, []))
+            else:
+                self._retire_legacy_file(legacy_files[kind])
+
+    def load_ledger(self, username):
+        """Načte data uživatele jako sloupcový ledger (DataFrame) pro analytické přehledy."""
+        try:
+            return ledger_frame(self.load_data(username))
+        except Exception as e:
+            print(f"Chyba při načítání ledgeru: {str(e)}")
+            return ledger_frame({})
+
+    def get_rollups(self, username):
+        """Vrátí materializované součty (kategorie, typ, měsíc, částka, počet) pro přehledy."""
+        try:
+            return self.storage.load_rollups(username)
+        except Exception as e:
+            print(f"Chyba při načítání součtů: {str(e)}")
+            return []
+
+    def rebuild_rollups(self, username):
+        """Znovu sestaví materializované součty uživatele z jeho dat."""
+        try:
+            self.storage.rebuild_rollups(username)
             return True
         except Exception as e:
-            print(f"Chyba při přidávání záznamu: {str(e)}")
+            print(f"Chyba při sestavení součtů: {str(e)}")
             return False
 
+    def get_cache_stats(self):
+        """Vrátí statistiky sdílené cache načtených souborů."""
+        return json_cache.stats()
+
+    def get_category_totals(self, username, start=None, end=None):
+        """Vrátí součty výdajů a příjmů po kategoriích, volitelně za období <start, end)."""
+        try:
+            return self.storage.category_totals(username, start, end)
+        except Exception as e:
+            print(f"Chyba při výpočtu součtů: {str(e)}")
+            return {}
+
     def get_history(self, username: str) -> dict:
         """Načte historii pro konkrétního uživatele."""
         try:
-            history_file = self.get_user_history_file(username)
-            if os.path.exists(history_file):
-                with open(history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-                    return history
-            return {}
+            return self.storage.load_history(username)
         except Exception as e:
             print(f"Chyba při načítání historie: {str(e)}")
             return {}
@@ -234,12 +336,21 @@ class DataManager:
         try:
             # Nejprve zkusíme načíst z nové struktury
             data = self.load_data(username)
-            expenses = []
+            expenses = data.get('expense') or []
+            if not expenses:
+                # Nepřevedený uživatel: čteme přímo ze starého souboru
+                expenses = self._read_legacy_file(self.get_user_expenses_file(username)) or []
+            expenses = list(expenses)
+
             for category, entries in data.items():
+                if category in ('expense', 'investment'):
+                    continue
                 for entry in entries:
-                    if entry['type'] == 'Výdaj':
+                    if entry.get('type') == 'Výdaj':
                         expenses.append({
+                            'id': entry.get('id', ''),
                             'category': category,
+                            'type': 'Výdaj',
                             'amount': float(entry['amount']),
                             'timestamp': entry['timestamp'],
                             'note': entry.get('note', '')
@@ -258,26 +369,96 @@ class DataManager:
             if investments:
                 return investments
 
-            # Pokud nejsou v nové struktuře, zkusíme starou
-            investments_file = self.get_user_investments_file(username)
-            if os.path.exists(investments_file):
-                with open(investments_file, 'r', encoding='utf-8') as f:
-                    try:
-                        investments = json.load(f)
-                        # Uložíme do nové struktury pro příští použití
-                        data['investment'] = investments
-                        self.save_data(username, data)
-                        return investments
-                    except json.JSONDecodeError:
-                        # Pokud je soubor poškozen, vytvoříme zálohu
-                        backup_file = investments_file + '.backup'
-                        os.rename(investments_file, backup_file)
-                        return []
-            return []
+            # Nepřevedený uživatel: čteme přímo ze starého souboru
+            return self._read_legacy_file(self.get_user_investments_file(username)) or []
         except Exception as e:
             print(f"Chyba při načítání investic: {str(e)}")
             return []
 
+    def _read_legacy_file(self, file_path):
+        """Načte starý soubor s výdaji/investicemi; None, pokud neexistuje."""
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return load_json(file_path)
+        except json.JSONDecodeError:
+            pass
+        # Pokud je soubor poškozen, vytvoříme zálohu
+        os.replace(file_path, file_path + '.backup')
+        return []
+
+    def _retire_legacy_file(self, file_path):
+        """Označí starý soubor jako převedený, aby se z něj už nečetlo."""
+        if os.path.exists(file_path):
+            os.replace(file_path, file_path + '.migrated')
+
+    def migrate_legacy_files(self, username=None):
+        """
+        Převede staré soubory {username}_expenses.json a {username}_investments.json
+        do jednotného úložiště a označí je jako převedené.
+
+        Returns:
+            dict: uživatel -> seznam převedených druhů dat ('expense', 'investment')
+        """
+        if username is not None:
+            usernames = [username]
+        else:
+            usernames = set(self.load_users())
+            for file_name in os.listdir(self.data_dir):
+                for suffix in ('_expenses.json', '_investments.json'):
+                    if file_name.endswith(suffix):
+                        usernames.add(file_name[:-len(suffix)])
+            usernames = sorted(usernames)
+
+        migrated = {}
+        for user in usernames:
+            legacy_files = {
+                'expense': self.get_user_expenses_file(user),
+                'investment': self.get_user_investments_file(user),
+            }
+            if not any(os.path.exists(path) for path in legacy_files.values()):
+                continue
+            with self.storage.lock(user):
+                data = self.load_data(user)
+                kinds = []
+                for kind, path in legacy_files.items():
+                    legacy = self._read_legacy_file(path)
+                    if legacy is None:
+                        continue
+                    # Data v jednotném úložišti mají přednost, starý soubor byl jen jejich kopií
+                    if legacy and not data.get(kind):
+                        data[kind] = legacy
+                    kinds.append(kind)
+                if not self.save_data(user, data):
+                    continue
+            for kind in kinds:
+                self._retire_legacy_file(legacy_files[kind])
+            migrated[user] = kinds
+        return migrated
+
+    def backfill_entry_ids(self, username=None):
+        """
+        Doplní stabilní id záznamům uloženým před jejich zavedením.
+
+        Returns:
+            dict: uživatel -> počet doplněných id (jen uživatelé se změnou)
+        """
+        if username is not None:
+            usernames = [username]
+        else:
+            usernames = sorted(set(self.load_users()) | set(self.storage.usernames()))
+
+        backfilled = {}
+        for user in usernames:
+            try:
+                count = self.storage.backfill_ids(user)
+            except Exception as e:
+                print(f"Chyba při doplňování id ({user}): {str(e)}")
+                continue
+            if count:
+                backfilled[user] = count
+        return backfilled
+
     def get_user_data(self, username):
         """Získá kompletní data uživatele."""
         try:
@@ -311,16 +492,19 @@ class DataManager:
     def save_expenses(self, username, expenses):
         """Uloží výdaje uživatele."""
         try:
-            # Uložení do nové struktury
-            data = self.load_data(username)
-            data['expense'] = expenses
-            self.save_data(username, data)
-
-            # Uložení do starého formátu pro zpětnou kompatibilitu
-            expenses_file = self.get_user_expenses_file(username)
-            os.makedirs(os.path.dirname(expenses_file), exist_ok=True)
-            with open(expenses_file, 'w', encoding='utf-8') as f:
-                json.dump(expenses, f, ensure_ascii=False, indent=2)
+            # Uložení do nové struktury (načtení a zápis pod zámkem uživatele)
+            with self.storage.lock(username):
+                data = self.load_data(username)
+                data['expense'] = expenses
+                self.save_data(username, data)
+
+            legacy_file = self.get_user_expenses_file(username)
+            if self.LEGACY_DUAL_WRITE:
+                # Uložení do starého formátu pro zpětnou kompatibilitu
+                atomic_write_json(legacy_file, expenses)
+            else:
+                # Jednotné úložiště je teď jediný zdroj pravdy
+                self._retire_legacy_file(legacy_file)
             return True
         except Exception as e:
             print(f"Chyba při ukládání výdajů: {str(e)}")
@@ -329,76 +513,158 @@ class DataManager:
     def save_investments(self, username, investments):
         """Uloží investice uživatele."""
         try:
-            # Uložení do nové struktury
-            data = self.load_data(username)
-            data['investment'] = investments
-            self.save_data(username, data)
-
-            # Uložení do starého formátu pro zpětnou kompatibilitu
-            investments_file = self.get_user_investments_file(username)
-            os.makedirs(os.path.dirname(investments_file), exist_ok=True)
-            with open(investments_file, 'w', encoding='utf-8') as f:
-                json.dump(investments, f, ensure_ascii=False, indent=2)
+            # Uložení do nové struktury (načtení a zápis pod zámkem uživatele)
+            with self.storage.lock(username):
+                data = self.load_data(username)
+                data['investment'] = investments
+                self.save_data(username, data)
+
+            legacy_file = self.get_user_investments_file(username)
+            if self.LEGACY_DUAL_WRITE:
+                # Uložení do starého formátu pro zpětnou kompatibilitu
+                atomic_write_json(legacy_file, investments)
+            else:
+                # Jednotné úložiště je teď jediný zdroj pravdy
+                self._retire_legacy_file(legacy_file)
             return True
         except Exception as e:
             print(f"Chyba při ukládání investic: {str(e)}")
             return False
 
-    def import_data(self, username, file_path, format="json"):
-        """Importuje data z JSON nebo CSV souboru."""
+    def import_data(self, username, source, format="json"):
+        """
+        Importuje data z JSON, JSON Lines, CSV nebo Parquet a sloučí je s existujícími (viz import_stream).
+
+        ``source`` je cesta k souboru, bajty nebo binární soubor či buffer.
+        """
+        return self.import_stream(username, source, format=format).ok
+
+    def import_stream(self, username, source, format="json", chunksize=IMPORT_CHUNKSIZE, progress=None):
+        """
+        Proudově importuje záznamy z CSV, JSON Lines, JSON nebo Parquet a sloučí je s existujícími daty.
+
+        Zdroj (cesta, bajty nebo buffer, viz importer.open_source) se zpracovává
+        po blocích; platné záznamy každého bloku se přidají přes add_entries
+        (duplicity se přeskočí), chybné řádky se vynechají a vrátí
+        v ImportReport.errors. Seznamy výdajů a investic z JSON se doplní
+        o položky, které ještě neobsahují. ``progress`` je volitelná
+        funkce progress(podíl 0–1 nebo None, report) volaná po každém bloku.
+        """
+        report = ImportReport()
         try:
             if format == "json":
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                chunks = iter_json_chunks(source, chunksize)
+            elif format == "jsonl":
+                chunks = iter_jsonl_chunks(source, chunksize)
             elif format == "csv":
-                df = pd.read_csv(file_path)
-                data = {}
-                for _, row in df.iterrows():
-                    category = row['Kategorie']
-                    if category not in data:
-                        data[category] = []
-                    data[category].append({
-                        "amount": float(row['Částka']),
-                        "timestamp": row['Datum'],
-                        "note": row['Poznámka']
-                    })
+                chunks = iter_csv_chunks(source, chunksize)
+            elif format == "parquet":
+                chunks = iter_parquet_chunks(source, chunksize)
             else:
-                return False
-
-            self.save_data(username, data)
-            return True
+                raise ValueError(f"Nepodporovaný formát importu: {format}")
+
+            for items, errors, fraction, buckets in chunks:
+                report.rows += len(items) + len(errors)
+                report.add_errors(errors)
+                if items:
+                    added = self.storage.add_entries(username, items)
+                    report.added += added
+                    report.duplicates += len(items) - added
+                if buckets:
+                    self._merge_buckets(username, buckets, report)
+                if progress is not None:
+                    progress(fraction, report)
         except Exception as e:
             print(f"Chyba při importu dat: {str(e)}")
-            return False
-
-    def export_data(self, username, file_path, format="json"):
-        """Exportuje data do JSON nebo CSV souboru."""
+            report.error = str(e)
+        return report
+
+    def _merge_buckets(self, username, buckets, report):
+        """Doplní seznamy výdajů a investic o importované položky, které v nich ještě nejsou."""
+        with self.batch(username) as batch:
+            for kind, items in buckets.items():
+                add = batch.add_expense if kind == 'expense' else batch.add_investment
+                existing = {bucket_key(item) for item in batch.data.get(kind) or []}
+                for item in items:
+                    report.rows += 1
+                    key = bucket_key(item)
+                    if key in existing:
+                        report.duplicates += 1
+                        continue
+                    add(item)
+                    existing.add(key)
+                    report.added += 1
+
+    def export_data(self, username, file_path, format="json", compress=False):
+        """
+        Proudově exportuje data do JSON, JSON Lines, CSV nebo Parquet souboru.
+
+        ``file_path`` může být i binární soubor nebo buffer, ``compress``
+        výstup komprimuje gzipem (u Parquet volí kompresi zstd).
+        """
         try:
-            data = self.load_data(username)
-            if format == "json":
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-            elif format == "csv":
-                rows = []
-                for category, entries in data.items():
-                    for entry in entries:
-                        row = {
-                            'Kategorie': category,
-                            'Částka': entry.get('amount', ''),
-                            'Datum': entry.get('timestamp', ''),
-                            'Poznámka': entry.get('note', '')
-                        }
-                        rows.append(row)
-                df = pd.DataFrame(rows)
-                df.to_csv(file_path, index=False, encoding='utf-8')
+            entries = self.storage.iter_entries(username)
+            if format == "parquet":
+                write_parquet(entries, file_path, compress)
             else:
-                return False
+                write_export(stream_export(entries, format), file_path, compress)
             return True
         except Exception as e:
             print(f"Chyba při exportu dat: {str(e)}")
-            return False 
+            return False
+
+    def export_bytes(self, username, format="json", compress=False):
+        """
+        Vrátí export dat uživatele jako bajty pro stažení (None při chybě).
+
+        Výsledek se drží v export_cache podle úložiště a verze dat, takže se
+        při opakovaném vykreslení stránky nesestavuje znovu.
+        """
+        try:
+            key = (self.storage.storage_id, username, self.storage.data_version(username), format, compress)
+            return export_cache.get_or_build(key, lambda: self._build_export(username, format, compress))
+        except Exception as e:
+            print(f"Chyba při exportu dat: {str(e)}")
+            return None
+
+    def _build_export(self, username, format, compress):
+        """Sestaví export v paměti."""
+        if format == "parquet":
+            buffer = io.BytesIO()
+            write_parquet(self.storage.iter_entries(username), buffer, compress)
+            return buffer.getvalue()
+        return export_bytes(stream_export(self.storage.iter_entries(username), format), compress)
 
     def get_user(self, username):
         """Získá data uživatele."""
         users = self.load_users()
-        return users.get(username)
\ No newline at end of file
+        return users.get(username)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Správa dat Finance App")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Převede staré soubory s výdaji a investicemi do jednotného úložiště"
+    )
+    migrate_parser.add_argument("--data-dir", help="Adresář s daty (výchozí DATA_DIR)")
+    migrate_parser.add_argument("--user", help="Převést pouze daného uživatele")
+    backfill_parser = subparsers.add_parser(
+        "backfill-ids", help="Doplní stabilní id záznamům uloženým před jejich zavedením"
+    )
+    backfill_parser.add_argument("--data-dir", help="Adresář s daty (výchozí DATA_DIR)")
+    backfill_parser.add_argument("--user", help="Doplnit pouze danému uživateli")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        result = DataManager(data_dir=args.data_dir).migrate_legacy_files(args.user)
+        for user, kinds in result.items():
+            print(f"{user}: {', '.join(kinds)}")
+        print(f"Převedeno uživatelů: {len(result)}")
+    elif args.command == "backfill-ids":
+        result = DataManager(data_dir=args.data_dir).backfill_entry_ids(args.user)
+        for user, count in result.items():
+            print(f"{user}: {count}")
+        print(f"Doplněno záznamů: {sum(result.values())}")
@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 from data_manager import DataManager
+from ledger import (
+    category_totals, display_frame, period_totals, rollup_period_totals, rollups_frame, type_totals
+)
 
 data_manager = DataManager()
 
@@ -12,9 +15,14 @@ def show_expense_tracker(username: str):
     
     st.title("Sledování výdajů a příjmů")
     
-    # Načtení dat
-    data = data_manager.load_data(username)
-    expenses = data_manager.load_expenses(username)
+    # Načtení dat: materializované součty pro souhrnné tabulky, sloupcový ledger pro trend a detail
+    aggregates = rollups_frame(data_manager.get_rollups(username))
+    ledger = data_manager.load_ledger(username)
+    if (ledger['id'] == '').any():
+        # Záznamy uložené před zavedením id dostanou id hned při prvním zobrazení
+        data_manager.backfill_entry_ids(username)
+        ledger = data_manager.load_ledger(username)
+    has_entries = not ledger.empty
     
     # Vytvoření dvou sloupců pro přehled
     col1, col2 = st.columns(2)
@@ -45,32 +53,17 @@ def show_expense_tracker(username: str):
     
     with col2:
         st.subheader("Přehled kategorií")
-        if data:
+        if has_entries:
             # Výpočet součtů pro každou kategorii a typ
-            totals = {}
-            for cat, entries in data.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        type_ = entry.get("type", "Výdaj")
-                        if cat not in totals:
-                            totals[cat] = {"Výdaj": 0, "Příjem": 0}
-                        totals[cat][type_] += float(entry.get("amount", 0))
-                else:
-                    type_ = entries.get("type", "Výdaj")
-                    if cat not in totals:
-                        totals[cat] = {"Výdaj": 0, "Příjem": 0}
-                    totals[cat][type_] += float(entries.get("amount", 0))
+            totals = category_totals(aggregates)
             
             # Vytvoření DataFrame pro zobrazení
-            df_totals = pd.DataFrame([
-                {
-                    'Kategorie': cat,
-                    'Výdaje': data['Výdaj'],
-                    'Příjmy': data['Příjem'],
-                    'Bilance': data['Příjem'] - data['Výdaj']
-                }
-                for cat, data in totals.items()
-            ])
+            df_totals = pd.DataFrame({
+                'Kategorie': totals.index.astype(str),
+                'Výdaje': totals['Výdaj'].to_numpy(),
+                'Příjmy': totals['Příjem'].to_numpy(),
+                'Bilance': (totals['Příjem'] - totals['Výdaj']).to_numpy()
+            })
             df_totals = df_totals.sort_values('Bilance', ascending=False)
             
             # Zobrazení tabulky
@@ -80,41 +73,15 @@ def show_expense_tracker(username: str):
     
     # Přehled podle časových období
     st.subheader("Přehled podle časových období")
-    if data:
-        # Vytvoření DataFrame pro časové období
-        df_time = []
-        for cat, entries in data.items():
-            if isinstance(entries, list):
-                for entry in entries:
-                    timestamp = datetime.fromisoformat(entry.get('timestamp', datetime.now().isoformat()))
-                    df_time.append({
-                        'Datum': timestamp,
-                        'Rok': timestamp.year,
-                        'Měsíc': timestamp.month,
-                        'Kategorie': cat,
-                        'Typ': entry.get('type', 'Výdaj'),
-                        'Částka': float(entry.get("amount", 0))
-                    })
-            else:
-                timestamp = datetime.fromisoformat(entries.get('timestamp', datetime.now().isoformat()))
-                df_time.append({
-                    'Datum': timestamp,
-                    'Rok': timestamp.year,
-                    'Měsíc': timestamp.month,
-                    'Kategorie': cat,
-                    'Typ': entries.get('type', 'Výdaj'),
-                    'Částka': float(entries.get("amount", 0))
-                })
-        
-        df_time = pd.DataFrame(df_time)
-        
+    if has_entries:
         # Výběr časového období
         period = st.selectbox("Vyberte časové období", ["Měsíční", "Roční"])
         
         if period == "Měsíční":
             # Agregace podle měsíců
-            df_monthly = df_time.groupby(['Rok', 'Měsíc', 'Typ'])['Částka'].sum().reset_index()
-            df_monthly['Období'] = df_monthly['Rok'].astype(str) + '-' + df_monthly['Měsíc'].astype(str).str.zfill(2)
+            df_monthly_pivot = rollup_period_totals(aggregates, "M")
+            df_monthly_pivot.index = df_monthly_pivot.index.strftime('%Y-%m').rename('Období')
+            df_monthly = df_monthly_pivot.reset_index().melt(id_vars='Období', var_name='Typ', value_name='Částka')
             
             # Vytvoření sloupcového grafu pro měsíční přehled
             fig_monthly = px.bar(df_monthly, x='Období', y='Částka', color='Typ',
@@ -124,19 +91,13 @@ def show_expense_tracker(username: str):
             
             # Tabulka s měsíčními součty
             st.subheader("Měsíční součty")
-            df_monthly_pivot = df_monthly.pivot(index='Období', columns='Typ', values='Částka').fillna(0)
-            
-            # Zajistíme, že existují všechny potřebné sloupce
-            if 'Příjem' not in df_monthly_pivot.columns:
-                df_monthly_pivot['Příjem'] = 0
-            if 'Výdaj' not in df_monthly_pivot.columns:
-                df_monthly_pivot['Výdaj'] = 0
-            
             df_monthly_pivot['Bilance'] = df_monthly_pivot['Příjem'] - df_monthly_pivot['Výdaj']
             st.dataframe(df_monthly_pivot, use_container_width=True)
         else:
             # Agregace podle roků
-            df_yearly = df_time.groupby(['Rok', 'Typ'])['Částka'].sum().reset_index()
+            df_yearly_pivot = rollup_period_totals(aggregates, "Y")
+            df_yearly_pivot.index = df_yearly_pivot.index.year.rename('Rok')
+            df_yearly = df_yearly_pivot.reset_index().melt(id_vars='Rok', var_name='Typ', value_name='Částka')
             
             # Vytvoření sloupcového grafu pro roční přehled
             fig_yearly = px.bar(df_yearly, x='Rok', y='Částka', color='Typ',
@@ -146,7 +107,6 @@ def show_expense_tracker(username: str):
             
             # Tabulka s ročními součty
             st.subheader("Roční součty")
-            df_yearly_pivot = df_yearly.pivot(index='Rok', columns='Typ', values='Částka').fillna(0)
             df_yearly_pivot['Bilance'] = df_yearly_pivot['Příjem'] - df_yearly_pivot['Výdaj']
             st.dataframe(df_yearly_pivot, use_container_width=True)
     else:
@@ -157,23 +117,9 @@ def show_expense_tracker(username: str):
     
     with col3:
         st.subheader("Rozložení podle typu")
-        if data:
-            # Výpočet celkových součtů pro každý typ
-            type_totals = {"Výdaj": 0, "Příjem": 0}
-            for cat, entries in data.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        type_ = entry.get("type", "Výdaj")
-                        type_totals[type_] += float(entry.get("amount", 0))
-                else:
-                    type_ = entries.get("type", "Výdaj")
-                    type_totals[type_] += float(entries.get("amount", 0))
-            
-            # Vytvoření DataFrame pro koláčový graf
-            df_pie = pd.DataFrame([
-                {'Typ': type_, 'Částka': amount}
-                for type_, amount in type_totals.items()
-            ])
+        if has_entries:
+            # Vytvoření DataFrame pro koláčový graf z celkových součtů pro každý typ
+            df_pie = type_totals(aggregates).rename_axis('Typ').reset_index(name='Částka')
             
             # Vytvoření koláčového grafu
             fig_pie = px.pie(df_pie, values='Částka', names='Typ', 
@@ -184,27 +130,11 @@ def show_expense_tracker(username: str):
     
     with col4:
         st.subheader("Trend v čase")
-        if data:
-            # Vytvoření DataFrame pro časový graf
-            df_time = []
-            for cat, entries in data.items():
-                if isinstance(entries, list):
-                    for entry in entries:
-                        df_time.append({
-                            'Datum': datetime.fromisoformat(entry.get('timestamp', datetime.now().isoformat())).strftime('%Y-%m-%d'),
-                            'Kategorie': cat,
-                            'Typ': entry.get('type', 'Výdaj'),
-                            'Částka': float(entry.get("amount", 0))
-                        })
-                else:
-                    df_time.append({
-                        'Datum': datetime.fromisoformat(entries.get('timestamp', datetime.now().isoformat())).strftime('%Y-%m-%d'),
-                        'Kategorie': cat,
-                        'Typ': entries.get('type', 'Výdaj'),
-                        'Částka': float(entries.get("amount", 0))
-                    })
-            
-            df_time = pd.DataFrame(df_time)
+        if has_entries:
+            # Denní součty podle typu
+            df_time = period_totals(ledger, "D")
+            df_time.index = df_time.index.strftime('%Y-%m-%d').rename('Datum')
+            df_time = df_time.reset_index().melt(id_vars='Datum', var_name='Typ', value_name='Částka')
             
             # Vytvoření časového grafu
             fig_time = px.line(df_time, x='Datum', y='Částka', color='Typ',
@@ -217,29 +147,11 @@ def show_expense_tracker(username: str):
     st.markdown("---")  # Přidáme oddělovač
     st.subheader("Přehled všech záznamů")
     
-    if data:
+    if has_entries:
         # Vytvoření DataFrame pro tabulku
-        df_details = []
-        for cat, entries in data.items():
-            if isinstance(entries, list):
-                for entry in entries:
-                    df_details.append({
-                        'Kategorie': cat,
-                        'Typ': entry.get('type', 'Výdaj'),
-                        'Částka': float(entry.get("amount", 0)),
-                        'Datum': datetime.fromisoformat(entry.get('timestamp', datetime.now().isoformat())).strftime('%Y-%m-%d %H:%M'),
-                        'Poznámka': entry.get('note', '')
-                    })
-            else:
-                df_details.append({
-                    'Kategorie': cat,
-                    'Typ': entries.get('type', 'Výdaj'),
-                    'Částka': float(entries.get("amount", 0)),
-                    'Datum': datetime.fromisoformat(entries.get('timestamp', datetime.now().isoformat())).strftime('%Y-%m-%d %H:%M'),
-                    'Poznámka': entries.get('note', '')
-                })
-        
-        df_details = pd.DataFrame(df_details)
+        df_details = display_frame(ledger)
+        df_details['Upravit'] = False
+        df_details['Smazat'] = False
         df_details = df_details.sort_values('Datum', ascending=False)
         
         # Zobrazení editovatelné tabulky
@@ -249,6 +161,7 @@ def show_expense_tracker(username: str):
             num_rows="dynamic",
             hide_index=True,
             column_config={
+                "id": None,
                 "Kategorie": st.column_config.TextColumn(
                     "Kategorie",
                     help="Název kategorie",
@@ -321,85 +234,46 @@ def show_expense_tracker(username: str):
                 key="delete_button"
             )
         
-        # Zpracování smazání a úprav
+        # Zpracování smazání a úprav: jedna dávka podle id, jedno načtení a jeden zápis
         if delete_button or save_button:
-            # Načtení existujících dat
-            existing_data = data_manager.load_data(username)
-            changes_made = False
-            categories_to_delete = set()  # Seznam kategorií ke smazání
+            flag = 'Smazat' if delete_button else 'Upravit'
+            selected = edited_df[edited_df[flag].fillna(False).astype(bool)]
+            changed = 0
             
-            # Procházení všech řádků
-            for index, row in edited_df.iterrows():
-                category = row['Kategorie']
-                
-                # Pokud je záznam označen pro smazání a bylo stisknuto tlačítko smazat
-                if delete_button and row.get('Smazat', False):
-                    if category in existing_data:
-                        # Najít a smazat odpovídající záznam
-                        entries = existing_data[category]
-                        if isinstance(entries, list):
-                            # Filtrujeme záznamy, které se neshodují s aktuálním
-                            existing_data[category] = [
-                                entry for entry in entries
-                                if not (
-                                    entry.get('type') == row['Typ'] and
-                                    float(entry.get('amount', 0)) == float(row['Částka']) and
-                                    datetime.fromisoformat(entry.get('timestamp', '')).strftime('%Y-%m-%d %H:%M') == row['Datum']
-                                )
-                            ]
-                            if not existing_data[category]:  # Pokud je seznam prázdný
-                                categories_to_delete.add(category)
-                            changes_made = True
-                
-                # Pokud je záznam označen pro úpravu a bylo stisknuto tlačítko uložit
-                elif save_button and row.get('Upravit', False):
-                    if category not in existing_data:
-                        existing_data[category] = []
-                    
-                    # Vytvoření nového záznamu
-                    new_entry = {
-                        'type': row['Typ'],
-                        'amount': float(row['Částka']),
-                        'timestamp': datetime.strptime(row['Datum'], '%Y-%m-%d %H:%M').isoformat(),
-                        'note': row['Poznámka']
-                    }
-                    
-                    # Aktualizace nebo přidání záznamu
-                    entries = existing_data[category]
-                    if isinstance(entries, list):
-                        # Najít a aktualizovat existující záznam nebo přidat nový
-                        found = False
-                        for i, entry in enumerate(entries):
-                            if (entry.get('type') == row['Typ'] and
-                                float(entry.get('amount', 0)) == float(row['Částka']) and
-                                datetime.fromisoformat(entry.get('timestamp', '')).strftime('%Y-%m-%d %H:%M') == row['Datum']):
-                                entries[i] = new_entry
-                                found = True
-                                break
-                        if not found:
-                            entries.append(new_entry)
-                    else:
-                        existing_data[category] = [new_entry]
-                    changes_made = True
-            
-            # Smazání prázdných kategorií
-            for category in categories_to_delete:
-                del existing_data[category]
+            with data_manager.batch(username) as batch:
+                if delete_button:
+                    changed = batch.delete_entries(selected['id'].dropna())
+                else:
+                    for row in selected.to_dict('records'):
+                        if not isinstance(row['Kategorie'], str) or not row['Kategorie'].strip():
+                            continue  # Kategorie je povinná
+                        timestamp = pd.Timestamp(row['Datum']) if pd.notna(row['Datum']) else pd.Timestamp.now()
+                        entry = {
+                            'type': row['Typ'],
+                            'amount': float(row['Částka']),
+                            'timestamp': timestamp.isoformat(),
+                            'note': row['Poznámka'] if isinstance(row['Poznámka'], str) else ''
+                        }
+                        if isinstance(row.get('id'), str) and row['id']:
+                            changed += batch.update_entry(row['Kategorie'], {**entry, 'id': row['id']})
+                        else:
+                            # Nový řádek přidaný přímo v tabulce
+                            changed += batch.add_entry(row['Kategorie'], entry)
+            changes_made = changed > 0
             
-            # Uložení změn, pokud byly nějaké provedeny
+            # Vyhodnocení provedených změn
             if changes_made:
-                if data_manager.save_data(username, existing_data):
-                    if delete_button:
-                        st.success("Vybrané záznamy byly smazány!")
-                    else:
-                        st.success("Změny byly úspěšně uloženy!")
-                    st.rerun()
+                if delete_button:
+                    st.success("Vybrané záznamy byly smazány!")
                 else:
-                    st.error("Nepodařilo se uložit změny. Zkuste to prosím znovu.")
-            else:
+                    st.success("Změny byly úspěšně uloženy!")
+                st.rerun()
+            elif selected.empty:
                 if delete_button:
                     st.info("Nebyly vybrány žádné záznamy ke smazání.")
                 else:
                     st.info("Nebyly vybrány žádné záznamy k úpravě.")
+            else:
+                st.info("Vybrané záznamy nebylo potřeba měnit.")
     else:
         st.info("Zatím nejsou žádné záznamy") 
\ No newline at end of file
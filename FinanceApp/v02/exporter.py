@@ -0,0 +1,257 @@
+"""
+Proudový export dat uživatele do CSV, JSON Lines, JSON a Parquet.
+
+Exportéry jsou generátory textových bloků nad dvojicemi (kategorie, záznam)
+přímo z úložiště (storage.iter_entries), takže paměť nezávisí na velikosti
+ledgeru. write_export bloky zapíše do souboru nebo bufferu, volitelně
+komprimované gzipem. Hotové exporty pro stahování drží export_cache podle
+(úložiště, uživatel, verze dat, formát, komprese), takže se při překreslení stránky
+nesestavují znovu.
+
+Parquet (je-li nainstalováno pyarrow) se zapisuje po skupinách řádků do jedné
+tabulky s typovanými sloupci pro ledger i seznamy výdajů a investic.
+"""
+import csv
+import gzip
+import io
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+import pandas as pd
+
+from file_utils import dumps
+from storage import RESERVED_BUCKETS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Volitelná závislost, formát Parquet pak není k dispozici
+    pa = pq = None
+
+# Přibližná velikost jednoho bloku exportu ve znacích
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+# Sloupce CSV exportu (stejné, jaké přijímá import)
+CSV_HEADER = ["Kategorie", "Částka", "Datum", "Poznámka", "Typ"]
+
+# Podporované formáty: přípona souboru a MIME typ
+EXPORT_FORMATS = {
+    "json": ("json", "application/json"),
+    "jsonl": ("jsonl", "application/jsonl"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Počet záznamů v jedné skupině řádků Parquet
+PARQUET_BATCH_ROWS = 64 * 1024
+
+# Sloupce Parquet: kind je 'ledger', 'expense' nebo 'investment'; date je časová značka
+# záznamu ledgeru, případně datum výdaje či investice
+PARQUET_SCHEMA = pa.schema([
+    ("kind", pa.dictionary(pa.int32(), pa.string())),
+    ("id", pa.string()),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("type", pa.dictionary(pa.int32(), pa.string())),
+    ("name", pa.string()),
+    ("amount", pa.float64()),
+    ("date", pa.timestamp("us")),
+    ("note", pa.string()),
+]) if pa is not None else None
+
+
+def parquet_available():
+    """Zda je k dispozici pyarrow pro formát Parquet."""
+    return pq is not None
+
+
+def iter_csv(entries):
+    """
+    CSV export záznamů ledgeru po blocích.
+
+    Vyhrazené seznamy výdajů a investic mají jiné sloupce, do CSV se nezapisují.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+    for category, entry in entries:
+        if category in RESERVED_BUCKETS:
+            continue
+        writer.writerow([category, entry.get("amount", ""), entry.get("timestamp", ""),
+                         entry.get("note", ""), entry.get("type", "")])
+        if buffer.tell() >= EXPORT_CHUNK_CHARS:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def iter_jsonl(entries):
+    """JSON Lines export: jeden záznam na řádek, kategorie v klíči 'category'."""
+    buffer = io.StringIO()
+    for category, entry in entries:
+        buffer.write(dumps({"category": category, **entry}, pretty=False))
+        buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_CHARS:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def iter_json(entries):
+    """
+    JSON export ve tvaru dat uživatele ({kategorie: [záznamy]}), jeden záznam na řádek.
+
+    Záznamy musí přicházet seskupené podle kategorie (jak je vrací iter_entries).
+    """
+    buffer = io.StringIO()
+    buffer.write("{")
+    current = None
+    for category, entry in entries:
+        if category != current:
+            buffer.write("\n  ]," if current is not None else "")
+            buffer.write(f"\n  {dumps(category, pretty=False)}: [\n    ")
+            current = category
+        else:
+            buffer.write(",\n    ")
+        buffer.write(dumps(entry, pretty=False))
+        if buffer.tell() >= EXPORT_CHUNK_CHARS:
+            yield _drain(buffer)
+    buffer.write("\n  ]\n}\n" if current is not None else "}\n")
+    yield _drain(buffer)
+
+
+EXPORTERS = {"json": iter_json, "jsonl": iter_jsonl, "csv": iter_csv}
+
+
+def stream_export(entries, format="json"):
+    """Vrátí generátor textových bloků exportu zadaného formátu."""
+    try:
+        exporter = EXPORTERS[format]
+    except KeyError:
+        raise ValueError(f"Nepodporovaný formát exportu: {format}") from None
+    return exporter(entries)
+
+
+def write_parquet(entries, target, compress=False):
+    """
+    Zapíše záznamy do Parquet souboru (cesta nebo binární buffer) po skupinách řádků.
+
+    Komprese je vždy zapnutá, ``compress`` volí pomalejší, ale menší zstd místo snappy.
+    """
+    if not parquet_available():
+        raise ValueError("Export do Parquet vyžaduje balíček pyarrow")
+    entries = iter(entries)
+    with pq.ParquetWriter(target, PARQUET_SCHEMA, compression="zstd" if compress else "snappy") as writer:
+        while True:
+            batch = list(islice(entries, PARQUET_BATCH_ROWS))
+            if not batch:
+                break
+            writer.write_table(_parquet_table(batch))
+
+
+def _parquet_table(batch):
+    """Převede blok dvojic (kategorie, záznam) na tabulku pyarrow podle PARQUET_SCHEMA."""
+    columns = {name: [] for name in PARQUET_SCHEMA.names}
+    for category, entry in batch:
+        kind = category if category in RESERVED_BUCKETS else "ledger"
+        columns["kind"].append(kind)
+        columns["category"].append(category if kind == "ledger" else entry.get("category"))
+        columns["date"].append(entry.get("timestamp") if kind == "ledger" else entry.get("date"))
+        columns["amount"].append(entry.get("amount"))
+        for name in ("id", "type", "name", "note"):
+            columns[name].append(entry.get(name))
+
+    dates = pd.to_datetime(pd.Series(columns.pop("date"), dtype=object), format="ISO8601",
+                           errors="coerce", utc=True).dt.tz_convert(None)
+    amounts = pd.to_numeric(pd.Series(columns.pop("amount"), dtype=object), errors="coerce")
+    arrays = {
+        name: pa.array([None if value is None else str(value) for value in values],
+                       type=PARQUET_SCHEMA.field(name).type)
+        for name, values in columns.items()
+    }
+    arrays["amount"] = pa.array(amounts, type=pa.float64(), from_pandas=True)
+    arrays["date"] = pa.array(dates, type=pa.timestamp("us"), from_pandas=True)
+    return pa.table([arrays[name] for name in PARQUET_SCHEMA.names], schema=PARQUET_SCHEMA)
+
+
+def write_export(chunks, target, compress=False):
+    """
+    Zapíše bloky exportu v UTF-8 do cesty nebo binárního souboru/bufferu.
+
+    Při ``compress`` se výstup komprimuje gzipem (bez časové značky v hlavičce,
+    takže stejná data dávají stejné bajty).
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as handle:
+            write_export(chunks, handle, compress)
+        return
+    if compress:
+        with gzip.GzipFile(fileobj=target, mode="wb", mtime=0) as archive:
+            write_export(chunks, archive)
+        return
+    for chunk in chunks:
+        target.write(chunk.encode("utf-8"))
+
+
+def export_bytes(chunks, compress=False):
+    """Sestaví export v paměti a vrátí jeho bajty (pro st.download_button)."""
+    buffer = io.BytesIO()
+    write_export(chunks, buffer, compress)
+    return buffer.getvalue()
+
+
+def _drain(buffer):
+    """Vrátí obsah bufferu a vyprázdní ho."""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+class ExportCache:
+    """LRU cache hotových exportů podle (úložiště, uživatel, verze dat, formát, komprese)."""
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Vrátí bajty exportu pro klíč; při minutí je sestaví funkcí ``build``."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        payload = build()
+        with self._lock:
+            # Starší verze exportu stejného uživatele, úložiště a formátu už nikdo nestáhne
+            for stale in [k for k in self._entries if k[:2] == key[:2] and k[3:] == key[3:]]:
+                del self._entries[stale]
+            self._entries[key] = payload
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Statistiky cache (počet zásahů, minutí a uložených exportů)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+            }
+
+
+# Sdílená cache exportů pro všechny instance DataManager v procesu
+export_cache = ExportCache(maxsize=int(os.getenv("EXPORT_CACHE_SIZE", "16")))
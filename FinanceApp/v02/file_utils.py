@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows - zámky platí jen v rámci procesu
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # Volitelná závislost, jinak použijeme standardní json
+    orjson = None
+
+# Serializační profil: "compact" (výchozí, produkce) nebo "pretty" (čitelné soubory)
+JSON_PROFILE = os.getenv("JSON_PROFILE", "compact")
+
+# Maximální doba čekání na zámek souboru (v sekundách)
+LOCK_TIMEOUT = float(os.getenv("FILE_LOCK_TIMEOUT", "10"))
+LOCK_POLL_INTERVAL = 0.05
+
+# Zámky držené aktuálním vláknem: cesta -> [deskriptor, počet vnoření]
+_held_locks = threading.local()
+# Náhrada za flock na systémech bez fcntl
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def dumps(data, pretty=None):
+    """
+    Serializuje data do JSON řetězce.
+
+    Bez ``pretty`` se řídí profilem JSON_PROFILE; kompaktní výstup nemá mezery
+    ani odsazení. Je-li nainstalováno orjson, použije se pro rychlejší zápis.
+    """
+    if pretty is None:
+        pretty = JSON_PROFILE == "pretty"
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option).decode('utf-8')
+        except TypeError:
+            pass  # Typy, které orjson neumí, necháme na standardním json
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(text):
+    """Načte JSON z řetězce nebo bajtů (přes orjson, je-li k dispozici)."""
+    if orjson is not None:
+        # orjson.JSONDecodeError je podtřídou json.JSONDecodeError
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load_json(path):
+    """Načte JSON soubor."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+class FileLockTimeout(TimeoutError):
+    """Zámek souboru se nepodařilo získat v daném čase."""
+
+
+def _lock_path(path):
+    return f"{path}.lock"
+
+
+@contextmanager
+def file_lock(path, shared=False, timeout=None):
+    """
+    Advisory zámek souboru sdílený mezi procesy (flock na souboru ``<path>.lock``).
+
+    Zámek je v rámci vlákna reentrantní, takže např. sloučení žurnálu může
+    pod jedním zámkem načíst i uložit data. Pokud se zámek nepodaří získat
+    do ``timeout`` sekund, vyvolá FileLockTimeout.
+    """
+    held = getattr(_held_locks, 'locks', None)
+    if held is None:
+        held = _held_locks.locks = {}
+    key = os.path.abspath(path)
+    if key in held:
+        held[key][1] += 1
+        try:
+            yield
+        finally:
+            held[key][1] -= 1
+        return
+
+    timeout = LOCK_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    os.makedirs(os.path.dirname(key), exist_ok=True)
+
+    if fcntl is None:
+        with _process_locks_guard:
+            lock = _process_locks.setdefault(key, threading.Lock())
+        if not lock.acquire(timeout=timeout):
+            raise FileLockTimeout(f"Nepodařilo se získat zámek souboru {path}")
+        held[key] = [lock, 1]
+        try:
+            yield
+        finally:
+            del held[key]
+            lock.release()
+        return
+
+    fd = os.open(_lock_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+    mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise FileLockTimeout(f"Nepodařilo se získat zámek souboru {path}")
+                time.sleep(LOCK_POLL_INTERVAL)
+        held[key] = [fd, 1]
+        try:
+            yield
+        finally:
+            del held[key]
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directory(directory):
+    """Zajistí trvalost přejmenování souboru (na systémech, které to podporují)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path, text, lock=True):
+    """
+    Atomicky zapíše text do souboru: dočasný soubor ve stejném adresáři,
+    fsync a os.replace. Čtenář tak vždy uvidí buď starý, nebo nový obsah.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    def write():
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _fsync_directory(directory)
+
+    if lock:
+        with file_lock(path):
+            write()
+    else:
+        write()
+
+
+def atomic_write_json(path, data, pretty=None, lock=True):
+    """Atomicky uloží data jako JSON podle serializačního profilu (viz atomic_write_text)."""
+    atomic_write_text(path, dumps(data, pretty=pretty), lock=lock)
+
+
+def append_lines(path, lines):
+    """Připíše řádky na konec souboru a vynutí jejich zápis na disk."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("".join(line + "\n" for line in lines))
+        f.flush()
+        os.fsync(f.fileno())
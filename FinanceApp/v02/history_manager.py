@@ -1,30 +1,31 @@
 import json
 from datetime import datetime
 from config import HISTORY_FILE
+from file_utils import atomic_write_json, file_lock, load_json
 
 def load_history():
     try:
-        with open(HISTORY_FILE, "r") as file:
-            return json.load(file)
+        return load_json(HISTORY_FILE)
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
 def save_history(history):
-    with open(HISTORY_FILE, "w") as file:
-        json.dump(history, file, indent=4)
+    atomic_write_json(HISTORY_FILE, history)
 
 def log_change(category, old_value, new_value):
     if old_value == new_value:
         return  # Loguj pouze změněné hodnoty
     
-    history = load_history()
-    history.append({
-        "category": category,
-        "old_value": old_value,
-        "new_value": new_value,
-        "timestamp": datetime.now().isoformat()
-    })
-    save_history(history)
+    # Načtení a uložení pod jedním zámkem, aby se neztratily souběžné změny
+    with file_lock(HISTORY_FILE):
+        history = load_history()
+        history.append({
+            "category": category,
+            "old_value": old_value,
+            "new_value": new_value,
+            "timestamp": datetime.now().isoformat()
+        })
+        save_history(history)
 
 def clear_history():
     save_history([])
@@ -48,6 +49,10 @@ def delete_history_entries(criteria=None):
     if criteria is None:
         return 0
         
+    with file_lock(HISTORY_FILE):
+        return _delete_history_entries(criteria)
+
+def _delete_history_entries(criteria):
     history = load_history()
     original_length = len(history)
     
@@ -0,0 +1,353 @@
+"""
+Proudový import záznamů ledgeru z CSV, JSON Lines, JSON a Parquet.
+
+CSV se čte po blocích (pd.read_csv s chunksize), takže ani víceleté bankovní
+výpisy se nenačítají do paměti celé. Sloupce Částka a Datum se převádějí
+vektorově pro celý blok; řádky, které převést nejde, se neimportují a vrátí
+se jako chyby s číslem řádku. Platné záznamy se po blocích slučují do
+existujících dat přes index duplicit úložiště (viz DataManager.import_stream).
+"""
+import io
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from exporter import pq
+from file_utils import loads
+from storage import ENTRY_TYPES, RESERVED_BUCKETS
+
+# Počet řádků v jednom bloku importu
+IMPORT_CHUNKSIZE = 10_000
+
+# Kolik chyb jednotlivých řádků se uchovává v přehledu (počítají se všechny)
+MAX_ROW_ERRORS = 1000
+
+# Sloupce CSV a odpovídající klíče záznamu; Typ a Poznámka jsou nepovinné
+CSV_COLUMNS = {"Kategorie": "category", "Částka": "amount", "Datum": "timestamp",
+               "Typ": "type", "Poznámka": "note"}
+REQUIRED_CSV_COLUMNS = ("Kategorie", "Částka", "Datum")
+
+
+class ImportReport:
+    """Průběh a výsledek importu: počty řádků, přidaných záznamů, duplicit a chyby řádků."""
+
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.error = None
+
+    @property
+    def ok(self):
+        """Zda se soubor podařilo zpracovat (chybné řádky import nezastaví)."""
+        return self.error is None
+
+    def add_errors(self, errors):
+        """Započítá chybné řádky, uchová nejvýše MAX_ROW_ERRORS z nich."""
+        self.invalid += len(errors)
+        free = MAX_ROW_ERRORS - len(self.errors)
+        if free > 0:
+            self.errors.extend(errors[:free])
+
+    def summary(self):
+        """Krátké shrnutí pro zobrazení uživateli."""
+        return (f"Zpracováno {self.rows} řádků: přidáno {self.added}, "
+                f"duplicit {self.duplicates}, chybných {self.invalid}")
+
+
+def parse_amounts(values):
+    """
+    Vektorově převede částky na float64; nepřevoditelné hodnoty jsou NaN.
+
+    Textové částky mohou obsahovat mezery jako oddělovače tisíců a desetinnou čárku.
+    """
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        values = (values.astype("string")
+                  .str.replace(r"\s", "", regex=True)
+                  .str.replace(",", ".", regex=False))
+    return pd.to_numeric(values, errors="coerce").astype("float64")
+
+
+def parse_timestamps(values):
+    """
+    Vektorově ověří časové značky; vrací (text časové značky, maska platných).
+
+    Značky v ISO 8601 zůstávají beze změny, aby opakovaný import stejného
+    souboru našel duplicity. Česká data (31.12.2024, případně s časem) se
+    převedou na ISO 8601.
+    """
+    text = values.astype("string").str.strip()
+    parsed = pd.to_datetime(text, format="ISO8601", errors="coerce")
+    timestamps = text.where(parsed.notna())
+    local = parsed.isna() & text.notna()
+    if local.any():
+        fallback = pd.to_datetime(text[local], format="mixed", dayfirst=True, errors="coerce")
+        timestamps[local] = fallback.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return timestamps, timestamps.notna()
+
+
+def convert_frame(frame, rows):
+    """
+    Ověří a převede blok záznamů (sloupce category, amount, timestamp, případně type, note).
+
+    ``rows`` jsou označení řádků pro hlášení chyb (čísla řádků CSV nebo
+    pozice v JSON). Vrací (platné řádky jako DataFrame, seznam chyb
+    {'row', 'error'}).
+    """
+    category = frame["category"].astype("string").str.strip()
+    amount = parse_amounts(frame["amount"])
+    timestamp, has_timestamp = parse_timestamps(frame["timestamp"])
+    type_ = frame["type"] if "type" in frame else pd.Series(pd.NA, index=frame.index)
+
+    problems = np.select(
+        [
+            category.isna().to_numpy() | (category == "").fillna(True).to_numpy(),
+            category.isin(RESERVED_BUCKETS).fillna(False).to_numpy(),
+            amount.isna().to_numpy(),
+            ~has_timestamp.to_numpy(),
+            (type_.notna() & ~type_.isin(ENTRY_TYPES)).to_numpy(),
+        ],
+        [
+            "Chybí kategorie",
+            "Vyhrazená kategorie",
+            "Neplatná částka",
+            "Neplatné datum",
+            "Neznámý typ záznamu",
+        ],
+        default="",
+    )
+    valid = problems == ""
+    errors = [{"row": row, "error": problem} for row, problem in zip(np.asarray(rows)[~valid], problems[~valid])]
+
+    converted = pd.DataFrame({
+        "category": category,
+        "amount": amount,
+        "timestamp": timestamp,
+        "type": type_,
+        "note": frame["note"].fillna("").astype(str) if "note" in frame else "",
+    })
+    return converted[valid], errors
+
+
+@contextmanager
+def open_source(source):
+    """
+    Otevře zdroj importu pro binární čtení.
+
+    Zdrojem může být cesta, bajty (BytesIO nad ``bytes`` sdílí jejich buffer
+    bez kopie, bytearray a memoryview se zkopírují) nebo binární soubor či
+    buffer (např. UploadedFile ze Streamlitu), který se čte od začátku
+    a nezavírá.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    elif hasattr(source, "read"):
+        if source.seekable():
+            source.seek(0)
+        yield source
+    else:
+        with open(source, "rb") as handle:
+            yield handle
+
+
+def _source_size(handle):
+    """Velikost zdroje v bajtech pro výpočet průběhu (None, pokud ji nelze zjistit)."""
+    try:
+        return os.fstat(handle.fileno()).st_size
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+    try:
+        position = handle.tell()
+        size = handle.seek(0, io.SEEK_END)
+        handle.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def iter_csv_chunks(source, chunksize=IMPORT_CHUNKSIZE):
+    """
+    Čte CSV po blocích; vrací generátor (položky, chyby, podíl zpracovaného souboru, seznamy).
+
+    Položky jsou dvojice (kategorie, záznam) připravené pro add_entries,
+    seznamy výdajů a investic CSV neobsahuje (vždy prázdný slovník).
+    Chybějící povinné sloupce jsou chybou celého souboru (ValueError).
+    """
+    with open_source(source) as handle:
+        size = _source_size(handle)
+        reader = pd.read_csv(handle, chunksize=chunksize, dtype=str, encoding="utf-8", skipinitialspace=True)
+        line = 2  # první datový řádek za hlavičkou
+        for chunk in reader:
+            missing = [column for column in REQUIRED_CSV_COLUMNS if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"Chybí sloupce: {', '.join(missing)}")
+            frame = chunk.rename(columns=CSV_COLUMNS)
+            rows = np.arange(line, line + len(chunk))
+            line += len(chunk)
+            valid, errors = convert_frame(frame, rows)
+            fraction = min(handle.tell() / size, 1.0) if size else None
+            yield _items(valid), errors, fraction, {}
+
+
+def iter_json_chunks(source, chunksize=IMPORT_CHUNKSIZE):
+    """
+    Projde data z JSON ({kategorie: [záznamy]}) po blocích stejně jako iter_csv_chunks.
+
+    JSON se načte najednou (rychlým kodekem), ověření a slučování ale probíhá
+    po blocích. Vyhrazené seznamy 'expense' a 'investment' se vrací zvlášť
+    jako poslední prvek n-tice (jen v posledním bloku, jinak prázdný slovník).
+    """
+    with open_source(source) as handle:
+        data = loads(handle.read())
+    if not isinstance(data, dict):
+        raise ValueError("Očekáván objekt {kategorie: [záznamy]}")
+
+    buckets = {kind: data.get(kind) or [] for kind in RESERVED_BUCKETS if kind in data}
+    pairs = []
+    for category, entries in data.items():
+        if category in RESERVED_BUCKETS:
+            continue
+        if isinstance(entries, dict):
+            entries = [entries]
+        pairs.extend((category, f"{category} #{position}", entry)
+                     for position, entry in enumerate(entries or [], start=1))
+
+    total = len(pairs)
+    if not total:
+        yield [], [], 1.0, buckets
+        return
+    for start in range(0, total, chunksize):
+        block = pairs[start:start + chunksize]
+        items, errors = _convert_entries(block)
+        done = start + len(block)
+        yield items, errors, done / total, buckets if done == total else {}
+
+
+def iter_jsonl_chunks(source, chunksize=IMPORT_CHUNKSIZE):
+    """
+    Čte JSON Lines (jeden záznam s klíčem 'category' na řádek) po blocích jako iter_csv_chunks.
+
+    Řádky vyhrazených seznamů se sbírají a vrací v posledním bloku,
+    neplatný JSON na řádku je chybou řádku.
+    """
+    with open_source(source) as handle:
+        size = _source_size(handle)
+        buckets = {}
+        block, errors = [], []
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = loads(line)
+                category = record.pop("category")
+            except (ValueError, TypeError, KeyError, AttributeError):
+                errors.append({"row": line_number, "error": "Neplatný záznam JSON"})
+                continue
+            if category in RESERVED_BUCKETS:
+                buckets.setdefault(category, []).append(record)
+                continue
+            block.append((category, line_number, record))
+            if len(block) >= chunksize:
+                items, block_errors = _convert_entries(block)
+                yield items, errors + block_errors, handle.tell() / size if size else None, {}
+                block, errors = [], []
+        items, block_errors = _convert_entries(block)
+        yield items, errors + block_errors, 1.0, buckets
+
+
+def iter_parquet_chunks(source, chunksize=IMPORT_CHUNKSIZE):
+    """
+    Čte Parquet ve tvaru exportu (viz exporter.PARQUET_SCHEMA) po blocích jako iter_csv_chunks.
+
+    Sloupce už mají správné typy, převádí se jen časové značky zpět na ISO 8601.
+    Řádky výdajů a investic se vrací v posledním bloku. Vyžaduje pyarrow.
+    """
+    if pq is None:
+        raise ValueError("Import z Parquet vyžaduje balíček pyarrow")
+    with open_source(source) as handle:
+        yield from _iter_parquet(pq.ParquetFile(handle), chunksize)
+
+
+def _iter_parquet(parquet, chunksize):
+    """Bloky otevřeného Parquet souboru (viz iter_parquet_chunks)."""
+    total = parquet.metadata.num_rows
+    done = 0
+    buckets = {}
+    if not total:
+        yield [], [], 1.0, buckets
+        return
+    for batch in parquet.iter_batches(batch_size=chunksize):
+        frame = batch.to_pandas()
+        rows = np.arange(done + 1, done + len(frame) + 1)
+        done += len(frame)
+        kind = frame["kind"].astype(object) if "kind" in frame else pd.Series("ledger", index=frame.index)
+        for bucket in RESERVED_BUCKETS:
+            selected = frame[kind == bucket]
+            if not selected.empty:
+                buckets.setdefault(bucket, []).extend(_bucket_records(selected))
+
+        ledger = frame[kind == "ledger"]
+        converted = pd.DataFrame({
+            "category": ledger["category"].astype(object),
+            "amount": ledger["amount"],
+            "timestamp": _iso_timestamps(ledger["date"]),
+            "type": ledger["type"].astype(object),
+            "note": ledger["note"],
+        })
+        valid, errors = convert_frame(converted, rows[(kind == "ledger").to_numpy()])
+        items = _items(valid)
+        for (_, entry), entry_id in zip(items, ledger.loc[valid.index, "id"]):
+            if isinstance(entry_id, str) and entry_id:
+                entry["id"] = entry_id
+        yield items, errors, done / total, buckets if done == total else {}
+
+
+def _iso_timestamps(dates):
+    """Časové značky jako text ve tvaru datetime.isoformat() (mikrosekundy jen nenulové)."""
+    whole = dates.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return whole.where(dates.dt.microsecond == 0, dates.dt.strftime("%Y-%m-%dT%H:%M:%S.%f"))
+
+
+def _bucket_records(frame):
+    """Převede řádky výdajů nebo investic z Parquet zpět na záznamy seznamu (bez prázdných polí)."""
+    records = []
+    for row in frame.to_dict("records"):
+        date = row.get("date")
+        if pd.notna(date):
+            date = date.strftime("%Y-%m-%d") if date == date.normalize() else date.isoformat()
+        record = {"amount": row.get("amount"), "category": row.get("category"), "type": row.get("type"),
+                  "name": row.get("name"), "date": date, "note": row.get("note"), "id": row.get("id")}
+        records.append({key: value for key, value in record.items() if value is not None and not pd.isna(value)})
+    return records
+
+
+def _convert_entries(block):
+    """Ověří blok záznamů ze slovníků (kategorie, označení řádku, záznam); další pole záznamu zachová."""
+    if not block:
+        return [], []
+    entries = [entry if isinstance(entry, dict) else {} for _, _, entry in block]
+    frame = pd.DataFrame.from_records(entries, columns=["type", "amount", "timestamp", "note"])
+    frame.insert(0, "category", [category for category, _, _ in block])
+    valid, errors = convert_frame(frame, [row for _, row, _ in block])
+    items = [
+        (category, {**entries[i], **entry})
+        for i, (category, entry) in zip(valid.index, _items(valid))
+    ]
+    return items, errors
+
+
+def _items(valid):
+    """Převede platné řádky na dvojice (kategorie, záznam); prázdný typ se nevyplňuje."""
+    items = []
+    for category, amount, timestamp, type_, note in zip(
+        valid["category"], valid["amount"], valid["timestamp"], valid["type"], valid["note"]
+    ):
+        entry = {"amount": float(amount), "timestamp": timestamp, "note": note}
+        if isinstance(type_, str):
+            entry = {"type": type_, **entry}
+        items.append((category, entry))
+    return items
@@ -0,0 +1,172 @@
+"""
+Sloupcová reprezentace ledgeru pro analytické stránky.
+
+Data uživatele se převedou jednou do DataFrame s typovanými sloupci
+(kategorie a typ jako categorical, datum jako datetime64, částka jako float64)
+a všechny agregace a grafy pak pracují nad ním místo opakovaného procházení
+slovníků a parsování časových značek.
+"""
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from storage import ENTRY_TYPES, RESERVED_BUCKETS
+
+# Sloupce ledgeru v pořadí, v jakém je vrací ledger_frame/records_frame
+LEDGER_COLUMNS = ["id", "category", "type", "amount", "date", "note"]
+
+# Názvy sloupců pro zobrazení v tabulkách
+DISPLAY_COLUMNS = {
+    "category": "Kategorie",
+    "type": "Typ",
+    "amount": "Částka",
+    "date": "Datum",
+    "note": "Poznámka",
+}
+
+# Časová období přehledů a jim odpovídající pandas periody
+PERIOD_FREQS = {"Den": "D", "Týden": "W", "Měsíc": "M", "Rok": "Y"}
+
+
+def ledger_frame(data):
+    """
+    Převede data uživatele ({kategorie: [záznamy]}) na sloupcový ledger.
+
+    Vyhrazené seznamy 'expense' a 'investment' se přeskakují. Záznam bez
+    časové značky dostane aktuální čas (stejně jako dříve v přehledech).
+    """
+    categories, entries = [], []
+    for category, items in (data or {}).items():
+        if category in RESERVED_BUCKETS:
+            continue
+        if isinstance(items, dict):
+            items = [items]
+        if items:
+            categories.append(category)
+            entries.append(items)
+
+    frame = pd.DataFrame.from_records(
+        list(chain.from_iterable(entries)),
+        columns=["id", "type", "amount", "timestamp", "note"]
+    )
+    frame["category"] = np.repeat(categories, [len(items) for items in entries])
+    return _typed_frame(frame.rename(columns={"timestamp": "date"}))
+
+
+def records_frame(records):
+    """
+    Převede seznam plochých záznamů (výdaje s klíčem 'category') na sloupcový ledger.
+
+    Datum se bere z klíče 'date', případně z 'timestamp' (záznamy z ledgeru).
+    """
+    frame = pd.DataFrame.from_records(
+        list(records or []),
+        columns=["id", "category", "type", "amount", "date", "timestamp", "note"]
+    )
+    frame["date"] = frame["date"].fillna(frame["timestamp"])
+    return _typed_frame(frame.drop(columns="timestamp"))
+
+
+def rollups_frame(rows):
+    """
+    Převede materializované součty (kategorie, typ, měsíc, částka, počet) na DataFrame.
+
+    Výsledek má sloupce category, type, amount jako ledger, takže na něj lze
+    použít type_totals a category_totals; období počítá rollup_period_totals.
+    """
+    frame = pd.DataFrame.from_records(list(rows or []), columns=["category", "type", "month", "amount", "count"])
+    return pd.DataFrame({
+        "category": frame["category"].astype(str).astype("category"),
+        "type": pd.Categorical(frame["type"], categories=list(ENTRY_TYPES)),
+        "month": frame["month"].astype(str),
+        "amount": frame["amount"].astype("float64"),
+        "count": frame["count"].astype("int64"),
+    })
+
+
+def _typed_frame(frame):
+    """Převede surové sloupce na cílové typy."""
+    dates = pd.to_datetime(frame["date"], format="ISO8601", errors="coerce")
+    typed = pd.DataFrame({
+        "id": frame["id"].fillna("").astype(str),
+        "category": frame["category"].fillna("").astype(str).astype("category"),
+        "type": pd.Categorical(frame["type"].fillna("Výdaj"), categories=list(ENTRY_TYPES)),
+        "amount": pd.to_numeric(frame["amount"], errors="coerce").fillna(0.0).astype("float64"),
+        "date": dates.fillna(pd.Timestamp.now()).astype("datetime64[ns]"),
+        "note": frame["note"].fillna("").astype(str),
+    })
+    return typed.reset_index(drop=True)
+
+
+def type_totals(ledger):
+    """Součty částek podle typu (vždy obsahuje Výdaj i Příjem)."""
+    return ledger.groupby("type", observed=False)["amount"].sum().reindex(list(ENTRY_TYPES), fill_value=0.0)
+
+
+def category_totals(ledger):
+    """Součty podle kategorie a typu (řádky kategorie, sloupce Výdaj/Příjem)."""
+    table = ledger.pivot_table(
+        index="category", columns="type", values="amount",
+        aggfunc="sum", fill_value=0.0, observed=True
+    )
+    return table.reindex(columns=list(ENTRY_TYPES), fill_value=0.0)
+
+
+def period_totals(ledger, freq):
+    """
+    Součty podle období a typu jako tabulka (řádky období, sloupce Výdaj/Příjem).
+
+    ``freq`` je pandas perioda, např. 'M' (měsíce), 'Y' (roky) nebo 'D' (dny).
+    """
+    periods = ledger["date"].dt.to_period(freq)
+    table = ledger.pivot_table(
+        index=periods, columns="type", values="amount",
+        aggfunc="sum", fill_value=0.0, observed=False
+    )
+    return table.reindex(columns=list(ENTRY_TYPES), fill_value=0.0)
+
+
+def display_frame(ledger):
+    """Ledger s českými názvy sloupců a textovými kategoriemi pro editovatelné tabulky."""
+    frame = ledger[LEDGER_COLUMNS].rename(columns=DISPLAY_COLUMNS)
+    return frame.astype({"Kategorie": str, "Typ": str})
+
+
+def period_rollups(ledger):
+    """
+    Denní, týdenní, měsíční a roční součty podle typu v jednom průchodu.
+
+    Záznamy se agregují jen jednou (po dnech); vyšší období se sčítají
+    z denní tabulky. Vrací slovník {'D'|'W'|'M'|'Y': tabulka jako u period_totals}.
+    Týdny začínají pondělím.
+    """
+    daily = period_totals(ledger, "D")
+    rollups = {"D": daily}
+    for freq in ("W", "M", "Y"):
+        rollups[freq] = daily.groupby(daily.index.asfreq(freq)).sum()
+    return rollups
+
+
+def filter_period(ledger, period, selected_date=None):
+    """
+    Vybere záznamy z období (Celkem/Rok/Měsíc/Týden/Den) obsahujícího ``selected_date``.
+
+    Porovnává se vektorově podle klíče periody, pro "Celkem" se vrací celý ledger.
+    """
+    freq = PERIOD_FREQS.get(period)
+    if freq is None or ledger.empty:
+        return ledger
+    key = pd.Period(selected_date, freq=freq)
+    return ledger[ledger["date"].dt.to_period(freq) == key]
+
+
+def rollup_period_totals(rollups, freq="M"):
+    """Měsíční ('M') nebo roční ('Y') součty podle typu z materializovaných součtů."""
+    dated = rollups[rollups["month"] != ""]
+    periods = pd.PeriodIndex(dated["month"], freq="M").asfreq(freq).rename("date")
+    table = dated.pivot_table(
+        index=periods, columns="type", values="amount",
+        aggfunc="sum", fill_value=0.0, observed=False
+    )
+    return table.reindex(columns=list(ENTRY_TYPES), fill_value=0.0)
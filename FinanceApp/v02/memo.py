@@ -0,0 +1,133 @@
+"""
+Memoizace výsledků kalkulaček podle vstupních parametrů.
+
+Streamlit při každé změně widgetu spouští celou stránku znovu, takže kalkulačky
+přepočítávaly výsledky a stavěly grafy i po přepnutí nesouvisejícího
+zaškrtávátka. Dekorátor memoize drží výsledky čistých výpočtů a sestavení grafů
+v omezené LRU cache podle normalizovaných argumentů (čísla jako float, seznamy
+a pole NumPy jako n-tice bajtů), počty zásahů a minutí vrací memo_stats.
+
+Vrácené objekty (DataFrame, plotly Figure) jsou sdílené mezi voláními, volající
+je proto nesmí měnit. Funkce závislé na dnešním datu dostávají datum jako
+argument, aby bylo součástí klíče.
+"""
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Počet výsledků v cache jedné funkce
+MEMO_CACHE_SIZE = int(os.getenv("MEMO_CACHE_SIZE", "32"))
+
+# Cache všech memoizovaných funkcí podle jména (pro ladicí panel)
+_registry = {}
+
+
+class MemoCache:
+    """LRU cache výsledků jedné funkce s počítadly zásahů a minutí."""
+
+    def __init__(self, maxsize=MEMO_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Vrátí výsledek pro klíč; při minutí ho spočítá funkcí ``compute``."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Statistiky cache (počet zásahů, minutí a uložených výsledků)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+            }
+
+
+def normalize(value):
+    """
+    Převede argument na hashovatelnou hodnotu klíče cache.
+
+    Čísla se sjednotí na float (100000 i 100000.0 dají stejný klíč), seznamy
+    a n-tice na n-tice, pole NumPy na typ, tvar a bajty. Pro nehashovatelné
+    hodnoty vyhodí TypeError.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+    hash(value)
+    return value
+
+
+def memoize(func=None, *, maxsize=None, name=None):
+    """
+    Dekorátor ukládající výsledky funkce do LRU cache podle jejích argumentů.
+
+    Poziční i pojmenované argumenty se přiřadí k parametrům (včetně výchozích
+    hodnot), takže f(1, b=2) a f(1, 2) sdílí záznam. Volání s nehashovatelným
+    argumentem se provede bez cache. Cache je dostupná jako ``wrapper.cache``.
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+        cache = MemoCache(maxsize or MEMO_CACHE_SIZE)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = normalize(tuple(bound.arguments.values()))
+            except TypeError:
+                return func(*args, **kwargs)
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        _registry[name or f"{func.__module__}.{func.__qualname__}"] = cache
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def memo_stats():
+    """Statistiky všech memoizovaných funkcí jako seznam slovníků."""
+    return [{'function': name, **cache.stats()} for name, cache in sorted(_registry.items())]
+
+
+def clear_memo():
+    """Vyprázdní cache všech memoizovaných funkcí."""
+    for cache in _registry.values():
+        cache.clear()
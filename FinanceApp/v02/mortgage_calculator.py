@@ -1,107 +1,152 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
-from datetime import date, timedelta
+from datetime import date
+from amortization import amortization_schedule, scenario_grid
+from memo import memoize
+
+# Memoizované výpočty pro stránku kalkulačky (datum začátku je součástí klíče)
+mortgage_schedule = memoize(amortization_schedule, name="mortgage_calculator.amortization_schedule")
+mortgage_scenarios = memoize(scenario_grid, name="mortgage_calculator.scenario_grid")
 
 def calculate_mortgage(loan_amount, interest_rate, years, extra_payment=0, inflation_rate=0, property_appreciation=0, insurance=0, ltv=80):
     """Vypočítá detaily hypotéky včetně splátek a úroků s ohledem na inflaci a zhodnocení nemovitosti."""
-    monthly_rate = interest_rate / 100 / 12
-    monthly_inflation = (1 + inflation_rate/100) ** (1/12) - 1
-    monthly_appreciation = (1 + property_appreciation/100) ** (1/12) - 1
-    num_payments = years * 12
+    # Výpočet probíhá vektorově v amortization_schedule, zde jen převod na původní slovník seznamů
+    schedule = amortization_schedule(loan_amount, interest_rate, years, extra_payment, inflation_rate,
+                                     property_appreciation, insurance, ltv)
+    return {
+        'dates': schedule['date'].dt.date.tolist(),
+        'remaining_balance': schedule['remaining_balance'].tolist(),
+        'interest_paid': schedule['interest_paid'].tolist(),
+        'principal_paid': schedule['principal_paid'].tolist(),
+        'total_paid': schedule['total_paid'].tolist(),
+        'monthly_payments': schedule['payment'].tolist(),
+        'regular_payment': schedule.attrs['regular_payment'],
+        'real_values': schedule['real_value'].tolist(),
+        'property_values': schedule['property_value'].tolist(),
+        'insurance_paid': schedule['insurance_paid'].tolist(),
+        'property_value': schedule.attrs['property_value']
+    }
+
+@memoize
+def create_mortgage_chart(loan_amount, interest_rate, years, extra_payment, inflation_rate, property_appreciation, insurance, ltv, start_date):
+    """Graf průběhu splácení hypotéky (jistina, zaplaceno, zůstatek, reálná hodnota a nemovitost)."""
+    schedule = mortgage_schedule(loan_amount, interest_rate, years, extra_payment, inflation_rate, property_appreciation, insurance, ltv, start_date)
+    fig = go.Figure()
     
-    # Výpočet celkové hodnoty nemovitosti z LTV
-    property_value = loan_amount / (ltv / 100)
+    # Přidání křivek pro jistinu a úroky
+    fig.add_trace(go.Scatter(
+        x=schedule['date'],
+        y=schedule['principal_paid'],
+        name="Splacená jistina",
+        fill='tozeroy',
+        mode='none'
+    ))
     
-    # Výpočet měsíční splátky (bez mimořádných splátek)
-    if monthly_rate == 0:
-        monthly_payment = loan_amount / num_payments
-    else:
-        monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
+    fig.add_trace(go.Scatter(
+        x=schedule['date'],
+        y=schedule['total_paid'] + schedule['insurance_paid'],
+        name="Celkem zaplaceno vč. pojištění",
+        fill='tonexty',
+        mode='none'
+    ))
     
-    # Inicializace polí pro sledování průběhu
-    remaining_balance = []
-    interest_paid = []
-    principal_paid = []
-    total_paid = []
-    dates = []
-    monthly_payments = []
-    real_values = []  # Hodnoty v reálných cenách (očištěné o inflaci)
-    property_values = []  # Hodnoty nemovitosti v čase
-    insurance_paid = []  # Celkem zaplacené pojištění
+    # Přidání křivky zbývající jistiny
+    fig.add_trace(go.Scatter(
+        x=schedule['date'],
+        y=schedule['remaining_balance'],
+        name="Zbývající jistina",
+        line=dict(color='red', dash='dash')
+    ))
     
-    balance = loan_amount
-    total_interest = 0
-    total_principal = 0
-    total_insurance = 0
-    inflation_factor = 1
-    appreciation_factor = 1
+    # Přidání křivky reálné hodnoty
+    fig.add_trace(go.Scatter(
+        x=schedule['date'],
+        y=schedule['real_value'],
+        name="Reálná hodnota (očištěná o inflaci)",
+        line=dict(color='green', dash='dot')
+    ))
     
-    start_date = date.today()
+    # Přidání křivky hodnoty nemovitosti
+    fig.add_trace(go.Scatter(
+        x=schedule['date'],
+        y=schedule['property_value'],
+        name="Hodnota nemovitosti",
+        line=dict(color='purple', dash='dot')
+    ))
     
-    for month in range(num_payments + 1):
-        if month == 0:
-            # Počáteční stav
-            remaining_balance.append(balance)
-            interest_paid.append(0)
-            principal_paid.append(0)
-            total_paid.append(0)
-            monthly_payments.append(0)
-            real_values.append(0)
-            property_values.append(property_value)  # Počáteční hodnota nemovitosti
-            insurance_paid.append(0)
-        else:
-            # Aktualizace faktorů
-            inflation_factor *= (1 + monthly_inflation)
-            appreciation_factor *= (1 + monthly_appreciation)
-            
-            # Výpočet úroku a jistiny pro tento měsíc
-            monthly_interest = balance * monthly_rate
-            if balance > monthly_payment:
-                this_payment = monthly_payment + extra_payment
-                principal = this_payment - monthly_interest
-            else:
-                this_payment = balance + monthly_interest
-                principal = balance
-            
-            # Aktualizace stavů
-            balance = max(0, balance - principal)
-            total_interest += monthly_interest
-            total_principal += principal
-            total_insurance += insurance
-            
-            remaining_balance.append(balance)
-            interest_paid.append(total_interest)
-            principal_paid.append(total_principal)
-            total_paid.append(total_principal + total_interest + total_insurance)
-            monthly_payments.append(this_payment + insurance)
-            
-            # Výpočet reálné hodnoty (očištěné o inflaci)
-            real_value = (total_principal + total_interest + total_insurance) / inflation_factor
-            real_values.append(real_value)
-            
-            # Výpočet aktuální hodnoty nemovitosti
-            current_property_value = property_value * appreciation_factor
-            property_values.append(current_property_value)
-            
-            insurance_paid.append(total_insurance)
-        
-        dates.append(start_date + timedelta(days=30*month))
+    # Úprava vzhledu
+    fig.update_layout(
+        title="Průběh splácení hypotéky",
+        xaxis_title="Datum",
+        yaxis_title="Částka (Kč)",
+        showlegend=True,
+        hovermode='x unified'
+    )
     
-    return {
-        'dates': dates,
-        'remaining_balance': remaining_balance,
-        'interest_paid': interest_paid,
-        'principal_paid': principal_paid,
-        'total_paid': total_paid,
-        'monthly_payments': monthly_payments,
-        'regular_payment': monthly_payment,
-        'real_values': real_values,
-        'property_values': property_values,
-        'insurance_paid': insurance_paid,
-        'property_value': property_value
-    }
+    # Formátování osy Y
+    fig.update_layout(
+        yaxis=dict(
+            tickformat=",.0f",
+            ticksuffix=" Kč"
+        )
+    )
+    
+    return fig
+
+# Ukazatele pro heatmapu scénářů: sloupec scenario_grid a formát hodnoty
+SCENARIO_METRICS = {
+    "Celkové úroky": ("total_interest", ",.0f"),
+    "Měsíční splátka": ("monthly_payment", ",.0f"),
+    "Měsíc doplacení": ("payoff_month", "d"),
+}
+
+@memoize
+def create_scenario_heatmap(loan_amount, rates, terms, extras, extra_level, metric):
+    """Heatmapa ukazatele pro mřížku sazeb × dob splácení při dané mimořádné splátce."""
+    grid = mortgage_scenarios(loan_amount, rates, terms, extras)
+    column, value_format = SCENARIO_METRICS[metric]
+    selected = grid[grid['extra_payment'].round() == extra_level]
+    pivot = selected.pivot(index='interest_rate', columns='years', values=column)
+
+    fig = go.Figure(go.Heatmap(
+        x=pivot.columns,
+        y=pivot.index,
+        z=pivot.values,
+        colorscale='Viridis',
+        colorbar=dict(title=metric),
+        hovertemplate=f"Doba: %{{x}} let<br>Sazba: %{{y:.1f}} %<br>{metric}: %{{z:{value_format}}}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"{metric} podle sazby a doby splácení",
+        xaxis_title="Doba splácení (roky)",
+        yaxis_title="Úroková sazba (%)"
+    )
+    return fig
+
+def show_scenario_heatmap(loan_amount, interest_rate, years, extra_payment=0):
+    """Heatmapa ukazatele pro mřížku sazeb × dob splácení při zvolené mimořádné splátce."""
+    col1, col2 = st.columns(2)
+    with col1:
+        rate_range = st.slider("Rozsah úrokových sazeb (%)", 0.5, 15.0,
+                               (max(0.5, interest_rate - 3.0), min(15.0, interest_rate + 3.0)), 0.1)
+        year_range = st.slider("Rozsah doby splácení (roky)", 1, 40, (max(1, years - 15), min(40, years + 10)))
+    with col2:
+        max_extra = st.number_input("Nejvyšší mimořádná splátka (Kč)", min_value=0, max_value=1000000,
+                                    value=max(10000, int(extra_payment)), step=1000, format="%d")
+        metric = st.selectbox("Ukazatel", list(SCENARIO_METRICS))
+
+    rates = np.round(np.arange(rate_range[0], rate_range[1] + 0.05, 0.1), 1)
+    terms = np.arange(year_range[0], year_range[1] + 1)
+    extras = np.linspace(0, max_extra, 10)
+
+    extra_level = st.select_slider(
+        "Mimořádná měsíční splátka (Kč)",
+        options=extras.round().astype(int).tolist(),
+        help=f"Spočítáno {rates.size * terms.size * extras.size:,} scénářů"
+    )
+    fig = create_scenario_heatmap(loan_amount, rates, terms, extras, extra_level, metric)
+    st.plotly_chart(fig, use_container_width=True)
 
 def show_mortgage_calculator():
     st.title("Hypoteční kalkulačka")
@@ -200,7 +245,9 @@ def show_mortgage_calculator():
         )
     
     # Výpočet hypotéky
-    mortgage_data = calculate_mortgage(loan_amount, interest_rate, years, extra_payment, inflation_rate, property_appreciation, insurance, ltv)
+    start_date = date.today()
+    schedule = mortgage_schedule(loan_amount, interest_rate, years, extra_payment, inflation_rate, property_appreciation, insurance, ltv, start_date)
+    final = schedule.iloc[-1]
     
     # Zobrazení měsíční splátky a souhrnů
     st.header("Výsledky hypotéky")
@@ -209,23 +256,23 @@ def show_mortgage_calculator():
     with result_cols[0]:
         st.metric(
             "Měsíční splátka vč. pojištění",
-            f"{mortgage_data['regular_payment'] + insurance:,.0f} Kč",
+            f"{schedule.attrs['regular_payment'] + insurance:,.0f} Kč",
             help="Celková měsíční splátka včetně pojištění nemovitosti"
         )
     with result_cols[1]:
         st.metric(
             "Celkem zaplaceno",
-            f"{mortgage_data['total_paid'][-1]:,.0f} Kč",
+            f"{final['total_paid']:,.0f} Kč",
             help="Celková částka, kterou zaplatíte za celou dobu splácení včetně úroků a pojištění"
         )
     with result_cols[2]:
         st.metric(
             "Zaplaceno na úrocích",
-            f"{mortgage_data['interest_paid'][-1]:,.0f} Kč",
+            f"{final['interest_paid']:,.0f} Kč",
             help="Celková částka zaplacená na úrocích za celou dobu splácení"
         )
     with result_cols[3]:
-        real_interest_rate = (mortgage_data['interest_paid'][-1] / loan_amount * 100) - inflation_rate
+        real_interest_rate = (final['interest_paid'] / loan_amount * 100) - inflation_rate
         st.metric(
             "Reálný efektivní úrok",
             f"{real_interest_rate:,.1f} %",
@@ -237,8 +284,8 @@ def show_mortgage_calculator():
     property_cols = st.columns(2)
     
     with property_cols[0]:
-        final_property_value = mortgage_data['property_values'][-1]
-        property_appreciation_amount = final_property_value - mortgage_data['property_value']
+        final_property_value = final['property_value']
+        property_appreciation_amount = final_property_value - schedule.attrs['property_value']
         st.metric(
             "Konečná hodnota nemovitosti",
             f"{final_property_value:,.0f} Kč",
@@ -248,7 +295,7 @@ def show_mortgage_calculator():
     
     with property_cols[1]:
         real_property_value = final_property_value / ((1 + inflation_rate/100) ** years)
-        real_appreciation = real_property_value - mortgage_data['property_value']
+        real_appreciation = real_property_value - schedule.attrs['property_value']
         st.metric(
             "Reálná hodnota nemovitosti",
             f"{real_property_value:,.0f} Kč",
@@ -261,7 +308,7 @@ def show_mortgage_calculator():
     insurance_cols = st.columns(2)
     
     with insurance_cols[0]:
-        total_insurance = mortgage_data['insurance_paid'][-1]
+        total_insurance = final['insurance_paid']
         st.metric(
             "Celkem zaplaceno na pojištění",
             f"{total_insurance:,.0f} Kč",
@@ -277,93 +324,39 @@ def show_mortgage_calculator():
         )
     
     # Graf průběhu hypotéky
-    fig = go.Figure()
-    
-    # Přidání křivek pro jistinu a úroky
-    fig.add_trace(go.Scatter(
-        x=mortgage_data['dates'],
-        y=mortgage_data['principal_paid'],
-        name="Splacená jistina",
-        fill='tozeroy',
-        mode='none'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=mortgage_data['dates'],
-        y=[y + mortgage_data['insurance_paid'][i] for i, y in enumerate(mortgage_data['total_paid'])],
-        name="Celkem zaplaceno vč. pojištění",
-        fill='tonexty',
-        mode='none'
-    ))
-    
-    # Přidání křivky zbývající jistiny
-    fig.add_trace(go.Scatter(
-        x=mortgage_data['dates'],
-        y=mortgage_data['remaining_balance'],
-        name="Zbývající jistina",
-        line=dict(color='red', dash='dash')
-    ))
-    
-    # Přidání křivky reálné hodnoty
-    fig.add_trace(go.Scatter(
-        x=mortgage_data['dates'],
-        y=mortgage_data['real_values'],
-        name="Reálná hodnota (očištěná o inflaci)",
-        line=dict(color='green', dash='dot')
-    ))
-    
-    # Přidání křivky hodnoty nemovitosti
-    fig.add_trace(go.Scatter(
-        x=mortgage_data['dates'],
-        y=mortgage_data['property_values'],
-        name="Hodnota nemovitosti",
-        line=dict(color='purple', dash='dot')
-    ))
-    
-    # Úprava vzhledu
-    fig.update_layout(
-        title="Průběh splácení hypotéky",
-        xaxis_title="Datum",
-        yaxis_title="Částka (Kč)",
-        showlegend=True,
-        hovermode='x unified'
-    )
-    
-    # Formátování osy Y
-    fig.update_layout(
-        yaxis=dict(
-            tickformat=",.0f",
-            ticksuffix=" Kč"
-        )
-    )
-    
+    fig = create_mortgage_chart(loan_amount, interest_rate, years, extra_payment, inflation_rate,
+                                property_appreciation, insurance, ltv, start_date)
     st.plotly_chart(fig, use_container_width=True)
     
     # Tabulka s detaily
     if st.checkbox("Zobrazit detailní tabulku splátek"):
-        df = pd.DataFrame({
-            'Datum': mortgage_data['dates'],
-            'Měsíční splátka vč. pojištění': mortgage_data['monthly_payments'],
-            'Zbývající jistina': mortgage_data['remaining_balance'],
-            'Zaplacené úroky': mortgage_data['interest_paid'],
-            'Zaplacená jistina': mortgage_data['principal_paid'],
-            'Zaplacené pojištění': mortgage_data['insurance_paid'],
-            'Celkem zaplaceno': mortgage_data['total_paid'],
-            'Reálná hodnota': mortgage_data['real_values'],
-            'Hodnota nemovitosti': mortgage_data['property_values']
+        df = schedule.rename(columns={
+            'date': 'Datum',
+            'payment': 'Měsíční splátka vč. pojištění',
+            'remaining_balance': 'Zbývající jistina',
+            'interest_paid': 'Zaplacené úroky',
+            'principal_paid': 'Zaplacená jistina',
+            'insurance_paid': 'Zaplacené pojištění',
+            'total_paid': 'Celkem zaplaceno',
+            'real_value': 'Reálná hodnota',
+            'property_value': 'Hodnota nemovitosti'
         })
+        df['Datum'] = df['Datum'].dt.date
         
         # Formátování sloupců
-        for col in df.columns:
-            if col != 'Datum':
-                df[col] = df[col].apply(lambda x: f"{x:,.0f} Kč")
+        amounts = df.columns.drop('Datum')
+        df[amounts] = df[amounts].round().astype('int64').map('{:,} Kč'.format)
         
         st.dataframe(
             df,
             hide_index=True,
             use_container_width=True
         )
-    
+
+    # Porovnání scénářů (sazby × doby splácení × mimořádné splátky)
+    with st.expander("Porovnání scénářů"):
+        show_scenario_heatmap(loan_amount, interest_rate, years, extra_payment)
+
     # Vysvětlení výpočtu
     with st.expander("Jak se to počítá?"):
         st.write(f"""
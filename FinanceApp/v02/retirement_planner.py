@@ -1,8 +1,147 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import os
 import plotly.graph_objects as go
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
+from memo import memoize
 
+# Percentily pásem Monte Carlo simulace
+MC_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Počet cest simulovaných najednou (jeden blok = jedna úloha pro proces)
+MC_CHUNK_PATHS = 100_000
+
+# Podíl posledního příjmu, který je potřeba v důchodu
+REPLACEMENT_RATIO = 0.7
+
+# Počet dílků intervalu v jednom kroku hledání cíle (body se vyhodnotí jedním voláním jádra)
+SOLVER_POINTS = 64
+
+# Horní meze hledání cíle: měsíční úspory (Kč) a roční výnos (%)
+SOLVER_MAX_SAVINGS = 1_000_000
+SOLVER_MAX_RETURN = 30.0
+
+def _geometric_sum(growth, years):
+    """Součet growth^0 + ... + growth^(years-1) po prvcích (při growth == 1 je to years)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(growth == 1, years, (growth ** years - 1) / (growth - 1))
+
+def retirement_kernel(
+    current_age,
+    retirement_age,
+    life_expectancy,
+    current_income,
+    income_growth,
+    current_savings,
+    monthly_savings,
+    investment_return,
+    inflation_rate
+) -> dict:
+    """
+    Vektorové jádro plánu důchodu v uzavřeném tvaru.
+    
+    Všechny argumenty mohou být pole NumPy (broadcastují se), výsledkem je
+    slovník polí se stejnými klíči jako calculate_retirement_plan. Budoucí
+    hodnota měsíčních úspor je geometrická řada ročních vkladů na konci roku,
+    takže jedno vyhodnocení tisíců kombinací vstupů je jediná operace nad poli.
+    Navíc vrací sustainable_monthly_income: měsíční čerpání, při kterém úspory
+    (dál úročené) vydrží právě do věku dožití.
+    """
+    growth = 1 + np.asarray(investment_return, dtype=float) / 100
+    income_factor = 1 + np.asarray(income_growth, dtype=float) / 100
+    inflation_factor = 1 + np.asarray(inflation_rate, dtype=float) / 100
+    
+    # Počet let do důchodu a v důchodu
+    years_to_retirement = np.asarray(retirement_age) - np.asarray(current_age)
+    years_in_retirement = np.asarray(life_expectancy) - np.asarray(retirement_age)
+    
+    # Úspory v době odchodu do důchodu: současné úspory + roční vklady s výnosem
+    total_savings_at_retirement = (
+        current_savings * growth ** years_to_retirement
+        + np.asarray(monthly_savings, dtype=float) * 12 * _geometric_sum(growth, years_to_retirement)
+    )
+    
+    # Budoucí příjem a potřebný příjem v důchodu
+    future_income = current_income * income_factor ** years_to_retirement
+    required_retirement_income = future_income * REPLACEMENT_RATIO
+    
+    # Měsíční příjem z úspor v důchodu (jen výnos) a anuita, která úspory vyčerpá do dožití
+    monthly_return = growth ** (1/12) - 1
+    monthly_investment_income = total_savings_at_retirement * monthly_return
+    months_in_retirement = years_in_retirement * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sustainable_monthly_income = np.where(
+            months_in_retirement <= 0,
+            total_savings_at_retirement,
+            total_savings_at_retirement * np.where(
+                monthly_return == 0,
+                1 / months_in_retirement,
+                monthly_return / (1 - (1 + monthly_return) ** -months_in_retirement)
+            )
+        )
+    
+    # Reálné hodnoty (očištěné o inflaci)
+    deflator = inflation_factor ** years_to_retirement
+    
+    return {
+        'years_to_retirement': years_to_retirement,
+        'years_in_retirement': years_in_retirement,
+        'total_savings_at_retirement': total_savings_at_retirement,
+        'future_income': future_income,
+        'required_retirement_income': required_retirement_income,
+        'monthly_investment_income': monthly_investment_income,
+        'real_savings': total_savings_at_retirement / deflator,
+        'real_retirement_income': required_retirement_income / deflator,
+        'monthly_savings_needed': required_retirement_income - monthly_investment_income,
+        'sustainable_monthly_income': sustainable_monthly_income
+    }
+
+def retirement_timeline(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: int,
+    current_income: float,
+    income_growth: float,
+    current_savings: float,
+    monthly_savings: float,
+    investment_return: float,
+    inflation_rate: float
+) -> dict:
+    """
+    Roční vývoj úspor a příjmů jako pole NumPy (rok 0 až do věku dožití).
+    
+    Úspory se na začátku každého roku zvýší o roční vklad a úročí se, příjem
+    roste až do roku před důchodem; mocniny ročních faktorů se počítají pro
+    celou osu let najednou.
+    """
+    growth = 1 + investment_return / 100
+    years = np.arange(life_expectancy - current_age + 1)
+    inflation = (1 + inflation_rate / 100) ** years
+    ages = current_age + years
+    retired = ages >= retirement_age
+    
+    # Vklad na začátku roku s úročením: S0 g^n + 12 m (g + ... + g^n)
+    savings = current_savings * growth ** years + monthly_savings * 12 * growth * _geometric_sum(growth, years)
+    
+    # Příjem roste v každém roce před důchodem (včetně roku 0), pak zůstává na poslední hodnotě
+    income = current_income * (1 + income_growth / 100) ** np.minimum(years + 1, retirement_age - current_age)
+    pension = np.where(retired, income * REPLACEMENT_RATIO, 0.0)
+    working_income = np.where(retired, 0.0, income)
+    
+    return {
+        'age': ages,
+        'savings': savings,
+        'income': working_income,
+        'real_savings': savings / inflation,
+        'real_income': working_income / inflation,
+        'pension': pension,
+        'real_pension': pension / inflation,
+    }
+
+@memoize
 def calculate_retirement_plan(
     current_age: int,
     retirement_age: int,
@@ -31,55 +170,355 @@ def calculate_retirement_plan(
     Returns:
         dict: Slovník s výsledky výpočtu
     """
-    # Převod procent na desetinná čísla
-    income_growth = income_growth / 100
-    investment_return = investment_return / 100
-    inflation_rate = inflation_rate / 100
+    results = retirement_kernel(
+        current_age, retirement_age, life_expectancy, current_income, income_growth,
+        current_savings, monthly_savings, investment_return, inflation_rate
+    )
+    return {key: value.item() for key, value in results.items()}
+
+@memoize
+def calculate_graph_data(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: int,
+    current_income: float,
+    income_growth: float,
+    current_savings: float,
+    monthly_savings: float,
+    investment_return: float,
+    inflation_rate: float
+) -> pd.DataFrame:
+    """
+    Vypočítá data pro graf vývoje úspor a příjmů v čase.
+    """
+    timeline = retirement_timeline(
+        current_age, retirement_age, life_expectancy, current_income, income_growth,
+        current_savings, monthly_savings, investment_return, inflation_rate
+    )
+    return pd.DataFrame({
+        'Věk': timeline['age'],
+        'Úspory': timeline['savings'],
+        'Příjem': timeline['income'],
+        'Reálné úspory': timeline['real_savings'],
+        'Reálný příjem': timeline['real_income'],
+        'Důchod': timeline['pension'],
+        'Reálný důchod': timeline['real_pension']
+    })
+
+# Parametry citlivostní analýzy: popisek a rozsah změny (v jednotkách parametru,
+# u měsíčních úspor jako podíl základní hodnoty)
+SENSITIVITY_PARAMETERS = {
+    'retirement_age': ('Věk odchodu do důchodu', 5),
+    'investment_return': ('Výnos z investic (%)', 2.0),
+    'inflation_rate': ('Inflace (%)', 1.0),
+    'income_growth': ('Růst příjmu (%)', 1.0),
+    'monthly_savings': ('Měsíční úspory (Kč)', 0.5),
+    'life_expectancy': ('Věk dožití', 5),
+}
+
+# Sledované výsledky citlivostní analýzy (klíče retirement_kernel)
+SENSITIVITY_METRICS = {
+    'total_savings_at_retirement': 'Úspory v důchodu',
+    'monthly_savings_needed': 'Chybějící měsíční příjem v důchodu',
+    'sustainable_monthly_income': 'Udržitelný měsíční příjem z úspor',
+    'real_savings': 'Reálná hodnota úspor',
+}
+
+def sensitivity_range(plan: dict, parameter: str, steps: int = 21) -> np.ndarray:
+    """
+    Hodnoty parametru pro citlivostní analýzu kolem hodnoty v ``plan``.
     
-    # Výpočet počtu let do důchodu a v důchodu
-    years_to_retirement = retirement_age - current_age
-    years_in_retirement = life_expectancy - retirement_age
+    Věky jsou celá čísla a drží pořadí současný věk ≤ důchod ≤ dožití,
+    sazby a úspory nejsou záporné.
+    """
+    base = plan[parameter]
+    spread = SENSITIVITY_PARAMETERS[parameter][1]
+    if parameter == 'retirement_age':
+        return np.arange(max(plan['current_age'], base - spread), min(plan['life_expectancy'], base + spread) + 1)
+    if parameter == 'life_expectancy':
+        return np.arange(max(plan['retirement_age'], base - spread), base + spread + 1)
+    if parameter == 'monthly_savings':
+        return np.linspace(base * (1 - spread), base * (1 + spread), steps)
+    return np.linspace(max(0.0, base - spread), base + spread, steps)
+
+def sensitivity_analysis(plan: dict, steps: int = 21) -> pd.DataFrame:
+    """
+    Vliv změny každého parametru zvlášť na výsledky plánu.
     
-    # Výpočet budoucí hodnoty úspor
-    future_savings = current_savings * (1 + investment_return) ** years_to_retirement
+    Všechny varianty (parametr × hodnota, ostatní parametry beze změny) se
+    spojí do jednoho pole a vyhodnotí jediným voláním retirement_kernel.
+    Vrací DataFrame se sloupci parameter, value a sloupcem pro každý klíč
+    SENSITIVITY_METRICS.
+    """
+    ranges = {parameter: sensitivity_range(plan, parameter, steps) for parameter in SENSITIVITY_PARAMETERS}
+    inputs = {
+        name: np.concatenate([
+            values if name == parameter else np.full(values.size, base, dtype=float)
+            for parameter, values in ranges.items()
+        ])
+        for name, base in plan.items()
+    }
+    results = retirement_kernel(**inputs)
+    return pd.DataFrame({
+        'parameter': np.repeat(list(ranges), [values.size for values in ranges.values()]),
+        'value': np.concatenate(list(ranges.values())),
+        **{metric: results[metric] for metric in SENSITIVITY_METRICS},
+    })
+
+def tornado_data(plan: dict, metric: str, steps: int = 21) -> pd.DataFrame:
+    """
+    Změna výsledku ``metric`` na okrajích rozsahu každého parametru, seřazená podle rozpětí.
     
-    # Výpočet budoucí hodnoty měsíčních úspor
-    monthly_investment_return = (1 + investment_return) ** (1/12) - 1
-    future_monthly_savings = 0
-    for year in range(years_to_retirement):
-        future_monthly_savings += monthly_savings * 12 * (1 + investment_return) ** (years_to_retirement - year - 1)
+    Sloupce: parameter, label, low_value, high_value, low a high (rozdíl proti
+    základnímu plánu na dolním a horním okraji) a swing.
+    """
+    base = retirement_kernel(**plan)[metric].item()
+    analysis = sensitivity_analysis(plan, steps)
+    edges = analysis.groupby('parameter', sort=False).agg(
+        low_value=('value', 'first'), high_value=('value', 'last'),
+        low=(metric, 'first'), high=(metric, 'last')
+    ).reset_index()
+    edges[['low', 'high']] -= base
+    edges['label'] = edges['parameter'].map(lambda parameter: SENSITIVITY_PARAMETERS[parameter][0])
+    edges['swing'] = (edges['high'] - edges['low']).abs()
+    return edges.sort_values('swing').reset_index(drop=True)
+
+def sensitivity_grid(plan: dict, x_parameter: str, y_parameter: str, metric: str, steps: int = 21) -> pd.DataFrame:
+    """
+    Výsledek ``metric`` pro všechny kombinace dvou parametrů (jedno volání jádra).
     
-    # Celkové úspory v době odchodu do důchodu
-    total_savings_at_retirement = future_savings + future_monthly_savings
+    Vrací DataFrame s hodnotami ``y_parameter`` v indexu a ``x_parameter``
+    ve sloupcích. Kombinace porušující pořadí věků (důchod po dožití) jsou NaN.
+    """
+    x_values = sensitivity_range(plan, x_parameter, steps)
+    y_values = sensitivity_range(plan, y_parameter, steps)
+    y_grid, x_grid = np.meshgrid(y_values, x_values, indexing='ij')
+    inputs = {**plan, x_parameter: x_grid, y_parameter: y_grid}
+    values = retirement_kernel(**inputs)[metric]
+    values = np.where(np.asarray(inputs['retirement_age']) > np.asarray(inputs['life_expectancy']), np.nan, values)
+    return pd.DataFrame(np.broadcast_to(values, x_grid.shape), index=y_values, columns=x_values)
+
+# Hledané parametry plánu: popisek
+GOAL_VARIABLES = {
+    'monthly_savings': 'Minimální měsíční úspory',
+    'retirement_age': 'Nejdřívější věk odchodu do důchodu',
+    'investment_return': 'Potřebný roční výnos z investic',
+}
+
+def income_surplus(plan: dict, target_income: float = None, **changes) -> np.ndarray:
+    """
+    Přebytek udržitelného měsíčního příjmu z úspor nad cílovým příjmem (v dnešních cenách).
     
-    # Výpočet budoucího příjmu v době odchodu do důchodu
-    future_income = current_income * (1 + income_growth) ** years_to_retirement
+    ``changes`` nahradí parametry v ``plan`` (mohou to být pole, vyhodnotí se
+    jedním voláním retirement_kernel). Bez ``target_income`` je cílem potřebný
+    příjem v důchodu daného plánu (REPLACEMENT_RATIO posledního příjmu).
+    """
+    inputs = {**plan, **changes}
+    results = retirement_kernel(**inputs)
+    deflator = (1 + np.asarray(inputs['inflation_rate'], dtype=float) / 100) ** results['years_to_retirement']
+    target = results['real_retirement_income'] if target_income is None else target_income
+    return results['sustainable_monthly_income'] / deflator - target
+
+def _bracket_root(surplus, low: float, high: float, tol: float) -> Optional[float]:
+    """
+    Nejmenší hodnota z intervalu [low, high], pro kterou je rostoucí ``surplus`` nezáporný.
     
-    # Výpočet potřebného příjmu v důchodu (70% posledního příjmu)
-    required_retirement_income = future_income * 0.7
+    Interval se v každém kroku rozdělí na SOLVER_POINTS dílků, vyhodnotí se
+    najednou a pokračuje se dílkem, ve kterém surplus mění znaménko, dokud
+    není užší než ``tol``. Vrací None, pokud cíle nelze v intervalu dosáhnout.
+    """
+    while True:
+        points = np.linspace(low, high, SOLVER_POINTS + 1)
+        feasible = surplus(points) >= 0
+        if not feasible.any():
+            return None
+        first = np.argmax(feasible)
+        if first == 0:
+            return float(points[0])
+        low, high = points[first - 1], points[first]
+        if high - low <= tol:
+            return float(high)
+
+def solve_monthly_savings(plan: dict, target_income: float = None) -> Optional[float]:
+    """Minimální měsíční úspory (Kč), při kterých udržitelný příjem v důchodu dosáhne cíle."""
+    return _bracket_root(
+        lambda values: income_surplus(plan, target_income, monthly_savings=values), 0.0, SOLVER_MAX_SAVINGS, 0.01
+    )
+
+def solve_investment_return(plan: dict, target_income: float = None) -> Optional[float]:
+    """Minimální roční výnos z investic (%), při kterém udržitelný příjem v důchodu dosáhne cíle."""
+    return _bracket_root(
+        lambda values: income_surplus(plan, target_income, investment_return=values), 0.0, SOLVER_MAX_RETURN, 1e-6
+    )
+
+def solve_retirement_age(plan: dict, target_income: float = None) -> Optional[int]:
+    """
+    Nejdřívější celý věk odchodu do důchodu, ve kterém udržitelný příjem dosáhne cíle.
     
-    # Výpočet měsíčního příjmu z úspor v důchodu
-    monthly_investment_income = total_savings_at_retirement * monthly_investment_return
+    Věky od současného do roku před dožitím se vyhodnotí najednou.
+    """
+    ages = np.arange(plan['current_age'], plan['life_expectancy'])
+    feasible = income_surplus(plan, target_income, retirement_age=ages) >= 0
+    return int(ages[np.argmax(feasible)]) if feasible.any() else None
+
+def solve_retirement_goal(plan: dict, variable: str, target_income: float = None):
+    """
+    Hodnota parametru ``variable`` (klíč GOAL_VARIABLES), při které plán dosáhne cílového příjmu.
     
-    # Výpočet reálné hodnoty úspor v důchodu (očištěné o inflaci)
-    real_savings = total_savings_at_retirement / ((1 + inflation_rate) ** years_to_retirement)
+    Ostatní parametry zůstávají podle ``plan``. Cílový příjem je měsíční
+    čerpání v dnešních cenách, které úspory (dál úročené) vydrží do věku
+    dožití; bez ``target_income`` je to potřebný příjem v důchodu. Vrací
+    None, pokud cíle nelze dosáhnout.
+    """
+    solvers = {
+        'monthly_savings': solve_monthly_savings,
+        'retirement_age': solve_retirement_age,
+        'investment_return': solve_investment_return,
+    }
+    return solvers[variable](plan, target_income)
+
+def simulate_retirement(
+    current_age: int,
+    retirement_age: int,
+    life_expectancy: int,
+    current_income: float,
+    income_growth: float,
+    current_savings: float,
+    monthly_savings: float,
+    investment_return: float,
+    inflation_rate: float,
+    return_volatility: float = 15.0,
+    inflation_volatility: float = 1.0,
+    monthly_withdrawal: float = None,
+    paths: int = 100_000,
+    seed: int = None,
+    processes: int = None,
+    chunk_size: int = MC_CHUNK_PATHS
+) -> dict:
+    """
+    Monte Carlo simulace plánu důchodu s náhodnými výnosy a inflací.
+    
+    Roční výnos a inflace každé cesty jsou normálně rozdělené kolem
+    ``investment_return`` a ``inflation_rate`` se směrodatnými odchylkami
+    ``return_volatility`` a ``inflation_volatility`` (vše v %). Do důchodu se
+    úspory úročí a na konci roku přibude 12 měsíčních úspor (jako
+    v calculate_retirement_plan), v důchodu se čerpá ``monthly_withdrawal``
+    (výchozí je potřebný příjem v důchodu) zvyšované o inflaci dané cesty.
+    Cesta uspěje, pokud úspory nedojdou do věku dožití.
+    
+    Cesty se počítají vektorově po blocích ``chunk_size``, s ``processes`` > 1
+    se bloky rozdělí mezi procesy. Každý blok má vlastní generátor odvozený
+    ze ``seed``, výsledek tedy nezávisí na počtu procesů. Percentily více
+    bloků jsou váženým průměrem percentilů bloků.
+    
+    Returns:
+        dict: success_probability, ages, savings_bands a real_savings_bands
+        (DataFrame věk × percentil), savings_at_retirement,
+        real_savings_at_retirement a depletion_age (slovníky percentil →
+        hodnota; None u věku znamená, že úspory do dožití nedojdou)
+    """
+    years_to_retirement = retirement_age - current_age
+    total_years = life_expectancy - current_age
+    if monthly_withdrawal is None:
+        future_income = current_income * (1 + income_growth / 100) ** years_to_retirement
+        monthly_withdrawal = future_income * REPLACEMENT_RATIO
+    
+    params = (
+        total_years, years_to_retirement, current_savings, monthly_savings * 12, monthly_withdrawal * 12,
+        investment_return / 100, return_volatility / 100, inflation_rate / 100, inflation_volatility / 100
+    )
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [(params, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    if processes and processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_simulate_chunk, chunks))
+    else:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
     
-    # Výpočet reálného příjmu v důchodu (očištěného o inflaci)
-    real_retirement_income = required_retirement_income / ((1 + inflation_rate) ** years_to_retirement)
+    weights = np.array(sizes, dtype=float) / paths
+    bands = sum(weight * result['bands'] for weight, result in zip(weights, results))
+    real_bands = sum(weight * result['real_bands'] for weight, result in zip(weights, results))
+    depleted = sum(result['depleted'] for result in results)
     
+    # Věk vyčerpání úspor: rozdělení po letech, poslední přihrádka = úspory vydrží
+    cumulative = np.cumsum(depleted) / paths
+    depletion_age = {}
+    for percentile in MC_PERCENTILES:
+        year = int(np.searchsorted(cumulative, percentile / 100))
+        depletion_age[percentile] = current_age + year if year <= total_years else None
+    
+    ages = np.arange(current_age, life_expectancy + 1)
+    columns = list(MC_PERCENTILES)
     return {
-        'years_to_retirement': years_to_retirement,
-        'years_in_retirement': years_in_retirement,
-        'total_savings_at_retirement': total_savings_at_retirement,
-        'future_income': future_income,
-        'required_retirement_income': required_retirement_income,
-        'monthly_investment_income': monthly_investment_income,
-        'real_savings': real_savings,
-        'real_retirement_income': real_retirement_income,
-        'monthly_savings_needed': required_retirement_income - monthly_investment_income
+        'success_probability': float(depleted[-1] / paths),
+        'ages': ages,
+        'savings_bands': pd.DataFrame(bands, index=ages, columns=columns),
+        'real_savings_bands': pd.DataFrame(real_bands, index=ages, columns=columns),
+        'savings_at_retirement': dict(zip(columns, bands[years_to_retirement])),
+        'real_savings_at_retirement': dict(zip(columns, real_bands[years_to_retirement])),
+        'depletion_age': depletion_age,
     }
 
-def calculate_graph_data(
+def _simulate_chunk(chunk) -> dict:
+    """Simulace jednoho bloku cest (na úrovni modulu kvůli předání do procesu)."""
+    params, paths, seed = chunk
+    (total_years, years_to_retirement, savings, yearly_savings, yearly_withdrawal,
+     mean_return, return_volatility, mean_inflation, inflation_volatility) = params
+    rng = np.random.default_rng(seed)
+    
+    savings = np.full(paths, float(savings))
+    price_level = np.ones(paths)
+    withdrawal = np.full(paths, float(yearly_withdrawal))
+    # Rok vyčerpání úspor každé cesty (total_years + 1 = nevyčerpány)
+    depleted_in = np.full(paths, total_years + 1)
+    
+    bands = np.empty((total_years + 1, len(MC_PERCENTILES)))
+    real_bands = np.empty_like(bands)
+    bands[0] = real_bands[0] = savings[0]
+    for year in range(1, total_years + 1):
+        growth = rng.standard_normal(paths)
+        growth *= return_volatility
+        growth += 1 + mean_return
+        inflation = rng.standard_normal(paths)
+        inflation *= inflation_volatility
+        inflation += 1 + mean_inflation
+        price_level *= inflation
+        
+        savings *= growth
+        if year <= years_to_retirement:
+            savings += yearly_savings
+        else:
+            if year > years_to_retirement + 1:
+                withdrawal *= inflation
+            savings -= withdrawal
+            depleted_in[(savings < 0) & (depleted_in > total_years)] = year
+            np.maximum(savings, 0, out=savings)
+        
+        bands[year] = _percentiles(savings)
+        real_bands[year] = _percentiles(savings / price_level)
+    
+    return {
+        'bands': bands,
+        'real_bands': real_bands,
+        'depleted': np.bincount(depleted_in, minlength=total_years + 2),
+    }
+
+def _percentiles(values: np.ndarray) -> np.ndarray:
+    """
+    Percentily MC_PERCENTILES (lineární interpolace jako np.percentile).
+    
+    Celé seřazení pole je v NumPy rychlejší než výběr (partition), který
+    np.percentile používá pro každý percentil zvlášť.
+    """
+    ordered = np.sort(values)
+    position = np.asarray(MC_PERCENTILES) / 100 * (ordered.size - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, ordered.size - 1)
+    return ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower])
+
+@memoize
+def create_retirement_chart(
     current_age: int,
     retirement_age: int,
     life_expectancy: int,
@@ -89,58 +528,345 @@ def calculate_graph_data(
     monthly_savings: float,
     investment_return: float,
     inflation_rate: float
-) -> pd.DataFrame:
+) -> go.Figure:
     """
-    Vypočítá data pro graf vývoje úspor a příjmů v čase.
+    Vytvoří graf vývoje úspor a příjmů v čase (data z calculate_graph_data).
     """
-    # Převod procent na desetinná čísla
-    income_growth = income_growth / 100
-    investment_return = investment_return / 100
-    inflation_rate = inflation_rate / 100
+    graph_data = calculate_graph_data(
+        current_age, retirement_age, life_expectancy, current_income, income_growth,
+        current_savings, monthly_savings, investment_return, inflation_rate
+    )
+    fig = go.Figure()
     
-    # Výpočet počtu let
-    years_to_retirement = retirement_age - current_age
-    years_in_retirement = life_expectancy - retirement_age
-    total_years = years_to_retirement + years_in_retirement
+    # Přidání stop pro nominální hodnoty
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Úspory'],
+        name='Úspory',
+        line=dict(color='blue')
+    ))
     
-    # Vytvoření seznamu let
-    years = list(range(current_age, life_expectancy + 1))
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Příjem'],
+        name='Příjem',
+        line=dict(color='green')
+    ))
     
-    # Výpočet dat pro každý rok
-    data = []
-    current_savings_value = current_savings
-    current_income_value = current_income
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Důchod'],
+        name='Důchod',
+        line=dict(color='red')
+    ))
     
-    for year in range(total_years + 1):
-        age = current_age + year
-        is_retired = age >= retirement_age
-        
-        # Výpočet úspor
-        if year > 0:
-            # Přidání měsíčních úspor
-            current_savings_value += monthly_savings * 12
-            # Výnos z investic
-            current_savings_value *= (1 + investment_return)
-        
-        # Výpočet příjmu
-        if not is_retired:
-            current_income_value *= (1 + income_growth)
-        
-        # Výpočet reálných hodnot (očištěných o inflaci)
-        real_savings = current_savings_value / ((1 + inflation_rate) ** year)
-        real_income = current_income_value / ((1 + inflation_rate) ** year)
-        
-        data.append({
-            'Věk': age,
-            'Úspory': current_savings_value,
-            'Příjem': current_income_value if not is_retired else 0,
-            'Reálné úspory': real_savings,
-            'Reálný příjem': real_income if not is_retired else 0,
-            'Důchod': current_income_value * 0.7 if is_retired else 0,
-            'Reálný důchod': (current_income_value * 0.7) / ((1 + inflation_rate) ** year) if is_retired else 0
-        })
-    
-    return pd.DataFrame(data)
+    # Přidání stop pro reálné hodnoty
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Reálné úspory'],
+        name='Reálné úspory',
+        line=dict(color='lightblue', dash='dash')
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Reálný příjem'],
+        name='Reálný příjem',
+        line=dict(color='lightgreen', dash='dash')
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=graph_data['Věk'],
+        y=graph_data['Reálný důchod'],
+        name='Reálný důchod',
+        line=dict(color='pink', dash='dash')
+    ))
+    
+    # Úprava vzhledu grafu
+    fig.update_layout(
+        title='Vývoj úspor a příjmů v čase',
+        xaxis_title='Věk',
+        yaxis_title='Částka (Kč)',
+        hovermode='x unified',
+        showlegend=True,
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01
+        )
+    )
+    
+    return fig
+
+# Simulace pro stránku plánování (seed je vždy zadaný, výsledek je tedy určený vstupy)
+cached_simulation = memoize(simulate_retirement, name="retirement_planner.simulate_retirement")
+
+def create_fan_chart(bands: pd.DataFrame, retirement_age: int, title: str) -> go.Figure:
+    """
+    Vějířový graf percentilů úspor podle věku (pásma 5–95 % a 25–75 %, medián).
+    """
+    fig = go.Figure()
+    
+    # Pásma se kreslí jako plocha mezi dolní a horní hranicí
+    for low, high, color, name in ((5, 95, 'rgba(31, 119, 180, 0.15)', '5–95 % simulací'),
+                                   (25, 75, 'rgba(31, 119, 180, 0.35)', '25–75 % simulací')):
+        fig.add_trace(go.Scatter(
+            x=bands.index,
+            y=bands[low],
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=bands.index,
+            y=bands[high],
+            fill='tonexty',
+            fillcolor=color,
+            line=dict(width=0),
+            name=name,
+            hoverinfo='skip'
+        ))
+    
+    fig.add_trace(go.Scatter(
+        x=bands.index,
+        y=bands[50],
+        name='Medián',
+        line=dict(color='blue')
+    ))
+    
+    fig.add_vline(x=retirement_age, line_dash='dash', line_color='gray', annotation_text='Důchod')
+    fig.update_layout(
+        title=title,
+        xaxis_title='Věk',
+        yaxis_title='Částka (Kč)',
+        hovermode='x unified',
+        yaxis=dict(tickformat=",.0f", ticksuffix=" Kč")
+    )
+    
+    return fig
+
+def show_simulation_results(simulation: dict, retirement_age: int, life_expectancy: int):
+    """Zobrazí výsledky Monte Carlo simulace (pravděpodobnost úspěchu, percentily a vějířové grafy)."""
+    st.subheader("Výsledky simulace Monte Carlo")
+    
+    savings = simulation['savings_at_retirement']
+    depletion = simulation['depletion_age']
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            "Pravděpodobnost úspěchu",
+            f"{simulation['success_probability']:.1%}",
+            help=f"Podíl simulací, ve kterých úspory vydrží až do věku {life_expectancy} let."
+        )
+    
+    with col2:
+        st.metric(
+            "Úspory v důchodu (medián)",
+            f"{savings[50]:,.0f} Kč",
+            help=f"Polovina simulací skončí při odchodu do důchodu s vyššími úsporami. Rozpětí 5–95 %: {savings[5]:,.0f} – {savings[95]:,.0f} Kč."
+        )
+    
+    with col3:
+        st.metric(
+            "Vyčerpání úspor (5 % nejhorších)",
+            f"{depletion[5]} let" if depletion[5] is not None else "nenastane",
+            help="Věk, do kterého dojdou úspory v 5 % nejhorších simulací."
+        )
+    
+    real_savings = simulation['real_savings_at_retirement']
+    col4, col5, col6 = st.columns(3)
+    
+    with col4:
+        st.metric(
+            "Reálné úspory v důchodu (medián)",
+            f"{real_savings[50]:,.0f} Kč",
+            help="Medián úspor při odchodu do důchodu očištěný o inflaci dané simulace."
+        )
+    
+    with col5:
+        st.metric(
+            "Úspory v důchodu (5 % nejhorších)",
+            f"{savings[5]:,.0f} Kč",
+            help="Úspory při odchodu do důchodu, které nedosáhne 5 % simulací."
+        )
+    
+    with col6:
+        st.metric(
+            "Vyčerpání úspor (medián)",
+            f"{depletion[50]} let" if depletion[50] is not None else "nenastane",
+            help="Věk, do kterého dojdou úspory v polovině simulací."
+        )
+    
+    nominal_tab, real_tab = st.tabs(["Nominální hodnoty", "Reálné hodnoty"])
+    with nominal_tab:
+        st.plotly_chart(
+            create_fan_chart(simulation['savings_bands'], retirement_age, 'Rozptyl úspor podle věku'),
+            use_container_width=True
+        )
+    with real_tab:
+        st.plotly_chart(
+            create_fan_chart(simulation['real_savings_bands'], retirement_age, 'Rozptyl reálných úspor podle věku'),
+            use_container_width=True
+        )
+
+@memoize
+def create_tornado_chart(plan: dict, metric: str) -> go.Figure:
+    """
+    Tornádový graf: o kolik se výsledek ``metric`` změní na okrajích rozsahu každého parametru.
+    """
+    data = tornado_data(plan, metric)
+    labels = [
+        f"{row.label}<br>{row.low_value:,.4g} – {row.high_value:,.4g}" for row in data.itertuples()
+    ]
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=data['low'],
+        orientation='h',
+        name='Dolní okraj rozsahu',
+        marker_color='indianred'
+    ))
+    
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=data['high'],
+        orientation='h',
+        name='Horní okraj rozsahu',
+        marker_color='seagreen'
+    ))
+    
+    fig.update_layout(
+        title=f"Citlivost: {SENSITIVITY_METRICS[metric]}",
+        xaxis_title='Změna proti základnímu plánu (Kč)',
+        barmode='overlay',
+        xaxis=dict(tickformat=",.0f"),
+        legend=dict(orientation='h', yanchor='bottom', y=-0.3)
+    )
+    
+    return fig
+
+@memoize
+def create_sensitivity_heatmap(plan: dict, x_parameter: str, y_parameter: str, metric: str) -> go.Figure:
+    """
+    Heatmapa výsledku ``metric`` pro kombinace dvou parametrů.
+    """
+    grid = sensitivity_grid(plan, x_parameter, y_parameter, metric)
+    x_label = SENSITIVITY_PARAMETERS[x_parameter][0]
+    y_label = SENSITIVITY_PARAMETERS[y_parameter][0]
+    fig = go.Figure(go.Heatmap(
+        x=grid.columns,
+        y=grid.index,
+        z=grid.values,
+        colorscale='RdYlGn_r' if metric == 'monthly_savings_needed' else 'RdYlGn',
+        colorbar=dict(title='Kč'),
+        hovertemplate=f"{x_label}: %{{x:,.4g}}<br>{y_label}: %{{y:,.4g}}<br>{SENSITIVITY_METRICS[metric]}: %{{z:,.0f}} Kč<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=f"{SENSITIVITY_METRICS[metric]} podle parametrů",
+        xaxis_title=x_label,
+        yaxis_title=y_label
+    )
+    
+    return fig
+
+def show_sensitivity_analysis(plan: dict):
+    """Zobrazí citlivostní analýzu plánu (tornádový graf a heatmapu pro dvojici parametrů)."""
+    st.subheader("Citlivostní analýza")
+    st.caption(
+        "Každý parametr se mění v uvedeném rozsahu, ostatní zůstávají podle zadání. "
+        "Všechny varianty se spočítají najednou."
+    )
+    
+    metric = st.selectbox(
+        "Sledovaný výsledek",
+        list(SENSITIVITY_METRICS),
+        format_func=SENSITIVITY_METRICS.get,
+        help="Chybějící měsíční příjem je rozdíl mezi potřebným příjmem v důchodu a výnosem z úspor. Udržitelný příjem je čerpání, při kterém úspory vydrží právě do věku dožití."
+    )
+    st.plotly_chart(create_tornado_chart(plan, metric), use_container_width=True)
+    
+    parameters = list(SENSITIVITY_PARAMETERS)
+    col1, col2 = st.columns(2)
+    with col1:
+        x_parameter = st.selectbox(
+            "Parametr na ose X",
+            parameters,
+            index=parameters.index('investment_return'),
+            format_func=lambda parameter: SENSITIVITY_PARAMETERS[parameter][0]
+        )
+    with col2:
+        y_parameter = st.selectbox(
+            "Parametr na ose Y",
+            [parameter for parameter in parameters if parameter != x_parameter],
+            format_func=lambda parameter: SENSITIVITY_PARAMETERS[parameter][0]
+        )
+    st.plotly_chart(create_sensitivity_heatmap(plan, x_parameter, y_parameter, metric), use_container_width=True)
+
+def show_goal_seeking(plan: dict):
+    """Zobrazí hledání parametru, se kterým plán dosáhne cílového příjmu v důchodu."""
+    st.subheader("Hledání cíle")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        variable = st.selectbox(
+            "Hledaná hodnota",
+            list(GOAL_VARIABLES),
+            format_func=GOAL_VARIABLES.get,
+            help="Ostatní parametry zůstávají podle zadání."
+        )
+    with col2:
+        target_income = st.number_input(
+            "Cílový měsíční příjem v důchodu (Kč, v dnešních cenách)",
+            min_value=0,
+            max_value=1000000,
+            value=int(round(retirement_kernel(**plan)['real_retirement_income'].item(), -3)),
+            step=1000,
+            format="%d",
+            help="Měsíční čerpání z úspor, které vydrží do věku dožití. Výchozí hodnota je 70 % budoucího příjmu přepočtených na dnešní ceny."
+        )
+    
+    value = solve_retirement_goal(plan, variable, target_income)
+    if value is None:
+        st.warning("Cílového příjmu nelze s ostatními parametry dosáhnout. Zkuste snížit cíl nebo upravit další parametry.")
+        return
+    
+    solved = {**plan, variable: value}
+    results = calculate_retirement_plan(**solved)
+    real_income = results['sustainable_monthly_income'] / (1 + plan['inflation_rate'] / 100) ** results['years_to_retirement']
+    formats = {
+        'monthly_savings': lambda amount: f"{amount:,.0f} Kč",
+        'retirement_age': lambda age: f"{age} let",
+        'investment_return': lambda rate: f"{rate:.2f} %",
+    }
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(
+            GOAL_VARIABLES[variable],
+            formats[variable](value),
+            delta=formats[variable](value - plan[variable]),
+            delta_color="inverse",
+            help="Rozdíl proti zadané hodnotě."
+        )
+    with col2:
+        st.metric(
+            "Úspory v důchodu",
+            f"{results['total_savings_at_retirement']:,.0f} Kč",
+            help="Úspory v době odchodu do důchodu při nalezené hodnotě."
+        )
+    with col3:
+        st.metric(
+            "Udržitelný měsíční příjem",
+            f"{real_income:,.0f} Kč",
+            help="Měsíční čerpání v dnešních cenách, při kterém úspory vydrží právě do věku dožití."
+        )
+    
+    st.plotly_chart(create_retirement_chart(**solved), use_container_width=True)
 
 def show_retirement_planning():
     """Zobrazí formulář pro plánování důchodu"""
@@ -254,9 +980,93 @@ def show_retirement_planning():
             help="Očekávaná průměrná roční míra inflace v procentech. Používá se pro výpočet reálné hodnoty budoucích úspor a příjmů."
         )
     
+    # Režim výpočtu
+    mode = st.radio(
+        "Režim výpočtu",
+        ["Deterministický", "Monte Carlo", "Citlivost", "Cíl"],
+        horizontal=True,
+        help="Deterministický výpočet předpokládá pevný výnos a inflaci. Monte Carlo simuluje tisíce náhodných průběhů výnosů a inflace a ukáže pravděpodobnost, že úspory vydrží. Citlivost ukáže, které parametry výsledek ovlivňují nejvíc. Cíl najde měsíční úspory, věk odchodu do důchodu nebo výnos potřebný pro zvolený příjem v důchodu."
+    )
+    
+    if mode == "Monte Carlo":
+        col5, col6 = st.columns(2)
+        
+        with col5:
+            return_volatility = st.number_input(
+                "Kolísání výnosu (směrodatná odchylka, %)",
+                min_value=0.0,
+                max_value=50.0,
+                value=15.0,
+                step=0.5,
+                format="%.1f",
+                help="Jak moc se roční výnos investic liší od očekávaného. Akciové portfolio kolísá zhruba o 15-20 %, dluhopisové o 5 %."
+            )
+            
+            inflation_volatility = st.number_input(
+                "Kolísání inflace (směrodatná odchylka, %)",
+                min_value=0.0,
+                max_value=10.0,
+                value=1.0,
+                step=0.1,
+                format="%.1f",
+                help="Jak moc se roční inflace liší od očekávané."
+            )
+        
+        with col6:
+            required_income = current_income * (1 + income_growth / 100) ** (retirement_age - current_age) * REPLACEMENT_RATIO
+            monthly_withdrawal = st.number_input(
+                "Měsíční čerpání z úspor v důchodu (Kč)",
+                min_value=0,
+                max_value=10000000,
+                value=int(round(required_income, -3)),
+                step=1000,
+                format="%d",
+                help="Částka čerpaná z úspor v prvním roce důchodu, dále se zvyšuje o inflaci. Výchozí hodnota je 70 % budoucího příjmu."
+            )
+            
+            paths = st.select_slider(
+                "Počet simulací",
+                options=[10_000, 100_000, 1_000_000],
+                value=100_000,
+                format_func=lambda value: f"{value:,}",
+                help="Více simulací dává přesnější percentily, ale počítá se déle."
+            )
+            
+            seed = st.number_input(
+                "Seed náhodného generátoru",
+                min_value=0,
+                value=42,
+                step=1,
+                help="Stejný seed dává stejné výsledky simulace."
+            )
+            
+            parallel = paths > MC_CHUNK_PATHS and st.checkbox(
+                "Rozdělit výpočet mezi procesy",
+                help="Bloky simulací se počítají paralelně na všech jádrech procesoru."
+            )
+    
+    plan = dict(
+        current_age=current_age,
+        retirement_age=retirement_age,
+        life_expectancy=life_expectancy,
+        current_income=current_income,
+        income_growth=income_growth,
+        current_savings=current_savings,
+        monthly_savings=monthly_savings,
+        investment_return=investment_return,
+        inflation_rate=inflation_rate
+    )
+    if mode == "Citlivost":
+        show_sensitivity_analysis(plan)
+        return
+    if mode == "Cíl":
+        show_goal_seeking(plan)
+        return
+    
     # Výpočet plánu důchodu
-    if st.button("Vypočítat plán důchodu"):
-        results = calculate_retirement_plan(
+    calculate = st.button("Vypočítat plán důchodu")
+    if calculate and mode == "Monte Carlo":
+        simulation = cached_simulation(
             current_age=current_age,
             retirement_age=retirement_age,
             life_expectancy=life_expectancy,
@@ -265,11 +1075,17 @@ def show_retirement_planning():
             current_savings=current_savings,
             monthly_savings=monthly_savings,
             investment_return=investment_return,
-            inflation_rate=inflation_rate
+            inflation_rate=inflation_rate,
+            return_volatility=return_volatility,
+            inflation_volatility=inflation_volatility,
+            monthly_withdrawal=monthly_withdrawal,
+            paths=paths,
+            seed=seed,
+            processes=os.cpu_count() if parallel else None
         )
-        
-        # Výpočet dat pro graf
-        graph_data = calculate_graph_data(
+        show_simulation_results(simulation, retirement_age, life_expectancy)
+    elif calculate:
+        results = calculate_retirement_plan(
             current_age=current_age,
             retirement_age=retirement_age,
             life_expectancy=life_expectancy,
@@ -361,66 +1177,16 @@ def show_retirement_planning():
         # Graf vývoje úspor a příjmů
         st.subheader("Vývoj úspor a příjmů v čase")
         
-        # Vytvoření grafu pomocí Plotly
-        fig = go.Figure()
-        
-        # Přidání stop pro nominální hodnoty
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Úspory'],
-            name='Úspory',
-            line=dict(color='blue')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Příjem'],
-            name='Příjem',
-            line=dict(color='green')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Důchod'],
-            name='Důchod',
-            line=dict(color='red')
-        ))
-        
-        # Přidání stop pro reálné hodnoty
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Reálné úspory'],
-            name='Reálné úspory',
-            line=dict(color='lightblue', dash='dash')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Reálný příjem'],
-            name='Reálný příjem',
-            line=dict(color='lightgreen', dash='dash')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=graph_data['Věk'],
-            y=graph_data['Reálný důchod'],
-            name='Reálný důchod',
-            line=dict(color='pink', dash='dash')
-        ))
-        
-        # Úprava vzhledu grafu
-        fig.update_layout(
-            title='Vývoj úspor a příjmů v čase',
-            xaxis_title='Věk',
-            yaxis_title='Částka (Kč)',
-            hovermode='x unified',
-            showlegend=True,
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=0.01
-            )
+        fig = create_retirement_chart(
+            current_age=current_age,
+            retirement_age=retirement_age,
+            life_expectancy=life_expectancy,
+            current_income=current_income,
+            income_growth=income_growth,
+            current_savings=current_savings,
+            monthly_savings=monthly_savings,
+            investment_return=investment_return,
+            inflation_rate=inflation_rate
         )
         
         # Zobrazení grafu
@@ -2,36 +2,109 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
+from memo import memoize
 
-def calculate_compound_interest(initial_investment, monthly_contribution, years, annual_rate):
-    """Vypočítá růst investice se složeným úročením."""
+def contribution_schedule(monthly_contribution, years, annual_increase=0.0, pause=None, lump_sums=None):
+    """
+    Měsíční příspěvky na ``years`` let (pole s hodnotou pro každý měsíc).
+    
+    Příspěvek se každý rok zvýší o ``annual_increase`` %, v letech
+    ``pause`` = (od, do) se nespoří (včetně roku ``do``) a ``lump_sums``
+    {rok: částka} přidá jednorázový vklad na začátku daného roku.
+    """
+    months = int(years * 12)
+    schedule = monthly_contribution * (1 + annual_increase / 100) ** (np.arange(months) // 12)
+    if pause is not None:
+        schedule[int(pause[0] * 12):int((pause[1] + 1) * 12)] = 0.0
+    for year, amount in (lump_sums or {}).items():
+        if 0 <= year * 12 < months:
+            schedule[int(year * 12)] += amount
+    return schedule
+
+@memoize
+def calculate_compound_interest(initial_investment, monthly_contribution, years, annual_rate, schedule=None):
+    """
+    Vypočítá růst investice se složeným úročením po měsících.
+    
+    Na začátku každého měsíce se přičte příspěvek a celá částka se úročí
+    měsíční sazbou. Při stálém příspěvku se zůstatek počítá v uzavřeném tvaru,
+    s rozpisem ``schedule`` (příspěvek pro každý měsíc, viz
+    contribution_schedule) přes kumulativní součin úrokových faktorů.
+    
+    Returns:
+        DataFrame se sloupci years (osa X grafu), balance, contributions
+        a interest pro měsíc 0 až years*12
+    """
     rate = annual_rate / 100 / 12  # Měsíční úroková míra
-    months = years * 12
-    
-    # Inicializace polí pro graf
-    timeline = []
-    balance = []
-    contributions = []
-    interest = []
-    
-    current_balance = initial_investment
-    total_contributions = initial_investment
-    
-    for month in range(months + 1):
-        timeline.append(month / 12)  # Převod na roky pro osu X
-        balance.append(current_balance)
-        contributions.append(total_contributions)
-        interest.append(current_balance - total_contributions)
-        
-        if month < months:  # Nepřičítáme po posledním měsíci
-            # Přičtení měsíčního příspěvku
-            current_balance += monthly_contribution
-            total_contributions += monthly_contribution
-            
-            # Přičtení úroku
-            current_balance *= (1 + rate)
-    
-    return timeline, balance, contributions, interest
+    months = int(years * 12)
+    month = np.arange(months + 1)
+    
+    if schedule is None:
+        schedule = np.full(months, float(monthly_contribution))
+        if rate == 0:
+            balance = initial_investment + monthly_contribution * month
+        else:
+            growth = (1 + rate) ** month
+            balance = initial_investment * growth + monthly_contribution * (1 + rate) * (growth - 1) / rate
+    else:
+        schedule = np.asarray(schedule, dtype=float)
+        if schedule.size != months:
+            raise ValueError(f"Rozpis příspěvků musí mít {months} měsíčních hodnot, má {schedule.size}")
+        # B_m = G_m (B_0 + sum_{k<m} c_k / G_k), kde G_m je součin úrokových faktorů za m měsíců
+        growth = np.cumprod(np.full(months + 1, 1 + rate))
+        growth /= growth[0]
+        discounted = np.concatenate(([initial_investment], schedule / growth[:-1]))
+        balance = growth * np.cumsum(discounted)
+    
+    contributions = initial_investment + np.concatenate(([0.0], np.cumsum(schedule)))
+    return pd.DataFrame({
+        'years': month / 12,
+        'balance': balance,
+        'contributions': contributions,
+        'interest': balance - contributions,
+    })
+
+@memoize
+def create_growth_chart(initial_investment, monthly_contribution, years, annual_rate, schedule=None):
+    """Graf růstu investice v čase (vložené prostředky a celková hodnota)."""
+    data = calculate_compound_interest(initial_investment, monthly_contribution, years, annual_rate, schedule)
+    fig = go.Figure()
+    
+    # Přidání ploch pro příspěvky a úroky
+    fig.add_trace(go.Scatter(
+        x=data['years'],
+        y=data['contributions'],
+        name="Vložené prostředky",
+        fill='tozeroy',
+        mode='none'
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=data['years'],
+        y=data['balance'],
+        name="Celková hodnota",
+        fill='tonexty',
+        mode='none'
+    ))
+    
+    # Úprava vzhledu
+    fig.update_layout(
+        title="Růst investice v čase",
+        xaxis_title="Roky",
+        yaxis_title="Hodnota (Kč)",
+        showlegend=True,
+        hovermode='x unified'
+    )
+    
+    # Formátování osy Y
+    fig.update_layout(
+        yaxis=dict(
+            tickformat=",.0f",
+            ticksuffix=" Kč"
+        )
+    )
+    
+    return fig
 
 def show_retirement_planning():
     st.title("Plánování důchodu")
@@ -73,15 +146,51 @@ def show_retirement_planning():
             step=0.1
         )
     
+    # Průběh příspěvků
+    with st.expander("Průběh příspěvků"):
+        col5, col6 = st.columns(2)
+        with col5:
+            annual_increase = st.number_input(
+                "Roční navýšení příspěvku (%)",
+                min_value=0.0,
+                max_value=20.0,
+                value=0.0,
+                step=0.5,
+                help="O kolik procent se měsíční příspěvek každý rok zvýší (např. s růstem platu)."
+            )
+            lump_sum = st.number_input("Jednorázový vklad (Kč)", min_value=0, value=0, step=10000)
+            lump_sum_year = st.number_input(
+                "Rok jednorázového vkladu",
+                min_value=0,
+                max_value=int(years) - 1,
+                value=0,
+                help="Vklad se přičte na začátku zvoleného roku (0 = hned)."
+            )
+        with col6:
+            paused = st.checkbox("Přerušit spoření", help="Ve zvolených letech se nic nevkládá (např. rodičovská dovolená).")
+            pause = st.slider(
+                "Roky bez příspěvků",
+                min_value=0,
+                max_value=max(int(years) - 1, 1),
+                value=(0, 0),
+                disabled=not paused
+            )
+    
+    schedule = None
+    if annual_increase or lump_sum or paused:
+        schedule = contribution_schedule(
+            monthly_savings, years, annual_increase,
+            pause=pause if paused else None,
+            lump_sums={lump_sum_year: lump_sum} if lump_sum else None
+        )
+    
     # Výpočet hodnot
-    timeline, balance, contributions, interest = calculate_compound_interest(
-        current_savings, monthly_savings, years, annual_rate
-    )
+    results = calculate_compound_interest(current_savings, monthly_savings, years, annual_rate, schedule).iloc[-1]
     
     # Zobrazení výsledků
-    final_balance = balance[-1]
-    total_contributions = contributions[-1]
-    total_interest = interest[-1]
+    final_balance = results['balance']
+    total_contributions = results['contributions']
+    total_interest = results['interest']
     
     st.header("Výsledky investování")
     
@@ -103,42 +212,7 @@ def show_retirement_planning():
         )
     
     # Graf
-    fig = go.Figure()
-    
-    # Přidání ploch pro příspěvky a úroky
-    fig.add_trace(go.Scatter(
-        x=timeline,
-        y=contributions,
-        name="Vložené prostředky",
-        fill='tozeroy',
-        mode='none'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=timeline,
-        y=balance,
-        name="Celková hodnota",
-        fill='tonexty',
-        mode='none'
-    ))
-    
-    # Úprava vzhledu
-    fig.update_layout(
-        title="Růst investice v čase",
-        xaxis_title="Roky",
-        yaxis_title="Hodnota (Kč)",
-        showlegend=True,
-        hovermode='x unified'
-    )
-    
-    # Formátování osy Y
-    fig.update_layout(
-        yaxis=dict(
-            tickformat=",.0f",
-            ticksuffix=" Kč"
-        )
-    )
-    
+    fig = create_growth_chart(current_savings, monthly_savings, years, annual_rate, schedule)
     st.plotly_chart(fig, use_container_width=True)
     
     # Vysvětlení výpočtu
@@ -147,7 +221,7 @@ def show_retirement_planning():
         Výpočet používá vzorec pro složené úročení s pravidelnými měsíčními příspěvky:
         
         1. Počáteční investice se úročí měsíčně (roční úrok / 12)
-        2. Každý měsíc se přičte váš příspěvek
+        2. Každý měsíc se přičte váš příspěvek (podle průběhu příspěvků)
         3. Celá částka se dále úročí
         
         **Poznámky:**
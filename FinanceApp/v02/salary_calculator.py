@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from memo import memoize
 
+@memoize
 def calculate_salary(gross_salary, children_count=0, disability_level=0, ztp=False, working_pensioner=False, 
                     children_ztp=False, first_child=False, second_child=False, third_child=False, 
                     fourth_child=False, fifth_child=False, sixth_child=False, seventh_child=False, 
@@ -0,0 +1,1215 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from file_utils import LOCK_TIMEOUT, append_lines, atomic_write_json, dumps, file_lock, load_json, loads
+
+# Typy záznamů, které se sčítají v přehledu kategorií
+ENTRY_TYPES = ("Výdaj", "Příjem")
+
+# Klíče dat uživatele, které nejsou kategoriemi ledgeru
+RESERVED_BUCKETS = ("expense", "investment")
+
+
+def _default_data():
+    """Výchozí struktura dat nového uživatele."""
+    return {'expense': [], 'investment': []}
+
+
+def _in_period(timestamp, start=None, end=None):
+    """Ověří, zda ISO časová značka spadá do intervalu <start, end)."""
+    if start is not None and (not timestamp or timestamp < start):
+        return False
+    if end is not None and (not timestamp or timestamp >= end):
+        return False
+    return True
+
+
+def _amount_key(amount):
+    """Částka pro klíče duplicit: zaokrouhlená na haléře (nečíselná beze změny)."""
+    try:
+        return round(float(amount), 2)
+    except (TypeError, ValueError):
+        return amount
+
+
+def _dedup_key(category, entry):
+    """Klíč pro detekci duplicit: kategorie, typ, částka zaokrouhlená na haléře a čas."""
+    return (category, entry.get('type'), _amount_key(entry.get('amount', 0)), entry.get('timestamp'))
+
+
+def _freeze(value):
+    """Hashovatelná podoba hodnoty z JSON (slovníky a seznamy jako n-tice)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def bucket_key(item):
+    """
+    Klíč pro detekci duplicit v seznamech výdajů a investic.
+
+    Záznamy seznamů nemají čas ledgeru, porovnávají se proto všechna pole;
+    částka se normalizuje stejně jako v klíči duplicit ledgeru.
+    """
+    if not isinstance(item, dict):
+        return _freeze(item)
+    return tuple(sorted(
+        (field, _amount_key(value) if field == 'amount' else _freeze(value)) for field, value in item.items()
+    ))
+
+
+def _iter_entries(data):
+    """Projde všechny záznamy dat jako dvojice (kategorie, záznam)."""
+    for category, entries in data.items():
+        if isinstance(entries, dict):
+            entries = [entries]
+        for entry in entries:
+            if isinstance(entry, dict):
+                yield category, entry
+
+
+def new_entry_id():
+    """Vytvoří stabilní identifikátor záznamu."""
+    return uuid.uuid4().hex
+
+
+def _with_id(category, entry):
+    """Vrátí záznam ledgeru s identifikátorem (kopii, pokud se id přiděluje)."""
+    if entry.get('id') or category in RESERVED_BUCKETS:
+        return entry
+    return {**entry, 'id': new_entry_id()}
+
+
+def _assign_ids(data):
+    """Doplní chybějící identifikátory záznamům ledgeru přímo v datech; vrací počet doplněných."""
+    count = 0
+    for category, entry in _iter_entries(data):
+        if not entry.get('id') and category not in RESERVED_BUCKETS:
+            entry['id'] = new_entry_id()
+            count += 1
+    return count
+
+
+def _apply_journal(data, records):
+    """
+    Promítne záznamy žurnálu do dat.
+
+    Přidání se připojí na konec kategorie, úpravy a smazání (podle id) se
+    uplatní jedním průchodem daty; kategorie vyprázdněné smazáním se odstraní.
+    """
+    changes = {}
+    for record in records:
+        op = record.get('op')
+        if op == 'add':
+            data.setdefault(record['category'], []).append(record['entry'])
+        elif op in ('update', 'delete'):
+            changes[record['entry']['id']] = record
+    if not changes:
+        return data
+
+    moved = []
+    emptied = []
+    for category, entries in data.items():
+        if not isinstance(entries, list):
+            continue
+        kept = []
+        changed = False
+        for entry in entries:
+            record = changes.get(entry.get('id')) if isinstance(entry, dict) else None
+            if record is None:
+                kept.append(entry)
+                continue
+            changed = True
+            if record['op'] == 'update':
+                if record['category'] == category:
+                    kept.append(record['entry'])
+                else:
+                    moved.append(record)
+        if changed:
+            entries[:] = kept
+            if not kept and category not in RESERVED_BUCKETS:
+                emptied.append(category)
+    for record in moved:
+        data.setdefault(record['category'], []).append(record['entry'])
+    for category in emptied:
+        if not data.get(category):
+            data.pop(category, None)
+    return data
+
+
+def _record_changes(record):
+    """Rozloží záznam žurnálu na odebrané a přidané dvojice (kategorie, záznam)."""
+    op = record.get('op')
+    if op == 'add':
+        return [], [(record['category'], record['entry'])]
+    if op == 'delete':
+        return [(record['category'], record['entry'])], []
+    if op == 'update':
+        return [(record['old_category'], record['old'])], [(record['category'], record['entry'])]
+    return [], []
+
+
+def _rollup_key(category, entry):
+    """Klíč materializovaného součtu (kategorie, typ, měsíc 'RRRR-MM'); None pro záznamy mimo ledger."""
+    type_ = entry.get('type') or 'Výdaj'
+    if category in RESERVED_BUCKETS or type_ not in ENTRY_TYPES:
+        return None
+    return (category, type_, (entry.get('timestamp') or '')[:7])
+
+
+def _rollup_apply(rollups, category, entry, sign=1):
+    """Přičte (sign=1) nebo odečte (sign=-1) záznam z materializovaných součtů."""
+    key = _rollup_key(category, entry)
+    if key is None:
+        return
+    cell = rollups.setdefault(key, [0.0, 0])
+    cell[0] += sign * float(entry.get('amount', 0))
+    cell[1] += sign
+    if cell[1] <= 0:
+        del rollups[key]
+
+
+def _rollup_record(rollups, record):
+    """Posune materializované součty o jeden záznam žurnálu."""
+    removed, added = _record_changes(record)
+    for category, entry in removed:
+        _rollup_apply(rollups, category, entry, -1)
+    for category, entry in added:
+        _rollup_apply(rollups, category, entry)
+
+
+def _build_rollups(data):
+    """Sestaví materializované součty {(kategorie, typ, měsíc): [částka, počet]} z dat."""
+    rollups = {}
+    for category, entry in _iter_entries(data):
+        _rollup_apply(rollups, category, entry)
+    return rollups
+
+
+def _rollup_rows(rollups):
+    """Převede součty na seznam řádků (kategorie, typ, měsíc, částka, počet)."""
+    return [(*key, amount, count) for key, (amount, count) in sorted(rollups.items())]
+
+
+def _copy_data(data):
+    """Kopie dat do hloubky záznamů, aby volající nemohl změnit obsah cache."""
+    if isinstance(data, dict):
+        return {key: _copy_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_copy_data(value) for value in data]
+    return data
+
+
+def _file_signature(path):
+    """Podpis souboru pro invalidaci cache (mtime, velikost, inode), None pokud neexistuje."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class JsonFileCache:
+    """LRU cache načtených JSON dat sdílená všemi instancemi DataManager v procesu."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, signature):
+        """Vrátí (data, extra) pro klíč, pokud podpis souborů odpovídá, jinak None."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy_data(cached[1]), cached[2]
+
+    def put(self, key, signature, data, extra=None):
+        """Uloží kopii dat pod daným podpisem souborů."""
+        with self._lock:
+            self._entries[key] = (signature, _copy_data(data), extra)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def peek_signature(self, key):
+        """Vrátí podpis uložený pro klíč (bez vlivu na statistiky)."""
+        with self._lock:
+            cached = self._entries.get(key)
+            return cached[0] if cached else None
+
+    def apply_records(self, key, signature, records, extra=None):
+        """Promítne záznamy žurnálu (přidání, úpravy, smazání) do uložených dat a aktualizuje podpis."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return
+            data = _apply_journal(cached[1], _copy_data(records))
+            self._entries[key] = (signature, data, extra)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Statistiky cache (počet zásahů, minutí a uložených souborů)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+            }
+
+
+# Sdílená cache pro všechny instance (App.py i expense_tracker.py mají vlastní DataManager)
+json_cache = JsonFileCache(maxsize=int(os.getenv("JSON_CACHE_SIZE", "64")))
+
+
+class JsonStorage:
+    """Výchozí backend: JSON snapshot + žurnál změn pro každého uživatele v DATA_DIR."""
+
+    # Number of journal records after which the journal is merged into the snapshot
+    JOURNAL_COMPACT_THRESHOLD = int(os.getenv("JOURNAL_COMPACT_THRESHOLD", "500"))
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        # Identita úložiště (součást klíčů cache sdílených mezi instancemi)
+        self.storage_id = ("json", os.path.abspath(data_dir))
+        # Počet záznamů v žurnálu pro každého uživatele (zjištěno při přehrání žurnálu)
+        self._journal_lengths = {}
+        # Hashovaný index duplicit pro každého uživatele: username -> (podpis souborů, množina klíčů)
+        self._dedup_indexes = {}
+        # Materializované součty pro každého uživatele: username -> (podpis souborů, součty)
+        self._rollups = {}
+
+    def get_user_data_file(self, username):
+        """Vrátí cestu ke snapshotu dat uživatele."""
+        return os.path.join(self.data_dir, f"{username}_data.json")
+
+    def get_user_journal_file(self, username):
+        """Vrátí cestu k žurnálu změn uživatele."""
+        return os.path.join(self.data_dir, f"{username}_data.journal")
+
+    def get_user_history_file(self, username):
+        """Vrátí cestu k souboru s historií uživatele."""
+        return os.path.join(self.data_dir, f"{username}_history.json")
+
+    def get_user_rollups_file(self, username):
+        """Vrátí cestu k materializovaným součtům snapshotu uživatele."""
+        return os.path.join(self.data_dir, f"{username}_rollups.json")
+
+    def lock(self, username):
+        """Exkluzivní zámek dat uživatele pro sekvenci načtení a uložení."""
+        return file_lock(self.get_user_data_file(username))
+
+    def load_data(self, username):
+        """Načte snapshot a přehraje na něj žurnál (při nezměněných souborech z cache)."""
+        data_file = self.get_user_data_file(username)
+        # Sdílený zámek: čtení snapshotu a žurnálu nesmí proběhnout uprostřed slučování
+        with file_lock(data_file, shared=True):
+            key = (username, data_file)
+            signature = self._data_signature(username)
+            cached = json_cache.get(key, signature)
+            if cached is not None:
+                data, self._journal_lengths[username] = cached
+                return data
+
+            if os.path.exists(data_file):
+                data = load_json(data_file)
+            else:
+                data = _default_data()
+            self._replay_journal(username, data)
+            json_cache.put(key, signature, data, self._journal_lengths[username])
+            return data
+
+    def save_data(self, username, data):
+        """Atomicky uloží nový snapshot a vyprázdní žurnál (záznamům bez id je doplní)."""
+        data_file = self.get_user_data_file(username)
+        with file_lock(data_file):
+            _assign_ids(data)
+            atomic_write_json(data_file, data, lock=False)
+            # Snapshot obsahuje kompletní stav, žurnál už není potřeba
+            journal_file = self.get_user_journal_file(username)
+            if os.path.exists(journal_file):
+                os.remove(journal_file)
+            self._journal_lengths[username] = 0
+            # Vlastní zápis rovnou promítneme do cache i do indexu duplicit
+            signature = self._data_signature(username)
+            json_cache.put((username, data_file), signature, data, 0)
+            self._dedup_indexes[username] = (signature, {_dedup_key(c, e) for c, e in _iter_entries(data)})
+            rollups = _build_rollups(data)
+            self._write_rollups(username, rollups)
+            self._rollups[username] = (signature, rollups)
+
+    def add_entry(self, username, category, entry):
+        """Připíše záznam do žurnálu; vrací False, pokud jde o duplicitu."""
+        return self.add_entries(username, [(category, entry)]) == 1
+
+    def add_entries(self, username, items):
+        """Připíše více záznamů (dvojice kategorie, záznam) jedním zápisem; vrací počet přidaných."""
+        # Kontrola duplicit i zápis probíhají pod jedním zámkem, aby se nepropletly s jiným zapisovatelem
+        with file_lock(self.get_user_data_file(username)):
+            index = self._duplicate_index(username)
+            records = []
+            pending = set()
+            for category, entry in items:
+                # Kontrola duplicitního záznamu v O(1), včetně duplicit uvnitř dávky
+                key = _dedup_key(category, entry)
+                if key in index or key in pending:
+                    continue
+                pending.add(key)
+                records.append({'op': 'add', 'category': category, 'entry': _with_id(category, entry)})
+            self._commit_records(username, records)
+            return len(records)
+
+    def update_entries(self, username, items):
+        """
+        Upraví záznamy podle id jedním zápisem do žurnálu; vrací počet upravených.
+
+        ``items`` jsou dvojice (kategorie, záznam s 'id'); zadaná pole přepíší
+        původní, kategorie se může změnit. Neznámá id se přeskočí.
+        """
+        with file_lock(self.get_user_data_file(username)):
+            wanted = {entry['id']: (category, entry) for category, entry in items if entry.get('id')}
+            records = []
+            for category, entry in _iter_entries(self.load_data(username)):
+                change = wanted.pop(entry.get('id'), None) if entry.get('id') else None
+                if change is None:
+                    continue
+                new_category, fields = change
+                updated = {**entry, **fields, 'id': entry['id']}
+                if new_category != category or updated != entry:
+                    records.append({'op': 'update', 'category': new_category, 'entry': updated,
+                                    'old_category': category, 'old': entry})
+            self._commit_records(username, records)
+            return len(records)
+
+    def delete_entries(self, username, ids):
+        """Smaže záznamy podle id jedním zápisem do žurnálu; vrací počet smazaných."""
+        with file_lock(self.get_user_data_file(username)):
+            wanted = {entry_id for entry_id in ids if entry_id}
+            records = [
+                {'op': 'delete', 'category': category, 'entry': entry}
+                for category, entry in _iter_entries(self.load_data(username))
+                if entry.get('id') in wanted
+            ]
+            self._commit_records(username, records)
+            return len(records)
+
+    def apply_records(self, username, records):
+        """Zapíše připravené záznamy žurnálu (přidání, úpravy, smazání) jedním zápisem."""
+        with file_lock(self.get_user_data_file(username)):
+            self._commit_records(username, records)
+
+    def save_history(self, username, history):
+        """Atomicky uloží historii uživatele."""
+        history_file = self.get_user_history_file(username)
+        with file_lock(history_file):
+            atomic_write_json(history_file, history, lock=False)
+            json_cache.put((username, history_file), _file_signature(history_file), history)
+
+    def backfill_ids(self, username):
+        """Doplní identifikátory záznamům uloženým před jejich zavedením; vrací počet doplněných."""
+        with file_lock(self.get_user_data_file(username)):
+            data = self.load_data(username)
+            count = _assign_ids(data)
+            if count:
+                self.save_data(username, data)
+            return count
+
+    def iter_entries(self, username):
+        """Projde data uživatele jako dvojice (kategorie, záznam) seskupené podle kategorie."""
+        return _iter_entries(self.load_data(username))
+
+    def data_version(self, username):
+        """Verze dat uživatele, mění se s každým zápisem (klíč pro cache odvozených výstupů)."""
+        return self._data_signature(username)
+
+    def usernames(self):
+        """Vrátí uživatele, kteří mají v úložišti data."""
+        if not os.path.isdir(self.data_dir):
+            return []
+        return sorted(
+            file_name[:-len("_data.json")] for file_name in os.listdir(self.data_dir)
+            if file_name.endswith("_data.json")
+        )
+
+    def compact_data(self, username):
+        """Sloučí žurnál uživatele do snapshotu."""
+        with file_lock(self.get_user_data_file(username)):
+            self.save_data(username, self.load_data(username))
+
+    def load_rollups(self, username):
+        """
+        Vrátí materializované součty jako řádky (kategorie, typ, měsíc, částka, počet).
+
+        Součty snapshotu jsou uložené v ``{uživatel}_rollups.json``; navrch se
+        přičte jen žurnál, takže cena nezávisí na délce historie. Při chybějícím
+        nebo zastaralém souboru se součty sestaví znovu.
+        """
+        cached = self._rollups.get(username)
+        if cached is not None and cached[0] == self._data_signature(username):
+            return _rollup_rows(cached[1])
+
+        data_file = self.get_user_data_file(username)
+        with file_lock(data_file, shared=True):
+            signature = self._data_signature(username)
+            rollups = self._read_rollups(username)
+            if rollups is not None:
+                for record in self._read_journal(username):
+                    _rollup_record(rollups, record)
+                self._rollups[username] = (signature, rollups)
+                return _rollup_rows(rollups)
+        return self.rebuild_rollups(username)
+
+    def rebuild_rollups(self, username):
+        """Znovu sestaví materializované součty ze snapshotu a žurnálu."""
+        data_file = self.get_user_data_file(username)
+        with file_lock(data_file):
+            snapshot = load_json(data_file) if os.path.exists(data_file) else _default_data()
+            rollups = _build_rollups(snapshot)
+            self._write_rollups(username, rollups)
+            for record in self._read_journal(username):
+                _rollup_record(rollups, record)
+            self._rollups[username] = (self._data_signature(username), rollups)
+            return _rollup_rows(rollups)
+
+    def load_history(self, username):
+        """Načte historii uživatele."""
+        history_file = self.get_user_history_file(username)
+        key = (username, history_file)
+        signature = _file_signature(history_file)
+        cached = json_cache.get(key, signature)
+        if cached is not None:
+            return cached[0]
+        if signature is None:
+            return {}
+        history = load_json(history_file)
+        json_cache.put(key, signature, history)
+        return history
+
+    def category_totals(self, username, start=None, end=None):
+        """Spočítá součty příjmů a výdajů po kategoriích (průchodem všech záznamů)."""
+        totals = {}
+        for category, entries in self.load_data(username).items():
+            if isinstance(entries, dict):
+                entries = [entries]
+            for entry in entries:
+                type_ = entry.get('type', 'Výdaj')
+                if type_ not in ENTRY_TYPES or not _in_period(entry.get('timestamp'), start, end):
+                    continue
+                totals.setdefault(category, {t: 0.0 for t in ENTRY_TYPES})
+                totals[category][type_] += float(entry.get('amount', 0))
+        return totals
+
+    def _replay_journal(self, username, data):
+        """Aplikuje záznamy ze žurnálu na načtený snapshot."""
+        records = list(self._read_journal(username))
+        self._journal_lengths[username] = len(records)
+        return _apply_journal(data, records)
+
+    def _read_journal(self, username):
+        """Projde záznamy žurnálu uživatele (přidání, úpravy a smazání)."""
+        journal_file = self.get_user_journal_file(username)
+        if not os.path.exists(journal_file):
+            return
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = loads(line)
+                except json.JSONDecodeError:
+                    # Neúplný poslední řádek (např. pád během zápisu) přeskočíme
+                    continue
+                yield record
+
+    def _read_rollups(self, username):
+        """Načte uložené součty snapshotu; None, pokud chybí nebo neodpovídají snapshotu."""
+        rollups_file = self.get_user_rollups_file(username)
+        if not os.path.exists(rollups_file):
+            return None
+        try:
+            stored = load_json(rollups_file)
+        except json.JSONDecodeError:
+            return None
+        snapshot = _file_signature(self.get_user_data_file(username))
+        if stored.get('snapshot') != (list(snapshot) if snapshot else None):
+            return None
+        return {(c, t, m): [amount, count] for c, t, m, amount, count in stored.get('rows', [])}
+
+    def _write_rollups(self, username, rollups):
+        """Uloží součty snapshotu spolu s jeho podpisem (volá se pod zámkem dat)."""
+        snapshot = _file_signature(self.get_user_data_file(username))
+        atomic_write_json(self.get_user_rollups_file(username), {
+            'snapshot': list(snapshot) if snapshot else None,
+            'rows': _rollup_rows(rollups)
+        }, lock=False)
+
+    def _append_journal(self, username, records):
+        """Připíše záznamy na konec žurnálu uživatele."""
+        journal_file = self.get_user_journal_file(username)
+        key = (username, self.get_user_data_file(username))
+        # Cache můžeme aktualizovat jen tehdy, pokud soubory mezitím nezměnil nikdo jiný
+        in_sync = json_cache.peek_signature(key) == self._data_signature(username)
+        append_lines(journal_file, [dumps(record, pretty=False) for record in records])
+        self._journal_lengths[username] = self._journal_lengths.get(username, 0) + len(records)
+        if in_sync:
+            json_cache.apply_records(key, self._data_signature(username), records,
+                                     self._journal_lengths[username])
+        else:
+            json_cache.invalidate(key)
+
+    def _commit_records(self, username, records):
+        """
+        Zapíše záznamy do žurnálu a posune index duplicit i materializované součty.
+
+        Volá se pod zámkem dat; po překročení limitu žurnál sloučí do snapshotu.
+        """
+        if not records:
+            return
+        index = self._duplicate_index(username)
+        # Součty v paměti lze posunout jen tehdy, pokud odpovídají souborům před zápisem
+        rollups = self._rollups.get(username)
+        rollups_in_sync = rollups is not None and rollups[0] == self._data_signature(username)
+
+        # Změny jako řádky žurnálu místo přepsání celého souboru
+        self._append_journal(username, records)
+        for record in records:
+            removed, added = _record_changes(record)
+            index.difference_update(_dedup_key(c, e) for c, e in removed)
+            index.update(_dedup_key(c, e) for c, e in added)
+        self._dedup_indexes[username] = (self._data_signature(username), index)
+
+        if rollups_in_sync:
+            for record in records:
+                _rollup_record(rollups[1], record)
+            self._rollups[username] = (self._data_signature(username), rollups[1])
+        else:
+            self._rollups.pop(username, None)
+
+        # Po překročení limitu sloučíme žurnál do snapshotu
+        if self._journal_lengths.get(username, 0) >= self.JOURNAL_COMPACT_THRESHOLD:
+            self.compact_data(username)
+
+    def _duplicate_index(self, username):
+        """Vrátí index duplicit uživatele; při první potřebě nebo změně souborů jej sestaví."""
+        signature = self._data_signature(username)
+        cached = self._dedup_indexes.get(username)
+        if cached is None or cached[0] != signature:
+            data = self.load_data(username)
+            cached = (signature, {_dedup_key(c, e) for c, e in _iter_entries(data)})
+            self._dedup_indexes[username] = cached
+        return cached[1]
+
+    def _data_signature(self, username):
+        """Společný podpis snapshotu a žurnálu uživatele."""
+        return (_file_signature(self.get_user_data_file(username)),
+                _file_signature(self.get_user_journal_file(username)))
+
+
+class _SqliteWriteLock:
+    """Drží zápisovou transakci SQLite; vnořené zámky ve stejném vlákně jen počítá."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.owner = True
+        else:
+            self.owner = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.owner:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        return False
+
+
+class SqliteStorage:
+    """Backend nad SQLite: jedna tabulka pro každý druh záznamu, indexy pro dotazy."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ledger_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT,
+            amount REAL,
+            timestamp TEXT,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ledger_user_category
+            ON ledger_entries (username, category, type, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_ledger_user_timestamp
+            ON ledger_entries (username, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_ledger_entry_id
+            ON ledger_entries (username, json_extract(payload, '$.id'));
+
+        CREATE TABLE IF NOT EXISTS investments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            type TEXT,
+            name TEXT,
+            amount REAL,
+            date TEXT,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_investments_user_type
+            ON investments (username, type, date);
+        CREATE INDEX IF NOT EXISTS idx_investments_user_timestamp
+            ON investments (username, type, json_extract(payload, '$.timestamp'));
+
+        CREATE TABLE IF NOT EXISTS ledger_rollups (
+            username TEXT NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            month TEXT NOT NULL,
+            amount REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (username, category, type, month)
+        );
+
+        CREATE TABLE IF NOT EXISTS data_versions (
+            username TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS history (
+            username TEXT PRIMARY KEY,
+            payload TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS storage_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        INSERT OR IGNORE INTO storage_meta (key, value) VALUES ('instance', lower(hex(randomblob(16))));
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            instance, = conn.execute("SELECT value FROM storage_meta WHERE key = 'instance'").fetchone()
+        # Identita úložiště: cesta a náhodný token databáze, takže znovu vytvořená
+        # databáze (s verzemi dat opět od nuly) nesdílí záznamy cache se starou
+        self.storage_id = ("sqlite", os.path.abspath(db_path), instance)
+
+    def _connect(self):
+        """Vrátí spojení pro aktuální vlákno (Streamlit obsluhuje session ve více vláknech)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Stejné zaokrouhlení částky pro duplicity jako v JSON backendu (_dedup_key)
+            conn.create_function("amount_key", 1, _amount_key, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def lock(self, username):
+        """Zápisový zámek databáze (BEGIN IMMEDIATE) pro sekvenci načtení a uložení."""
+        return _SqliteWriteLock(self._connect())
+
+    def load_data(self, username):
+        """Sestaví data uživatele ve stejném tvaru jako JSON backend."""
+        conn = self._connect()
+        data = {}
+        for category, payload in conn.execute(
+            "SELECT category, payload FROM ledger_entries WHERE username = ? ORDER BY id",
+            (username,)
+        ):
+            data.setdefault(category, []).append(loads(payload))
+        investments = [
+            loads(payload) for (payload,) in conn.execute(
+                "SELECT payload FROM investments WHERE username = ? ORDER BY id",
+                (username,)
+            )
+        ]
+        if investments:
+            data['investment'] = investments
+        return data or _default_data()
+
+    def save_data(self, username, data):
+        """Nahradí všechna data uživatele v jedné transakci (záznamům bez id je doplní)."""
+        _assign_ids(data)
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            conn.execute("DELETE FROM ledger_entries WHERE username = ?", (username,))
+            conn.execute("DELETE FROM investments WHERE username = ?", (username,))
+            conn.execute("DELETE FROM ledger_rollups WHERE username = ?", (username,))
+            self._bump_version(conn, username)
+            for category, entries in data.items():
+                if isinstance(entries, dict):
+                    entries = [entries]
+                for entry in entries:
+                    self._insert(conn, username, category, entry)
+
+    def add_entry(self, username, category, entry):
+        """Vloží záznam; duplicitu ověří indexovaným dotazem."""
+        return self.add_entries(username, [(category, entry)]) == 1
+
+    def add_entries(self, username, items):
+        """Vloží více záznamů v jedné transakci; vrací počet přidaných."""
+        added = 0
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            self._bump_version(conn, username)
+            for category, entry in items:
+                if self._is_duplicate(conn, username, category, entry):
+                    continue
+                self._insert(conn, username, category, _with_id(category, entry))
+                added += 1
+        return added
+
+    def update_entries(self, username, items):
+        """Upraví záznamy podle id (indexovaný dotaz) v jedné transakci; vrací počet upravených."""
+        updated_count = 0
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            self._bump_version(conn, username)
+            for category, fields in items:
+                row = self._find_entry(conn, username, fields.get('id'))
+                if row is None:
+                    continue
+                row_id, old_category, payload = row
+                entry = loads(payload)
+                updated = {**entry, **fields, 'id': entry['id']}
+                if category == old_category and updated == entry:
+                    continue
+                conn.execute(
+                    "UPDATE ledger_entries SET category = ?, type = ?, amount = ?, timestamp = ?, payload = ? "
+                    "WHERE id = ?",
+                    (category, updated.get('type'), float(updated.get('amount', 0)),
+                     updated.get('timestamp'), dumps(updated, pretty=False), row_id)
+                )
+                self._shift_rollup(conn, username, old_category, entry, -1)
+                self._shift_rollup(conn, username, category, updated, 1)
+                updated_count += 1
+        return updated_count
+
+    def delete_entries(self, username, ids):
+        """Smaže záznamy podle id v jedné transakci; vrací počet smazaných."""
+        deleted = 0
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            self._bump_version(conn, username)
+            for entry_id in ids:
+                row = self._find_entry(conn, username, entry_id)
+                if row is None:
+                    continue
+                row_id, category, payload = row
+                conn.execute("DELETE FROM ledger_entries WHERE id = ?", (row_id,))
+                self._shift_rollup(conn, username, category, loads(payload), -1)
+                deleted += 1
+        return deleted
+
+    def apply_records(self, username, records):
+        """Provede připravené záznamy žurnálu (přidání, úpravy, smazání) v jedné transakci."""
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            self._bump_version(conn, username)
+            for record in records:
+                op = record.get('op')
+                if op == 'add':
+                    self._insert(conn, username, record['category'], record['entry'])
+                    continue
+                row = self._find_entry(conn, username, record['entry'].get('id'))
+                if row is None:
+                    continue
+                row_id, category, payload = row
+                self._shift_rollup(conn, username, category, loads(payload), -1)
+                if op == 'delete':
+                    conn.execute("DELETE FROM ledger_entries WHERE id = ?", (row_id,))
+                    continue
+                entry = record['entry']
+                conn.execute(
+                    "UPDATE ledger_entries SET category = ?, type = ?, amount = ?, timestamp = ?, payload = ? "
+                    "WHERE id = ?",
+                    (record['category'], entry.get('type'), float(entry.get('amount', 0)),
+                     entry.get('timestamp'), dumps(entry, pretty=False), row_id)
+                )
+                self._shift_rollup(conn, username, record['category'], entry, 1)
+
+    def save_history(self, username, history):
+        """Uloží historii uživatele."""
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO history (username, payload) VALUES (?, ?)",
+                (username, dumps(history, pretty=False))
+            )
+
+    def backfill_ids(self, username):
+        """Doplní identifikátory záznamům uloženým před jejich zavedením; vrací počet doplněných."""
+        conn = self._connect()
+        with _SqliteWriteLock(conn):
+            self._bump_version(conn, username)
+            placeholders = ", ".join("?" for _ in RESERVED_BUCKETS)
+            rows = conn.execute(
+                "SELECT id FROM ledger_entries WHERE username = ? AND json_extract(payload, '$.id') IS NULL "
+                f"AND category NOT IN ({placeholders})",
+                (username, *RESERVED_BUCKETS)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE ledger_entries SET payload = json_set(payload, '$.id', ?) WHERE id = ?",
+                [(new_entry_id(), row_id) for (row_id,) in rows]
+            )
+            count = len(rows)
+        return count
+
+    def iter_entries(self, username):
+        """Projde záznamy uživatele kurzorem (bez sestavení celých dat), seskupené podle kategorie."""
+        conn = self._connect()
+        for category, payload in conn.execute(
+            "SELECT category, payload FROM ledger_entries WHERE username = ? ORDER BY category, id",
+            (username,)
+        ):
+            yield category, loads(payload)
+        for (payload,) in conn.execute(
+            "SELECT payload FROM investments WHERE username = ? ORDER BY id", (username,)
+        ):
+            yield 'investment', loads(payload)
+
+    def data_version(self, username):
+        """Verze dat uživatele, zvyšuje se s každým zápisem (klíč pro cache odvozených výstupů)."""
+        row = self._connect().execute(
+            "SELECT version FROM data_versions WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def usernames(self):
+        """Vrátí uživatele, kteří mají v úložišti data."""
+        return [username for (username,) in self._connect().execute(
+            "SELECT username FROM ledger_entries UNION SELECT username FROM investments ORDER BY username"
+        )]
+
+    def compact_data(self, username):
+        """SQLite nepotřebuje slučování, jen pro kompatibilitu rozhraní."""
+
+    def load_rollups(self, username):
+        """Vrátí materializované součty jako řádky (kategorie, typ, měsíc, částka, počet)."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT category, type, month, amount, count FROM ledger_rollups "
+            "WHERE username = ? ORDER BY category, type, month",
+            (username,)
+        ).fetchall()
+        if not rows and conn.execute(
+            "SELECT 1 FROM ledger_entries WHERE username = ? LIMIT 1", (username,)
+        ).fetchone():
+            # Databáze z doby před zavedením součtů
+            return self.rebuild_rollups(username)
+        return rows
+
+    def rebuild_rollups(self, username):
+        """Znovu sestaví materializované součty uživatele z tabulky záznamů."""
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in RESERVED_BUCKETS)
+        with _SqliteWriteLock(conn):
+            conn.execute("DELETE FROM ledger_rollups WHERE username = ?", (username,))
+            conn.execute(
+                "INSERT INTO ledger_rollups (username, category, type, month, amount, count) "
+                "SELECT username, category, COALESCE(type, 'Výdaj') AS entry_type, "
+                "COALESCE(substr(timestamp, 1, 7), '') AS month, SUM(amount), COUNT(*) "
+                f"FROM ledger_entries WHERE username = ? AND category NOT IN ({placeholders}) "
+                "AND COALESCE(type, 'Výdaj') IN (?, ?) "
+                "GROUP BY category, entry_type, month",
+                (username, *RESERVED_BUCKETS, *ENTRY_TYPES)
+            )
+        return conn.execute(
+            "SELECT category, type, month, amount, count FROM ledger_rollups "
+            "WHERE username = ? ORDER BY category, type, month",
+            (username,)
+        ).fetchall()
+
+    def load_history(self, username):
+        """Načte historii uživatele."""
+        row = self._connect().execute(
+            "SELECT payload FROM history WHERE username = ?", (username,)
+        ).fetchone()
+        return loads(row[0]) if row else {}
+
+    def category_totals(self, username, start=None, end=None):
+        """Spočítá součty příjmů a výdajů po kategoriích pomocí GROUP BY."""
+        query = (
+            "SELECT category, COALESCE(type, 'Výdaj') AS entry_type, SUM(amount) "
+            "FROM ledger_entries WHERE username = ?"
+        )
+        params = [username]
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND timestamp < ?"
+            params.append(end)
+        query += " GROUP BY category, entry_type"
+
+        totals = {}
+        for category, type_, amount in self._connect().execute(query, params):
+            if type_ not in ENTRY_TYPES:
+                continue
+            totals.setdefault(category, {t: 0.0 for t in ENTRY_TYPES})
+            totals[category][type_] += amount or 0.0
+        return totals
+
+    def _insert(self, conn, username, category, entry):
+        payload = dumps(entry, pretty=False)
+        if category == 'investment':
+            conn.execute(
+                "INSERT INTO investments (username, type, name, amount, date, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (username, entry.get('type'), entry.get('name'), float(entry.get('amount', 0)),
+                 entry.get('date') or entry.get('timestamp'), payload)
+            )
+        else:
+            conn.execute(
+                "INSERT INTO ledger_entries (username, category, type, amount, timestamp, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (username, category, entry.get('type'), float(entry.get('amount', 0)),
+                 entry.get('timestamp'), payload)
+            )
+            # Materializované součty se posouvají ve stejné transakci jako vložení
+            self._shift_rollup(conn, username, category, entry, 1)
+
+    def _bump_version(self, conn, username):
+        """Zvýší verzi dat uživatele v rámci probíhající zápisové transakce."""
+        conn.execute(
+            "INSERT INTO data_versions (username, version) VALUES (?, 1) "
+            "ON CONFLICT(username) DO UPDATE SET version = version + 1",
+            (username,)
+        )
+
+    def _shift_rollup(self, conn, username, category, entry, sign):
+        """Přičte (sign=1) nebo odečte (sign=-1) záznam z materializovaných součtů."""
+        key = _rollup_key(category, entry)
+        if key is None:
+            return
+        conn.execute(
+            "INSERT INTO ledger_rollups (username, category, type, month, amount, count) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (username, category, type, month) "
+            "DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count",
+            (username, *key, sign * float(entry.get('amount', 0)), sign)
+        )
+        if sign < 0:
+            conn.execute(
+                "DELETE FROM ledger_rollups WHERE username = ? AND category = ? AND type = ? "
+                "AND month = ? AND count <= 0",
+                (username, *key)
+            )
+
+    def _find_entry(self, conn, username, entry_id):
+        """Najde záznam ledgeru podle id; vrací (rowid, kategorie, payload) nebo None."""
+        if not entry_id:
+            return None
+        return conn.execute(
+            "SELECT id, category, payload FROM ledger_entries "
+            "WHERE username = ? AND json_extract(payload, '$.id') = ?",
+            (username, entry_id)
+        ).fetchone()
+
+    def _is_duplicate(self, conn, username, category, entry):
+        """
+        Duplicita podle stejného klíče jako _dedup_key (částka zaokrouhlená na haléře).
+
+        Kandidáti se vyhledají indexem podle uživatele, kategorie, typu a času,
+        částky se porovnají funkcí amount_key (Python _amount_key).
+        """
+        amount = _amount_key(float(entry.get('amount', 0)))
+        if category == 'investment':
+            row = conn.execute(
+                "SELECT 1 FROM investments WHERE username = ? AND type IS ? "
+                "AND json_extract(payload, '$.timestamp') IS ? AND amount_key(amount) = ? LIMIT 1",
+                (username, entry.get('type'), entry.get('timestamp'), amount)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT 1 FROM ledger_entries WHERE username = ? AND category = ? AND type IS ? "
+                "AND timestamp IS ? AND amount_key(amount) = ? LIMIT 1",
+                (username, category, entry.get('type'), entry.get('timestamp'), amount)
+            ).fetchone()
+        return row is not None
+
+
+class DataBatch:
+    """
+    Změny dat jednoho uživatele nasbírané v DataManager.batch a zapsané najednou.
+
+    Záznamy ledgeru se evidují jako záznamy žurnálu (add/update/delete), seznamy
+    výdajů a investic a historie se mění přímo v načtených datech.
+    """
+
+    def __init__(self, username, data, history):
+        self.username = username
+        self.data = data
+        self.history = history
+        self.records = []
+        self.dirty_buckets = set()
+        self.history_changed = False
+        self._entries_by_id = None
+        self._dedup_keys = None
+
+    # Ledger
+
+    def add_entry(self, category, entry):
+        """Přidá záznam ledgeru; vrací False, pokud jde o duplicitu."""
+        if not category or str(category).strip() == "":
+            raise ValueError("Kategorie nemůže být prázdná")
+        keys = self._keys()
+        key = _dedup_key(category, entry)
+        if key in keys:
+            return False
+        entry = _with_id(category, entry)
+        keys.add(key)
+        self._index()[entry['id']] = (category, entry)
+        self.records.append({'op': 'add', 'category': category, 'entry': entry})
+        return True
+
+    def update_entry(self, category, fields):
+        """Upraví záznam ledgeru podle ``fields['id']``; vrací False, pokud id neexistuje nebo se nic nemění."""
+        if not category or str(category).strip() == "":
+            raise ValueError("Kategorie nemůže být prázdná")
+        index = self._index()
+        current = index.get(fields.get('id'))
+        if current is None:
+            return False
+        old_category, old = current
+        updated = {**old, **fields, 'id': old['id']}
+        if category == old_category and updated == old:
+            return False
+        keys = self._keys()
+        keys.discard(_dedup_key(old_category, old))
+        keys.add(_dedup_key(category, updated))
+        index[old['id']] = (category, updated)
+        self.records.append({'op': 'update', 'category': category, 'entry': updated,
+                             'old_category': old_category, 'old': old})
+        return True
+
+    def delete_entries(self, ids):
+        """Smaže záznamy ledgeru podle id; vrací počet smazaných."""
+        index = self._index()
+        deleted = 0
+        for entry_id in ids:
+            current = index.pop(entry_id, None) if entry_id else None
+            if current is None:
+                continue
+            category, entry = current
+            self._keys().discard(_dedup_key(category, entry))
+            self.records.append({'op': 'delete', 'category': category, 'entry': entry})
+            deleted += 1
+        return deleted
+
+    # Výdaje, investice a historie
+
+    def add_expense(self, expense):
+        """Přidá výdaj do seznamu výdajů."""
+        self._bucket('expense').append(expense)
+
+    def add_investment(self, investment):
+        """Přidá investici do seznamu investic."""
+        self._bucket('investment').append(investment)
+
+    def delete_expenses(self, positions):
+        """Smaže výdaje podle pozic v seznamu výdajů; vrací počet smazaných."""
+        return self._delete_positions('expense', positions)
+
+    def delete_investments(self, positions):
+        """Smaže investice podle pozic v seznamu investic; vrací počet smazaných."""
+        return self._delete_positions('investment', positions)
+
+    def set_expenses(self, expenses):
+        """Nahradí celý seznam výdajů."""
+        self.data['expense'] = list(expenses)
+        self.dirty_buckets.add('expense')
+
+    def set_investments(self, investments):
+        """Nahradí celý seznam investic."""
+        self.data['investment'] = list(investments)
+        self.dirty_buckets.add('investment')
+
+    def log_change(self, category, old_value, new_value):
+        """Zapíše změnu hodnoty do historie uživatele (jen pokud se hodnota změnila)."""
+        if old_value == new_value:
+            return
+        self.history.append({
+            "category": category,
+            "old_value": old_value,
+            "new_value": new_value,
+            "timestamp": datetime.now().isoformat()
+        })
+        self.history_changed = True
+
+    @property
+    def changed(self):
+        """Zda dávka obsahuje nějakou změnu."""
+        return bool(self.records or self.dirty_buckets or self.history_changed)
+
+    def merged_data(self):
+        """Data se všemi změnami ledgeru (pro zápis celého snapshotu)."""
+        return _apply_journal(self.data, self.records)
+
+    def _bucket(self, kind):
+        self.dirty_buckets.add(kind)
+        bucket = self.data.get(kind)
+        if not isinstance(bucket, list):
+            bucket = self.data[kind] = []
+        return bucket
+
+    def _delete_positions(self, kind, positions):
+        bucket = self.data.get(kind) or []
+        positions = {int(position) for position in positions if 0 <= int(position) < len(bucket)}
+        if positions:
+            self._bucket(kind)[:] = [item for i, item in enumerate(bucket) if i not in positions]
+        return len(positions)
+
+    def _index(self):
+        """Záznamy ledgeru podle id (sestaví se při první úpravě nebo smazání)."""
+        if self._entries_by_id is None:
+            self._entries_by_id = {
+                entry['id']: (category, entry)
+                for category, entry in _iter_entries(self.data)
+                if entry.get('id') and category not in RESERVED_BUCKETS
+            }
+        return self._entries_by_id
+
+    def _keys(self):
+        """Klíče duplicit ledgeru (sestaví se při prvním přidání)."""
+        if self._dedup_keys is None:
+            self._dedup_keys = {_dedup_key(c, e) for c, e in _iter_entries(self.data)}
+        return self._dedup_keys
+
+
+def create_storage(backend, data_dir):
+    """Vytvoří úložiště podle názvu backendu ("json" nebo "sqlite")."""
+    if backend == "json":
+        return JsonStorage(data_dir)
+    if backend == "sqlite":
+        return SqliteStorage(os.getenv("SQLITE_PATH", os.path.join(data_dir, "finance.db")))
+    raise ValueError(f"Neznámý backend úložiště: {backend}")
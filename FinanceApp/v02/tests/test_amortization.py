@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amortization import amortization_schedule, monthly_dates, regular_payment, scenario_grid, scenario_summary
+from mortgage_calculator import calculate_mortgage
+
+class TestAmortization(unittest.TestCase):
+    def test_regular_payment(self):
+        """Anuitní splátka odpovídá vzorci, při nulové sazbě se splácí rovnoměrně"""
+        self.assertAlmostEqual(regular_payment(3_000_000, 5.9, 30), 17794.1, places=1)
+        self.assertAlmostEqual(regular_payment(1_200_000, 0, 10), 10_000)
+        np.testing.assert_allclose(regular_payment([1e6, 2e6], 5.9, 30), [5931.37, 11862.74], atol=0.01)
+
+    def test_schedule_pays_off_loan(self):
+        """Kalendář splatí celou jistinu a kumulativní částky na sebe navazují"""
+        schedule = amortization_schedule(3_000_000, 5.9, 30, insurance=500, start_date="2024-01-15")
+        self.assertEqual(len(schedule), 361)
+        final = schedule.iloc[-1]
+        self.assertAlmostEqual(final['remaining_balance'], 0)
+        self.assertAlmostEqual(final['principal_paid'], 3_000_000, places=2)
+        self.assertAlmostEqual(final['insurance_paid'], 360 * 500)
+        np.testing.assert_allclose(
+            schedule['total_paid'],
+            schedule['principal_paid'] + schedule['interest_paid'] + schedule['insurance_paid']
+        )
+        self.assertAlmostEqual(schedule['payment'].iloc[1], schedule.attrs['regular_payment'] + 500)
+
+    def test_extra_payment_shortens_term(self):
+        """Mimořádná splátka zkrátí splácení i zaplacené úroky"""
+        base = amortization_schedule(3_000_000, 5.9, 30)
+        extra = amortization_schedule(3_000_000, 5.9, 30, extra_payment=10_000)
+        payoff = (extra['remaining_balance'] > 0).sum()
+        self.assertLess(payoff, 200)
+        self.assertTrue((extra['payment'].iloc[payoff + 1:] == 0).all())
+        self.assertLess(extra['interest_paid'].iloc[-1], base['interest_paid'].iloc[-1])
+
+    def test_monthly_dates(self):
+        """Data splátek jdou po kalendářních měsících a drží den v měsíci"""
+        dates = monthly_dates("2024-01-31", 3)
+        self.assertEqual(list(dates), list(pd.to_datetime(["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"])))
+
+    def test_calculate_mortgage_dict(self):
+        """calculate_mortgage vrací původní slovník seznamů"""
+        result = calculate_mortgage(2_000_000, 4.5, 20, inflation_rate=2, property_appreciation=3, ltv=80)
+        self.assertEqual(len(result['dates']), 241)
+        self.assertEqual(result['property_value'], 2_500_000)
+        self.assertAlmostEqual(result['property_values'][12], 2_500_000 * 1.03)
+        self.assertAlmostEqual(result['real_values'][12], result['total_paid'][12] / 1.02)
+
+    def test_scenario_summary_matches_schedule(self):
+        """Souhrn z uzavřeného tvaru odpovídá splátkovému kalendáři"""
+        for loan, rate, years, extra in [(3_000_000, 5.9, 30, 0), (3_000_000, 5.9, 30, 10_000),
+                                         (1_200_000, 0, 10, 2_500), (500_000, 12.0, 5, 400_000)]:
+            summary = scenario_summary(loan, rate, years, extra)
+            schedule = amortization_schedule(loan, rate, years, extra)
+            self.assertEqual(summary['payoff_month'], (schedule['payment'] > 0).sum())
+            self.assertAlmostEqual(float(summary['total_interest']), schedule['interest_paid'].iloc[-1], places=2)
+            self.assertAlmostEqual(float(summary['total_paid']), schedule['total_paid'].iloc[-1], places=2)
+
+    def test_scenario_grid(self):
+        """Mřížka obsahuje všechny kombinace a výsledek nezávisí na dělení do bloků a procesů"""
+        args = ([2e6, 3e6], np.arange(1.0, 8.0, 0.5), [10, 20, 30], [0, 5_000, 10_000])
+        grid = scenario_grid(*args)
+        self.assertEqual(len(grid), 2 * 14 * 3 * 3)
+        self.assertEqual(list(grid.columns[:4]), ['loan_amount', 'interest_rate', 'years', 'extra_payment'])
+        row = grid[(grid['loan_amount'] == 3e6) & (grid['interest_rate'] == 5.5)
+                   & (grid['years'] == 30) & (grid['extra_payment'] == 0)].iloc[0]
+        self.assertAlmostEqual(row['monthly_payment'], regular_payment(3e6, 5.5, 30))
+        self.assertEqual(row['payoff_month'], 360)
+        pd.testing.assert_frame_equal(scenario_grid(*args, processes=2, chunk_size=50), grid)
+
+if __name__ == '__main__':
+    unittest.main()
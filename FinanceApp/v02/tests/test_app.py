@@ -15,11 +15,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from data_manager import DataManager
 
 @pytest.fixture
-def data_manager():
-    """Create a DataManager instance with test data directory."""
-    test_data_dir = os.path.join(os.path.dirname(__file__), 'data')
-    os.makedirs(test_data_dir, exist_ok=True)
-    return DataManager(data_dir=test_data_dir)
+def data_manager(tmp_path):
+    """Create a DataManager instance with a temporary data directory."""
+    return DataManager(data_dir=str(tmp_path))
 
 class TestFinanceApp(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compound_interest import (
+    calculate_compound_interest, compound_interest_series, create_compound_interest_table, month_ends
+)
+
+class TestCompoundInterest(unittest.TestCase):
+    def test_series_matches_closed_form(self):
+        """Měsíční řada odpovídá calculate_compound_interest pro každý měsíc"""
+        series = compound_interest_series(100_000, 5.0, 10, 4, 2_000, 2.0, start_date="2024-01-15")
+        self.assertEqual(len(series), 121)
+        for month in (0, 1, 59, 120):
+            np.testing.assert_allclose(
+                series.loc[month, ['value', 'contributions', 'interest', 'real_value']].to_numpy(dtype=float),
+                calculate_compound_interest(100_000, 5.0, month / 12, 4, 2_000, 2.0)
+            )
+
+    def test_zero_rate_with_contributions(self):
+        """Při nulové sazbě je hodnota součtem vkladů (dříve dělení nulou)"""
+        value, contributions, interest, _ = calculate_compound_interest(10_000, 0.0, 5, 12, 1_000)
+        self.assertEqual(value, 70_000)
+        self.assertEqual(contributions, 70_000)
+        self.assertEqual(interest, 0)
+
+    def test_dates(self):
+        """Konce měsíců odpovídají pandas, v tabulce ve formátu dd.mm.rrrr"""
+        dates = month_ends("2024-01-15", 14)
+        self.assertTrue(dates.equals(pd.date_range("2024-01-15", periods=14, freq="ME")))
+        table = create_compound_interest_table(0, 5.0, 1, 12, start_date="2024-01-15")
+        self.assertEqual(table['Datum'].tolist()[:2], ["31.01.2024", "29.02.2024"])
+
+    def test_table(self):
+        """Tabulka má naformátované částky ze stejné řady jako graf"""
+        table = create_compound_interest_table(100_000, 5.0, 2, 12, 2_000, 2.0, start_date="2024-01-15")
+        self.assertEqual(list(table.columns), ['Datum', 'Celková hodnota', 'Celkový příspěvek', 'Celkový úrok', 'Reálná hodnota'])
+        self.assertEqual(table.iloc[0].tolist(), ["31.01.2024", "100,000 Kč", "100,000 Kč", "0 Kč", "100,000 Kč"])
+        self.assertEqual(table.iloc[-1]['Celkový příspěvek'], "148,000 Kč")
+
+if __name__ == '__main__':
+    unittest.main()
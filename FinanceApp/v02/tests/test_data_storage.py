@@ -0,0 +1,562 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import gzip
+import io
+from unittest import mock
+
+import pandas as pd
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_manager import DataManager
+from storage import json_cache
+from exporter import export_cache, parquet_available
+import file_utils
+from file_utils import FileLockTimeout, atomic_write_json, dumps, file_lock, loads
+
+class TestDataStorage(unittest.TestCase):
+    def setUp(self):
+        """Nastavení před každým testem"""
+        self.test_username = "test_user"
+        self.test_dir = tempfile.mkdtemp()
+        self.backend = "json"
+        self.data_manager = DataManager(data_dir=self.test_dir, storage_backend=self.backend)
+        self.data_manager.save_data(self.test_username, {})
+
+    def tearDown(self):
+        """Úklid po každém testu"""
+        shutil.rmtree(self.test_dir)
+
+    def test_add_entry_appends_to_journal(self):
+        """Přidání záznamu nepřepisuje snapshot, ale připíše řádek do žurnálu"""
+        data_file = self.data_manager.storage.get_user_data_file(self.test_username)
+        journal_file = self.data_manager.storage.get_user_journal_file(self.test_username)
+        with open(data_file, 'r', encoding='utf-8') as f:
+            snapshot_before = f.read()
+
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 300, "timestamp": "2024-01-02T12:00:00"})
+
+        with open(data_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), snapshot_before)
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual([e["amount"] for e in data["Jídlo"]], [250, 300])
+
+    def test_journal_duplicate_detection(self):
+        """Duplicitní záznam se do žurnálu nepřidá"""
+        entry = {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}
+        self.data_manager.add_entry(self.test_username, "Jídlo", entry)
+        self.data_manager.add_entry(self.test_username, "Jídlo", dict(entry))
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 1)
+
+    def test_duplicate_amounts_rounded_to_hundredths(self):
+        """Oba backendy považují za duplicitu stejnou částku po zaokrouhlení na haléře"""
+        timestamp = "2024-01-01T12:00:00"
+        items = [("Jídlo", {"type": "Výdaj", "amount": amount, "timestamp": timestamp})
+                 for amount in (1.004, 1.006, 2.0, 2.009, 1.0041, 0.12, 0.125)]
+        items.append(("investment", {"type": "ETF", "amount": 1.004, "timestamp": timestamp}))
+        items.append(("investment", {"type": "ETF", "amount": 1.006, "timestamp": timestamp}))
+        self.assertEqual(self.data_manager.storage.add_entries(self.test_username, items), 7)
+        self.assertEqual(self.data_manager.storage.add_entries(self.test_username, items), 0)
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual([e["amount"] for e in data["Jídlo"]], [1.004, 1.006, 2.0, 2.009, 0.12])
+
+    def test_add_entries_bulk_deduplication(self):
+        """Hromadné přidání přeskočí existující i opakované záznamy v dávce"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        items = [
+            ("Jídlo", {"type": "Výdaj", "amount": 250.001, "timestamp": "2024-01-01T12:00:00"}),
+            ("Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-02T12:00:00"}),
+            ("Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-02T12:00:00"}),
+            ("Mzda", {"type": "Příjem", "amount": 100, "timestamp": "2024-01-02T12:00:00"}),
+        ]
+        self.assertEqual(self.data_manager.add_entries(self.test_username, items), 2)
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 2)
+        self.assertEqual(len(data["Mzda"]), 1)
+
+    def test_duplicate_index_follows_save_data(self):
+        """Index duplicit odpovídá datům uloženým přes save_data"""
+        entry = {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}
+        self.data_manager.add_entry(self.test_username, "Jídlo", entry)
+        self.data_manager.save_data(self.test_username, {})
+        self.data_manager.add_entry(self.test_username, "Jídlo", dict(entry))
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 1)
+
+    def test_journal_compaction(self):
+        """Po dosažení limitu se žurnál sloučí do snapshotu"""
+        self.data_manager.storage.JOURNAL_COMPACT_THRESHOLD = 3
+        for day in range(1, 4):
+            self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": f"2024-01-0{day}T12:00:00"})
+
+        self.assertFalse(os.path.exists(self.data_manager.storage.get_user_journal_file(self.test_username)))
+        with open(self.data_manager.storage.get_user_data_file(self.test_username), 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)["Jídlo"]), 3)
+
+    def test_truncated_journal_line_is_ignored(self):
+        """Neúplný poslední řádek žurnálu nezpůsobí ztrátu ostatních dat"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        with open(self.data_manager.storage.get_user_journal_file(self.test_username), 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "category": "Jídlo", "entry": {"amou')
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 1)
+
+    def test_load_data_uses_cache(self):
+        """Opakované načtení nezměněných souborů se obslouží z cache"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        self.data_manager.load_data(self.test_username)
+        hits_before = json_cache.hits
+
+        # Jiná instance sdílí stejnou cache
+        other_manager = DataManager(data_dir=self.test_dir)
+        data = other_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 1)
+        self.assertGreater(json_cache.hits, hits_before)
+
+        # Změna vrácených dat se do cache nepropíše
+        data["Jídlo"].append({"type": "Výdaj", "amount": 1})
+        data["Jídlo"][0]["amount"] = 0
+        reloaded = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(reloaded["Jídlo"]), 1)
+        self.assertEqual(reloaded["Jídlo"][0]["amount"], 250)
+
+    def test_cache_invalidated_by_external_write(self):
+        """Zápis jiným procesem (změna souboru) cache zneplatní"""
+        self.data_manager.load_data(self.test_username)
+        with open(self.data_manager.storage.get_user_data_file(self.test_username), 'w', encoding='utf-8') as f:
+            json.dump({"Externí": [{"type": "Příjem", "amount": 1, "timestamp": "2024-01-01T00:00:00"}]}, f)
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertIn("Externí", data)
+
+    def test_concurrent_writers_do_not_lose_entries(self):
+        """Souběžné zápisy z více instancí (a slučování žurnálu) nepřijdou o data"""
+        self.data_manager.storage.JOURNAL_COMPACT_THRESHOLD = 7
+
+        def writer(worker):
+            manager = DataManager(data_dir=self.test_dir, storage_backend=self.data_manager.storage_backend)
+            manager.storage.JOURNAL_COMPACT_THRESHOLD = 7
+            for i in range(25):
+                manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": i, "timestamp": f"{worker}-{i}"})
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 100)
+
+    def test_category_totals(self):
+        """Součty po kategoriích a typech, volitelně za období"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-02-01T12:00:00"})
+        self.data_manager.add_entry(self.test_username, "Mzda", {"type": "Příjem", "amount": 5000, "timestamp": "2024-01-15T12:00:00"})
+
+        totals = self.data_manager.get_category_totals(self.test_username)
+        self.assertEqual(totals["Jídlo"], {"Výdaj": 350, "Příjem": 0})
+        self.assertEqual(totals["Mzda"], {"Výdaj": 0, "Příjem": 5000})
+
+        january = self.data_manager.get_category_totals(self.test_username, "2024-01-01", "2024-02-01")
+        self.assertEqual(january["Jídlo"]["Výdaj"], 250)
+
+    def test_rollups_follow_add_and_save(self):
+        """Materializované součty se posouvají při přidání i uložení a odpovídají přestavbě"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-20T12:00:00"})
+        self.data_manager.add_entry(self.test_username, "Mzda", {"type": "Příjem", "amount": 5000, "timestamp": "2024-02-15T12:00:00"})
+        self.assertEqual(self.data_manager.get_rollups(self.test_username), [
+            ("Jídlo", "Výdaj", "2024-01", 350.0, 2),
+            ("Mzda", "Příjem", "2024-02", 5000.0, 1),
+        ])
+
+        # Smazání záznamu přes uložení celých dat
+        data = self.data_manager.load_data(self.test_username)
+        data["Jídlo"] = data["Jídlo"][:1]
+        self.data_manager.save_data(self.test_username, data)
+        rollups = self.data_manager.get_rollups(self.test_username)
+        self.assertEqual(rollups[0], ("Jídlo", "Výdaj", "2024-01", 250.0, 1))
+
+        self.assertTrue(self.data_manager.rebuild_rollups(self.test_username))
+        self.assertEqual(self.data_manager.get_rollups(self.test_username), rollups)
+
+    def test_update_and_delete_by_id(self):
+        """Záznamy dostanou id a dají se hromadně upravit i smazat podle něj"""
+        self.data_manager.add_entries(self.test_username, [
+            ("Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00", "note": "Oběd"}),
+            ("Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-02T12:00:00"}),
+            ("Mzda", {"type": "Příjem", "amount": 5000, "timestamp": "2024-01-15T12:00:00"}),
+        ])
+        data = self.data_manager.load_data(self.test_username)
+        lunch, snack = data["Jídlo"]
+        salary = data["Mzda"][0]
+        self.assertEqual(len({lunch["id"], snack["id"], salary["id"]}), 3)
+
+        updated = self.data_manager.update_entries(self.test_username, [
+            ("Restaurace", {"id": lunch["id"], "amount": 300.0}),
+            ("Mzda", {"id": salary["id"], "note": "Leden"}),
+            ("Jídlo", {"id": "neexistuje", "amount": 1.0}),
+        ])
+        self.assertEqual(self.data_manager.load_data(self.test_username)["Mzda"][0]["note"], "Leden")
+        deleted = self.data_manager.delete_entries(self.test_username, [snack["id"], salary["id"]])
+        self.assertEqual((updated, deleted), (2, 2))
+
+        expected = {"Restaurace": [{**lunch, "amount": 300.0}]}
+        for manager in (self.data_manager, DataManager(data_dir=self.test_dir, storage_backend=self.backend)):
+            data = manager.load_data(self.test_username)
+            self.assertEqual({c: e for c, e in data.items() if c not in ("expense", "investment")}, expected)
+        self.assertEqual(self.data_manager.get_rollups(self.test_username), [
+            ("Restaurace", "Výdaj", "2024-01", 300.0, 1)
+        ])
+
+        # Upravený záznam se kontroluje na duplicity pod novými hodnotami
+        self.assertFalse(self.data_manager.storage.add_entry(self.test_username, "Restaurace", {
+            "type": "Výdaj", "amount": 300.0, "timestamp": "2024-01-01T12:00:00"
+        }))
+
+    def test_batch_single_load_and_write(self):
+        """Dávka změn ledgeru, investic a historie se načte i zapíše jen jednou"""
+        self.data_manager.add_entries(self.test_username, [
+            ("Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}),
+            ("Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-02T12:00:00"}),
+        ])
+        lunch, snack = self.data_manager.load_data(self.test_username)["Jídlo"]
+        storage = self.data_manager.storage
+
+        with mock.patch.object(storage, "load_data", wraps=storage.load_data) as load, \
+                mock.patch.object(storage, "save_data", wraps=storage.save_data) as save:
+            with self.data_manager.batch(self.test_username) as batch:
+                self.assertTrue(batch.add_entry("Mzda", {"type": "Příjem", "amount": 5000, "timestamp": "2024-01-15T12:00:00"}))
+                self.assertFalse(batch.add_entry("Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}))
+                self.assertTrue(batch.update_entry("Jídlo", {"id": lunch["id"], "amount": 300.0}))
+                self.assertEqual(batch.delete_entries([snack["id"]]), 1)
+                batch.add_investment({"type": "ETF", "name": "VWCE", "amount": 1000.0, "date": "2024-01-01"})
+                batch.log_change("VWCE", 0, 1000.0)
+            self.assertEqual((load.call_count, save.call_count), (1, 1))
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual([e["amount"] for e in data["Jídlo"]], [300.0])
+        self.assertEqual(data["Mzda"][0]["amount"], 5000)
+        self.assertEqual(data["investment"][0]["name"], "VWCE")
+        self.assertEqual(self.data_manager.get_history(self.test_username)[0]["new_value"], 1000.0)
+        self.assertEqual(self.data_manager.get_category_totals(self.test_username)["Jídlo"]["Výdaj"], 300.0)
+
+    def test_batch_ledger_changes_without_snapshot(self):
+        """Dávka jen se změnami ledgeru se zapíše jako záznamy, bez nového snapshotu"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        entry = self.data_manager.load_data(self.test_username)["Jídlo"][0]
+        storage = self.data_manager.storage
+
+        with mock.patch.object(storage, "save_data", wraps=storage.save_data) as save:
+            with self.data_manager.batch(self.test_username) as batch:
+                batch.update_entry("Jídlo", {"id": entry["id"], "note": "Oběd"})
+            save.assert_not_called()
+        self.assertEqual(self.data_manager.load_data(self.test_username)["Jídlo"][0]["note"], "Oběd")
+
+    def test_batch_rollback_on_exception(self):
+        """Výjimka uvnitř dávky zahodí všechny změny"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        before = self.data_manager.load_data(self.test_username)
+
+        with self.assertRaises(RuntimeError):
+            with self.data_manager.batch(self.test_username) as batch:
+                batch.delete_entries([before["Jídlo"][0]["id"]])
+                batch.add_expense({"amount": 100, "category": "Jídlo", "type": "Výdaj", "date": "2024-01-01"})
+                raise RuntimeError("přerušeno")
+
+        self.assertEqual(self.data_manager.load_data(self.test_username), before)
+
+    def test_rollups_persisted_with_snapshot(self):
+        """Součty snapshotu se čtou ze souboru a neplatný soubor se přestaví"""
+        self.data_manager.save_data(self.test_username, {
+            "Jídlo": [{"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}]
+        })
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 50, "timestamp": "2024-01-02T12:00:00"})
+        expected = [("Jídlo", "Výdaj", "2024-01", 300.0, 2)]
+
+        # Nová instance nemá součty v paměti: snapshot ze souboru + žurnál
+        other = DataManager(data_dir=self.test_dir)
+        self.assertEqual(other.get_rollups(self.test_username), expected)
+
+        # Soubor se součty neodpovídající snapshotu se ignoruje a přestaví
+        rollups_file = other.storage.get_user_rollups_file(self.test_username)
+        atomic_write_json(rollups_file, {"snapshot": None, "rows": [["Jídlo", "Výdaj", "2024-01", 1.0, 1]]})
+        third = DataManager(data_dir=self.test_dir)
+        self.assertEqual(third.get_rollups(self.test_username), expected)
+
+    def test_backfill_entry_ids(self):
+        """Záznamy ze starých souborů dostanou id migrací, vyhrazené seznamy zůstanou beze změny"""
+        data_file = self.data_manager.storage.get_user_data_file(self.test_username)
+        atomic_write_json(data_file, {
+            "expense": [{"amount": 100, "category": "Jídlo", "type": "Výdaj", "date": "2024-01-01"}],
+            "investment": [],
+            "Jídlo": [{"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"}]
+        })
+        self.assertEqual(self.data_manager.backfill_entry_ids(), {self.test_username: 1})
+        self.assertEqual(self.data_manager.backfill_entry_ids(), {})
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertTrue(data["Jídlo"][0]["id"])
+        self.assertNotIn("id", data["expense"][0])
+
+    def test_import_stream_merges_buckets_without_duplicates(self):
+        """Výdaje a investice z importu se přidají jen jednou, i při jinak zapsané částce"""
+        with self.data_manager.batch(self.test_username) as batch:
+            batch.add_investment({"type": "ETF", "name": "VWCE", "amount": 1000.0, "date": "2024-01-01"})
+        payload = json.dumps({
+            "expense": [{"amount": 100, "category": "Jídlo", "type": "Výdaj", "date": "2024-01-01"},
+                        {"amount": 100.0, "category": "Jídlo", "type": "Výdaj", "date": "2024-01-01"}],
+            "investment": [{"type": "ETF", "name": "VWCE", "amount": 1000, "date": "2024-01-01"},
+                           {"type": "ETF", "name": "VWCE", "amount": 1000, "date": "2024-02-01"}],
+        }).encode("utf-8")
+
+        report = self.data_manager.import_stream(self.test_username, payload, format="json")
+        self.assertEqual((report.added, report.duplicates), (2, 2))
+        report = self.data_manager.import_stream(self.test_username, payload, format="json")
+        self.assertEqual((report.added, report.duplicates), (0, 4))
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["expense"]), 1)
+        self.assertEqual([item["date"] for item in data["investment"]], ["2024-01-01", "2024-02-01"])
+
+    def test_import_stream_merges_and_reports_errors(self):
+        """Import po blocích sloučí záznamy s existujícími, přeskočí duplicity a vrátí chybné řádky"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        csv_file = os.path.join(self.test_dir, "import.csv")
+        with open(csv_file, 'w', encoding='utf-8') as f:
+            f.write("Kategorie,Částka,Datum,Poznámka,Typ\n"
+                    "Jídlo,250,2024-01-01T12:00:00,,Výdaj\n"
+                    "Mzda,\"30 000,50\",31.01.2024,Výplata,Příjem\n"
+                    ",100,2024-01-02,,\n"
+                    "Jídlo,abc,2024-01-02,,\n"
+                    "Jídlo,100,zítra,,\n")
+        fractions = []
+
+        report = self.data_manager.import_stream(
+            self.test_username, csv_file, format="csv", chunksize=2,
+            progress=lambda fraction, report: fractions.append(fraction)
+        )
+
+        self.assertTrue(report.ok)
+        self.assertEqual((report.rows, report.added, report.duplicates, report.invalid), (5, 1, 1, 3))
+        self.assertEqual([error["row"] for error in report.errors], [4, 5, 6])
+        self.assertEqual(len(fractions), 3)
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(len(data["Jídlo"]), 1)
+        self.assertEqual(data["Mzda"][0]["amount"], 30000.5)
+        self.assertEqual(data["Mzda"][0]["timestamp"], "2024-01-31T00:00:00")
+
+        # Opakovaný import nic nepřidá
+        report = self.data_manager.import_stream(self.test_username, csv_file, format="csv")
+        self.assertEqual((report.added, report.duplicates), (0, 2))
+
+    def test_import_from_bytes_and_buffer(self):
+        """Import přijímá i bajty a binární buffer (nahraný soubor) bez zápisu na disk"""
+        csv_bytes = "Kategorie,Částka,Datum\nJídlo,250,2024-01-01T12:00:00\n".encode("utf-8")
+        jsonl_bytes = b'{"category":"Mzda","type":"P\xc5\x99\xc3\xadjem","amount":30000,"timestamp":"2024-01-31T09:00:00"}\n'
+
+        self.assertTrue(self.data_manager.import_data(self.test_username, csv_bytes, format="csv"))
+        buffer = io.BytesIO(jsonl_bytes)
+        buffer.read()  # Buffer se čte od začátku bez ohledu na aktuální pozici
+        self.assertTrue(self.data_manager.import_data(self.test_username, buffer, format="jsonl"))
+        self.assertFalse(buffer.closed)
+
+        data = self.data_manager.load_data(self.test_username)
+        self.assertEqual(data["Jídlo"][0]["amount"], 250.0)
+        self.assertEqual(data["Mzda"][0]["type"], "Příjem")
+
+    def test_export_formats_round_trip(self):
+        """Proudový export do JSON, JSON Lines i CSV (i gzip) lze znovu importovat"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00", "note": "Oběd, \"menu\""})
+        self.data_manager.add_entry(self.test_username, "Mzda", {"type": "Příjem", "amount": 30000, "timestamp": "2024-01-31T09:00:00"})
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 120, "timestamp": "2024-02-01T12:00:00"})
+
+        for format in ("json", "jsonl", "csv"):
+            export_file = os.path.join(self.test_dir, f"export.{format}")
+            self.assertTrue(self.data_manager.export_data(self.test_username, export_file, format=format))
+            report = self.data_manager.import_stream("other_user", export_file, format=format)
+            self.assertEqual((report.added, report.invalid), (3, 0), format)
+            self.data_manager.delete_entries("other_user", [
+                entry["id"] for entries in self.data_manager.load_data("other_user").values() for entry in entries
+                if "id" in entry
+            ])
+
+        exported = json.loads(self.data_manager.export_bytes(self.test_username, "json"))
+        self.assertEqual([e["amount"] for e in exported["Jídlo"]], [250, 120])
+        compressed = self.data_manager.export_bytes(self.test_username, "csv", compress=True)
+        self.assertEqual(gzip.decompress(compressed), self.data_manager.export_bytes(self.test_username, "csv"))
+
+    @unittest.skipUnless(parquet_available(), "pyarrow není k dispozici")
+    def test_parquet_round_trip(self):
+        """Export do Parquet má typované sloupce a jde importovat i se seznamy výdajů a investic"""
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00", "note": "Oběd"})
+        self.data_manager.add_entry(self.test_username, "Mzda", {"type": "Příjem", "amount": 30000.5, "timestamp": "2024-01-31T09:00:00.250000"})
+        with self.data_manager.batch(self.test_username) as batch:
+            batch.add_investment({"amount": 1000, "type": "Akcie", "name": "ČEZ", "date": "2024-02-01", "note": ""})
+        parquet_file = os.path.join(self.test_dir, "export.parquet")
+        self.assertTrue(self.data_manager.export_data(self.test_username, parquet_file, format="parquet"))
+
+        frame = pd.read_parquet(parquet_file)
+        self.assertEqual(str(frame["category"].dtype), "category")
+        self.assertEqual(str(frame["amount"].dtype), "float64")
+        self.assertTrue(str(frame["date"].dtype).startswith("datetime64"))
+
+        report = self.data_manager.import_stream("other_user", parquet_file, format="parquet")
+        self.assertEqual((report.added, report.invalid), (3, 0))
+        data = self.data_manager.load_data("other_user")
+        self.assertEqual(data["Mzda"][0]["timestamp"], "2024-01-31T09:00:00.250000")
+        self.assertEqual(data["investment"][0]["name"], "ČEZ")
+        report = self.data_manager.import_stream(self.test_username, parquet_file, format="parquet")
+        self.assertEqual((report.added, report.duplicates), (0, 3))
+
+    def test_export_bytes_cached_per_data_version(self):
+        """Export se při nezměněných datech vrací z cache, po zápisu se sestaví znovu"""
+        export_cache.clear()
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 250, "timestamp": "2024-01-01T12:00:00"})
+        first = self.data_manager.export_bytes(self.test_username, "jsonl")
+        self.assertEqual(self.data_manager.export_bytes(self.test_username, "jsonl"), first)
+        self.assertEqual(export_cache.stats()["hits"], 1)
+
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 300, "timestamp": "2024-01-02T12:00:00"})
+        second = self.data_manager.export_bytes(self.test_username, "jsonl")
+        self.assertEqual(len(second.splitlines()), 2)
+        self.assertEqual(export_cache.stats()["size"], 1)
+
+    def test_export_bytes_cached_per_storage(self):
+        """Dvě úložiště se stejnou verzí dat uživatele nesdílí export v cache"""
+        export_cache.clear()
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+        other = DataManager(data_dir=other_dir, storage_backend=self.backend)
+        other.save_data(self.test_username, {})
+        self.data_manager.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 100, "timestamp": "2024-01-01T12:00:00"})
+        other.add_entry(self.test_username, "Jídlo", {"type": "Výdaj", "amount": 200, "timestamp": "2024-01-01T12:00:00"})
+
+        first = json.loads(self.data_manager.export_bytes(self.test_username, "json"))
+        second = json.loads(other.export_bytes(self.test_username, "json"))
+        self.assertEqual(first["Jídlo"][0]["amount"], 100)
+        self.assertEqual(second["Jídlo"][0]["amount"], 200)
+        self.assertEqual(export_cache.stats()["size"], 2)
+
+
+class TestAtomicWrites(unittest.TestCase):
+    def setUp(self):
+        """Nastavení před každým testem"""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "users.json")
+
+    def tearDown(self):
+        """Úklid po každém testu"""
+        shutil.rmtree(self.test_dir)
+
+    def test_atomic_write_replaces_file(self):
+        """Atomický zápis nahradí obsah a nezanechá dočasné soubory"""
+        atomic_write_json(self.path, {"a": 1})
+        atomic_write_json(self.path, {"b": 2})
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"b": 2})
+        self.assertFalse([name for name in os.listdir(self.test_dir) if name.endswith(".tmp")])
+
+    def test_lock_wait_is_bounded(self):
+        """Zámek držený jiným vláknem vyprší po zadaném čase"""
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with file_lock(self.path):
+                acquired.set()
+                release.wait()
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        acquired.wait()
+        try:
+            with self.assertRaises(FileLockTimeout):
+                with file_lock(self.path, timeout=0.1):
+                    pass
+        finally:
+            release.set()
+            thread.join()
+
+    def test_lock_is_reentrant(self):
+        """Vnořené získání zámku ve stejném vlákně nezpůsobí uváznutí"""
+        with file_lock(self.path):
+            with file_lock(self.path, timeout=0.1):
+                atomic_write_json(self.path, {"a": 1})
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_json_profiles(self):
+        """Kompaktní a odsazený profil dávají stejná data, s orjson i bez něj"""
+        data = {"Jídlo": [{"type": "Výdaj", "amount": 12.5, "note": "Oběd"}]}
+        orjson = file_utils.orjson
+        try:
+            for codec in (orjson, None):
+                file_utils.orjson = codec
+                compact = dumps(data, pretty=False)
+                self.assertNotIn("\n", compact)
+                self.assertNotIn(": ", compact)
+                self.assertIn("\n", dumps(data, pretty=True))
+                self.assertEqual(loads(compact), data)
+        finally:
+            file_utils.orjson = orjson
+
+
+class TestSqliteStorage(TestDataStorage):
+    def setUp(self):
+        """Nastavení před každým testem"""
+        self.test_username = "test_user"
+        self.test_dir = tempfile.mkdtemp()
+        self.backend = "sqlite"
+        self.data_manager = DataManager(data_dir=self.test_dir, storage_backend=self.backend)
+        self.data_manager.save_data(self.test_username, {})
+
+    # Testy žurnálu se týkají pouze JSON backendu
+    test_add_entry_appends_to_journal = None
+    test_journal_compaction = None
+    test_truncated_journal_line_is_ignored = None
+    test_load_data_uses_cache = None
+    test_cache_invalidated_by_external_write = None
+    test_rollups_persisted_with_snapshot = None
+    test_backfill_entry_ids = None
+
+    def test_round_trip(self):
+        """Data uložená do SQLite se načtou ve stejném tvaru"""
+        data = {
+            "Jídlo": [{"type": "Výdaj", "amount": 250.0, "timestamp": "2024-01-01T12:00:00", "note": "Oběd"}],
+            "investment": [{"type": "ETF", "name": "VWCE", "amount": 1000.0, "date": "2024-01-01"}]
+        }
+        self.assertTrue(self.data_manager.save_data(self.test_username, data))
+        self.assertEqual(self.data_manager.load_data(self.test_username), data)
+        self.assertEqual(self.data_manager.load_data("other_user"), {'expense': [], 'investment': []})
+
+    def test_backfill_entry_ids(self):
+        """Řádky vložené před zavedením id dostanou id migrací"""
+        conn = self.data_manager.storage._connect()
+        conn.execute(
+            "INSERT INTO ledger_entries (username, category, type, amount, timestamp, payload) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.test_username, "Jídlo", "Výdaj", 250.0, "2024-01-01T12:00:00",
+             '{"type":"Výdaj","amount":250.0,"timestamp":"2024-01-01T12:00:00"}')
+        )
+        conn.commit()
+        self.assertEqual(self.data_manager.backfill_entry_ids(self.test_username), {self.test_username: 1})
+        entry = self.data_manager.load_data(self.test_username)["Jídlo"][0]
+        self.assertEqual(self.data_manager.delete_entries(self.test_username, [entry["id"]]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
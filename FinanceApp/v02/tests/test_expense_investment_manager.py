@@ -170,5 +170,40 @@ class TestExpenseInvestmentManager(unittest.TestCase):
         # Ověření vytvoření záložního souboru
         self.assertTrue(os.path.exists(self.expenses_file + '.backup'))
 
+    def test_migrate_legacy_files(self):
+        """Test převodu starých souborů do jednotného úložiště"""
+        username = "legacy_user"
+        legacy_expenses = [{"amount": 300.0, "category": "Doprava", "type": "Výdaj", "date": "2024-03-01", "note": ""}]
+        legacy_investments = [{"type": "ETF", "name": "VWCE", "amount": 1000.0, "date": "2024-03-01"}]
+        expenses_file = self.data_manager.get_user_expenses_file(username)
+        investments_file = self.data_manager.get_user_investments_file(username)
+        with open(expenses_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy_expenses, f)
+        with open(investments_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy_investments, f)
+
+        result = self.data_manager.migrate_legacy_files(username)
+        self.assertEqual(result, {username: ["expense", "investment"]})
+
+        # Staré soubory jsou označené jako převedené a data jsou v jednotném úložišti
+        self.assertFalse(os.path.exists(expenses_file))
+        self.assertTrue(os.path.exists(expenses_file + '.migrated'))
+        data = self.data_manager.load_data(username)
+        self.assertEqual(data["expense"], legacy_expenses)
+        self.assertEqual(data["investment"], legacy_investments)
+        self.assertEqual(self.data_manager.load_investments(username), legacy_investments)
+
+    def test_save_without_dual_write(self):
+        """Test uložení bez zápisu do starých souborů"""
+        self.data_manager.LEGACY_DUAL_WRITE = False
+        with open(self.investments_file, 'w', encoding='utf-8') as f:
+            json.dump([{"type": "Akcie", "name": "Apple", "amount": 1.0, "date": "2024-03-28"}], f)
+
+        self.data_manager.save_investments(self.test_username, [])
+
+        # Starý soubor se už nezapisuje ani nečte
+        self.assertFalse(os.path.exists(self.investments_file))
+        self.assertEqual(self.data_manager.load_investments(self.test_username), [])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -148,6 +148,26 @@ class TestExpenseTracker(unittest.TestCase):
         self.assertIn('Mzda', updated_data)  # Kategorie Mzda by měla zůstat
         self.assertTrue(changes_made)
 
+    def test_edit_and_delete_by_id(self):
+        """Test úpravy a smazání záznamů podle id"""
+        data = self.data_manager.load_data(self.test_user)
+        rent = data['Nájem'][0]
+        salary = data['Mzda'][0]
+        
+        # Úprava a smazání jednou dávkou bez porovnávání hodnot
+        updated = self.data_manager.update_entries(self.test_user, [
+            ('Nájem', {'id': rent['id'], 'amount': 16000.0, 'note': 'Updated note'})
+        ])
+        deleted = self.data_manager.delete_entries(self.test_user, [salary['id']])
+        
+        # Ověření změn
+        updated_data = self.data_manager.load_data(self.test_user)
+        self.assertEqual((updated, deleted), (1, 1))
+        self.assertEqual(updated_data['Nájem'][0]['amount'], 16000.0)
+        self.assertEqual(updated_data['Nájem'][0]['note'], "Updated note")
+        self.assertEqual(updated_data['Nájem'][0]['id'], rent['id'])
+        self.assertNotIn('Mzda', updated_data)
+
     def test_add_new_record(self):
         """Test přidání nového záznamu"""
         # Vytvoření nového záznamu
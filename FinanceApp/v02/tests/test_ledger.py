@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+
+from ledger import (
+    category_totals, filter_period, ledger_frame, period_rollups, period_totals,
+    records_frame, type_totals
+)
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        """Nastavení před každým testem"""
+        self.data = {
+            "expense": [],
+            "investment": [],
+            "Jídlo": [
+                {"type": "Výdaj", "amount": 250.5, "timestamp": "2024-01-15T12:00:00", "note": "Oběd"},
+                {"type": "Výdaj", "amount": "100", "timestamp": "2024-02-01T08:30:00"}
+            ],
+            "Mzda": [
+                {"type": "Příjem", "amount": 30000, "timestamp": "2024-01-31T09:00:00", "note": ""}
+            ]
+        }
+
+    def test_typed_columns(self):
+        """Ledger má typované sloupce a vynechává vyhrazené seznamy"""
+        ledger = ledger_frame(self.data)
+        self.assertEqual(len(ledger), 3)
+        self.assertIsInstance(ledger["category"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(ledger["type"].dtype, pd.CategoricalDtype)
+        self.assertEqual(ledger["amount"].dtype, "float64")
+        self.assertTrue(pd.api.types.is_datetime64_dtype(ledger["date"]))
+        self.assertEqual(set(ledger["category"]), {"Jídlo", "Mzda"})
+        self.assertEqual(ledger["note"].tolist(), ["Oběd", "", ""])
+
+    def test_aggregations(self):
+        """Součty podle typu, kategorie a období"""
+        ledger = ledger_frame(self.data)
+        self.assertEqual(type_totals(ledger).to_dict(), {"Výdaj": 350.5, "Příjem": 30000.0})
+        self.assertEqual(category_totals(ledger).loc["Jídlo", "Výdaj"], 350.5)
+        monthly = period_totals(ledger, "M")
+        self.assertEqual(monthly.loc[pd.Period("2024-01", "M"), "Příjem"], 30000.0)
+        self.assertEqual(monthly.loc[pd.Period("2024-02", "M"), "Výdaj"], 100.0)
+
+    def test_empty_ledger(self):
+        """Prázdná data dávají prázdný ledger i prázdné souhrny"""
+        ledger = ledger_frame({"expense": [], "investment": []})
+        self.assertTrue(ledger.empty)
+        self.assertEqual(type_totals(ledger).to_dict(), {"Výdaj": 0.0, "Příjem": 0.0})
+        self.assertTrue(period_totals(ledger, "M").empty)
+
+    def test_records_with_date_or_timestamp(self):
+        """Ploché záznamy berou datum z 'date' nebo 'timestamp'"""
+        ledger = records_frame([
+            {"category": "Nájem", "type": "Výdaj", "amount": 15000, "date": "2024-03-01"},
+            {"category": "Jídlo", "type": "Výdaj", "amount": 80.0, "timestamp": "2024-03-02T18:00:00"}
+        ])
+        self.assertEqual(ledger["date"].dt.day.tolist(), [1, 2])
+        self.assertEqual(ledger["amount"].sum(), 15080.0)
+
+    def test_period_rollups(self):
+        """Všechna období se sčítají z denní agregace a souhlasí s celkem"""
+        ledger = ledger_frame(self.data)
+        rollups = period_rollups(ledger)
+        self.assertEqual(set(rollups), {"D", "W", "M", "Y"})
+        for table in rollups.values():
+            self.assertEqual(table["Výdaj"].sum(), 350.5)
+            self.assertEqual(table["Příjem"].sum(), 30000.0)
+        self.assertEqual(len(rollups["D"]), 3)
+        self.assertEqual(len(rollups["M"]), 2)
+        self.assertEqual(rollups["Y"].loc[pd.Period("2024", "Y"), "Výdaj"], 350.5)
+
+    def test_filter_period(self):
+        """Filtrování podle roku, měsíce, týdne (od pondělí) a dne"""
+        ledger = ledger_frame(self.data)
+        self.assertEqual(len(filter_period(ledger, "Celkem")), 3)
+        self.assertEqual(len(filter_period(ledger, "Rok", date(2024, 6, 1))), 3)
+        self.assertEqual(len(filter_period(ledger, "Měsíc", date(2024, 1, 1))), 2)
+        # 2024-01-29 je pondělí, týden obsahuje 31. 1. i 1. 2.
+        self.assertEqual(len(filter_period(ledger, "Týden", date(2024, 2, 4))), 2)
+        self.assertEqual(len(filter_period(ledger, "Den", date(2024, 1, 15))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
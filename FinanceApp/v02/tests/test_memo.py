@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memo import memo_stats, memoize, normalize
+
+class TestMemo(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @memoize(maxsize=2, name="tests.plan")
+        def plan(amount, rate, years=30):
+            self.calls.append((amount, rate, years))
+            return amount * rate * years
+
+        self.plan = plan
+
+    def test_hits_share_normalized_arguments(self):
+        """Stejné vstupy zadané jinak (int/float, pojmenovaně, výchozí hodnota) sdílí výsledek"""
+        self.assertEqual(self.plan(100, 2), 6000)
+        self.assertEqual(self.plan(100.0, rate=2.0, years=30), 6000)
+        self.assertEqual(self.plan(np.int64(100), np.float64(2)), 6000)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.plan.cache.stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'size': 1})
+        self.assertIn({'function': 'tests.plan', **self.plan.cache.stats()}, memo_stats())
+
+    def test_lru_bound(self):
+        """Cache drží nejvýše maxsize výsledků a vyřadí nejdéle nepoužitý"""
+        for amount in (1, 2, 1, 3, 1, 2):
+            self.plan(amount, 1)
+        self.assertEqual([call[0] for call in self.calls], [1, 2, 3, 2])
+        self.assertEqual(self.plan.cache.stats()['size'], 2)
+
+    def test_arrays_and_unhashable_arguments(self):
+        """Pole NumPy jsou součástí klíče, nehashovatelné argumenty se počítají bez cache"""
+        self.assertEqual(normalize(np.array([1.0, 2.0])), normalize(np.array([1.0, 2.0])))
+        self.assertNotEqual(normalize(np.array([1.0, 2.0])), normalize(np.array([1.0, 3.0])))
+        self.assertEqual(normalize([1, (2, 3)]), (1.0, (2.0, 3.0)))
+
+        @memoize
+        def count(items):
+            self.calls.append(items)
+            return len(items)
+
+        self.assertEqual(count({1, 2}), 2)
+        self.assertEqual(count({1, 2}), 2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(count.cache.stats()['misses'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
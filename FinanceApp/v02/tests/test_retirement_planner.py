@@ -0,0 +1,142 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from retirement_planner import (
+    _percentiles, calculate_graph_data, calculate_retirement_plan, income_surplus, retirement_kernel,
+    sensitivity_analysis, sensitivity_grid, simulate_retirement, solve_retirement_goal, tornado_data
+)
+
+PLAN = dict(
+    current_age=30, retirement_age=65, life_expectancy=85, current_income=50_000, income_growth=2.0,
+    current_savings=100_000, monthly_savings=5_000, investment_return=5.0, inflation_rate=2.0
+)
+
+class TestRetirementKernel(unittest.TestCase):
+    def test_plan_values(self):
+        """Úspory v důchodu jsou současné úspory a roční vklady s výnosem"""
+        plan = calculate_retirement_plan(**PLAN)
+        expected = 100_000 * 1.05 ** 35 + sum(60_000 * 1.05 ** (35 - year - 1) for year in range(35))
+        self.assertAlmostEqual(plan['total_savings_at_retirement'], expected, places=4)
+        self.assertEqual(plan['years_to_retirement'], 35)
+        self.assertIsInstance(plan['years_to_retirement'], int)
+        self.assertAlmostEqual(plan['required_retirement_income'], 50_000 * 1.02 ** 35 * 0.7)
+        zero = calculate_retirement_plan(**{**PLAN, 'investment_return': 0.0})
+        self.assertAlmostEqual(zero['total_savings_at_retirement'], 100_000 + 35 * 60_000)
+
+    def test_kernel_broadcasts(self):
+        """Jádro vyhodnotí celé pole vstupů najednou se stejným výsledkem jako jednotlivá volání"""
+        returns = np.linspace(0, 10, 7)
+        batch = retirement_kernel(**{**PLAN, 'investment_return': returns[:, None], 'monthly_savings': [1_000, 5_000]})
+        self.assertEqual(batch['monthly_savings_needed'].shape, (7, 2))
+        single = calculate_retirement_plan(**{**PLAN, 'investment_return': returns[3], 'monthly_savings': 5_000})
+        self.assertAlmostEqual(batch['monthly_savings_needed'][3, 1], single['monthly_savings_needed'])
+
+    def test_graph_data(self):
+        """Roční tabulka: vklad na začátku roku, příjem roste do důchodu, pak se vyplácí důchod"""
+        data = calculate_graph_data(**PLAN)
+        self.assertEqual(list(data['Věk']), list(range(30, 86)))
+        self.assertAlmostEqual(data['Úspory'][1], (100_000 + 60_000) * 1.05)
+        self.assertAlmostEqual(data['Příjem'][0], 50_000 * 1.02)
+        self.assertEqual(data['Příjem'][35], 0)
+        self.assertAlmostEqual(data['Důchod'][35], 50_000 * 1.02 ** 35 * 0.7)
+        self.assertAlmostEqual(data['Reálný důchod'][40], data['Důchod'][40] / 1.02 ** 40)
+
+class TestSensitivity(unittest.TestCase):
+    def test_analysis_matches_single_plans(self):
+        """Dávkový výpočet dává stejné výsledky jako jednotlivé plány"""
+        analysis = sensitivity_analysis(PLAN, steps=5)
+        self.assertEqual(set(analysis['parameter']), {
+            'retirement_age', 'investment_return', 'inflation_rate', 'income_growth', 'monthly_savings', 'life_expectancy'
+        })
+        self.assertEqual(list(analysis.loc[analysis['parameter'] == 'retirement_age', 'value']), list(range(60, 71)))
+        for row in analysis.sample(10, random_state=0).itertuples():
+            plan = calculate_retirement_plan(**{**PLAN, row.parameter: row.value})
+            self.assertAlmostEqual(row.monthly_savings_needed, plan['monthly_savings_needed'], places=6)
+            self.assertAlmostEqual(row.sustainable_monthly_income, plan['sustainable_monthly_income'], places=6)
+
+    def test_tornado(self):
+        """Tornádo je seřazené podle rozpětí, věk dožití ovlivní jen udržitelný příjem"""
+        tornado = tornado_data(PLAN, 'total_savings_at_retirement')
+        self.assertTrue(tornado['swing'].is_monotonic_increasing)
+        self.assertEqual(set(tornado['parameter'].iloc[-3:]), {'retirement_age', 'monthly_savings', 'investment_return'})
+        self.assertAlmostEqual(tornado.set_index('parameter').loc['life_expectancy', 'swing'], 0, places=6)
+        sustainable = tornado_data(PLAN, 'sustainable_monthly_income').set_index('parameter')
+        self.assertLess(sustainable.loc['life_expectancy', 'high'], 0)
+
+    def test_grid(self):
+        """Heatmapa má hodnoty pro všechny kombinace, nemožné kombinace věků jsou NaN"""
+        grid = sensitivity_grid(PLAN, 'investment_return', 'monthly_savings', 'total_savings_at_retirement', steps=5)
+        self.assertEqual(grid.shape, (5, 5))
+        expected = calculate_retirement_plan(**{**PLAN, 'investment_return': grid.columns[1], 'monthly_savings': grid.index[2]})
+        self.assertAlmostEqual(grid.iloc[2, 1], expected['total_savings_at_retirement'], places=4)
+        ages = sensitivity_grid({**PLAN, 'retirement_age': 66, 'life_expectancy': 68}, 'retirement_age', 'life_expectancy', 'sustainable_monthly_income')
+        # Řádky jsou věk dožití (osa Y), sloupce věk odchodu do důchodu (osa X)
+        self.assertFalse(np.isnan(ages.loc[68, 67]))
+        self.assertTrue(np.isnan(ages.loc[66, 67]))
+
+class TestGoalSeeking(unittest.TestCase):
+    def test_minimal_savings_and_return(self):
+        """Nalezené úspory a výnos právě dosáhnou cíle, o kousek méně už ne"""
+        for variable, step in (('monthly_savings', 1.0), ('investment_return', 0.001)):
+            value = solve_retirement_goal(PLAN, variable)
+            self.assertGreaterEqual(income_surplus(PLAN, **{variable: value}), 0)
+            self.assertLess(income_surplus(PLAN, **{variable: value - step}), 0)
+        savings = solve_retirement_goal(PLAN, 'monthly_savings', target_income=20_000)
+        self.assertLess(savings, solve_retirement_goal(PLAN, 'monthly_savings'))
+
+    def test_earliest_retirement_age(self):
+        """Nejdřívější věk je první celý věk, ve kterém je cíle dosaženo"""
+        age = solve_retirement_goal(PLAN, 'retirement_age', target_income=20_000)
+        self.assertIsInstance(age, int)
+        self.assertGreaterEqual(income_surplus(PLAN, 20_000, retirement_age=age), 0)
+        self.assertLess(income_surplus(PLAN, 20_000, retirement_age=age - 1), 0)
+
+    def test_unreachable_goal(self):
+        """Nedosažitelný cíl vrací None, dosažený hned na dolní mezi vrací mez"""
+        self.assertIsNone(solve_retirement_goal(PLAN, 'investment_return', target_income=1e9))
+        self.assertIsNone(solve_retirement_goal({**PLAN, 'monthly_savings': 0, 'current_savings': 0}, 'retirement_age'))
+        self.assertEqual(solve_retirement_goal(PLAN, 'monthly_savings', target_income=0), 0.0)
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_zero_volatility_matches_plan(self):
+        """Bez kolísání dává simulace stejné úspory jako deterministický plán"""
+        simulation = simulate_retirement(**PLAN, return_volatility=0, inflation_volatility=0, paths=100, seed=1)
+        expected = calculate_retirement_plan(**PLAN)['total_savings_at_retirement']
+        for value in simulation['savings_at_retirement'].values():
+            self.assertAlmostEqual(value, expected, places=2)
+        self.assertAlmostEqual(simulation['real_savings_at_retirement'][50], calculate_retirement_plan(**PLAN)['real_savings'], places=2)
+
+    def test_success_and_depletion(self):
+        """Malé čerpání vydrží vždy, velké vyčerpá úspory v důchodu"""
+        safe = simulate_retirement(**PLAN, monthly_withdrawal=1_000, return_volatility=0, inflation_volatility=0, paths=100)
+        self.assertEqual(safe['success_probability'], 1.0)
+        self.assertIsNone(safe['depletion_age'][5])
+        risky = simulate_retirement(**PLAN, paths=20_000, seed=3)
+        self.assertLess(risky['success_probability'], 0.5)
+        self.assertTrue(65 < risky['depletion_age'][5] <= risky['depletion_age'][25] <= 85)
+        self.assertEqual(list(risky['savings_bands'].index), list(range(30, 86)))
+        bands = risky['savings_bands'].to_numpy()
+        self.assertTrue((np.diff(bands, axis=1) >= 0).all())
+
+    def test_seeded_and_independent_of_processes(self):
+        """Stejný seed dává stejné výsledky bez ohledu na počet procesů"""
+        first = simulate_retirement(**PLAN, paths=3_000, seed=7, chunk_size=1_000)
+        second = simulate_retirement(**PLAN, paths=3_000, seed=7, chunk_size=1_000, processes=2)
+        self.assertEqual(first['success_probability'], second['success_probability'])
+        np.testing.assert_allclose(first['savings_bands'], second['savings_bands'])
+        other = simulate_retirement(**PLAN, paths=3_000, seed=8, chunk_size=1_000)
+        self.assertFalse(np.allclose(first['savings_bands'], other['savings_bands']))
+
+    def test_percentiles(self):
+        """Percentily ze seřazeného pole odpovídají np.percentile"""
+        values = np.random.default_rng(0).normal(size=1001)
+        np.testing.assert_allclose(_percentiles(values), np.percentile(values, [5, 25, 50, 75, 95]))
+
+if __name__ == '__main__':
+    unittest.main()
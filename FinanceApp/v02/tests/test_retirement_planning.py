@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Přidání cesty k aplikaci do PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from retirement_planning import calculate_compound_interest, contribution_schedule
+
+def monthly_loop(initial_investment, schedule, annual_rate):
+    """Měsíční cyklus původní calculate_compound_interest (zůstatek a vklady)."""
+    balance = [float(initial_investment)]
+    contributions = [float(initial_investment)]
+    for contribution in schedule:
+        balance.append((balance[-1] + contribution) * (1 + annual_rate / 100 / 12))
+        contributions.append(contributions[-1] + contribution)
+    return np.array(balance), np.array(contributions)
+
+class TestGrowth(unittest.TestCase):
+    def test_constant_contribution_matches_loop(self):
+        """Uzavřený tvar odpovídá měsíčnímu cyklu, i při nulové sazbě"""
+        for annual_rate in (7.0, 0.0):
+            data = calculate_compound_interest(100_000, 5_000, 30, annual_rate)
+            balance, contributions = monthly_loop(100_000, [5_000] * 360, annual_rate)
+            self.assertEqual(list(data.columns), ['years', 'balance', 'contributions', 'interest'])
+            self.assertEqual(len(data), 361)
+            self.assertEqual(data['years'].iloc[-1], 30)
+            np.testing.assert_allclose(data['balance'], balance, rtol=1e-10)
+            np.testing.assert_allclose(data['contributions'], contributions)
+            np.testing.assert_allclose(data['interest'], balance - contributions, rtol=1e-8, atol=1e-6)
+
+    def test_schedule_matches_loop(self):
+        """Rozpis příspěvků (navýšení, přerušení, jednorázový vklad) odpovídá měsíčnímu cyklu"""
+        schedule = contribution_schedule(5_000, 20, annual_increase=3.0, pause=(5, 6), lump_sums={10: 200_000})
+        self.assertEqual(len(schedule), 240)
+        self.assertAlmostEqual(schedule[12], 5_150)
+        self.assertTrue((schedule[60:84] == 0).all())
+        self.assertAlmostEqual(schedule[120], 5_000 * 1.03 ** 10 + 200_000)
+        for annual_rate in (6.0, 0.0):
+            data = calculate_compound_interest(50_000, 5_000, 20, annual_rate, schedule)
+            balance, contributions = monthly_loop(50_000, schedule, annual_rate)
+            np.testing.assert_allclose(data['balance'], balance, rtol=1e-10)
+            np.testing.assert_allclose(data['contributions'], contributions)
+
+    def test_schedule_length(self):
+        """Rozpis s jiným počtem měsíců než doba investice je chyba"""
+        with self.assertRaises(ValueError):
+            calculate_compound_interest(0, 1_000, 2, 5.0, np.ones(12))
+
+if __name__ == '__main__':
+    unittest.main()
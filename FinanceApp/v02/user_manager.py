@@ -9,6 +9,7 @@ import re
 import html
 import bleach
 from config import USER_DATA_DIR
+from file_utils import atomic_write_json, load_json
 
 # Inicializace správce uživatelů jako globální instance
 user_manager = None
@@ -101,8 +102,7 @@ class UserManager:
     def load_users(self) -> Dict:
         """Načte data uživatelů"""
         try:
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_json(self.users_file)
         except:
             return {}
 
@@ -110,8 +110,7 @@ class UserManager:
         """Uloží data uživatelů"""
         if not self.check_disk_space():
             raise ValueError("Nedostatek místa na disku")
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump(users, f, ensure_ascii=False, indent=2)
+        atomic_write_json(self.users_file, users)
         # Nastavení oprávnění pro soubor (čtení a zápis pro vlastníka)
         os.chmod(self.users_file, 0o600)
 